@@ -0,0 +1,219 @@
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("stress_level", "work_hours", "productivity")
+# Smallest baseline standard deviation per metric. Check-ins are mostly whole
+# numbers, so a steady employee has zero variance and a 1-point change would
+# otherwise score a z of about 1000
+MIN_SD = {"stress_level": 0.5, "work_hours": 0.5, "productivity": 0.5}
+DEFAULT_MIN_SD = 0.5
+
+# Per-metric state arrays, one row per employee
+STATE_ARRAYS = ("mean", "var", "count", "cusum_high", "cusum_low")
+
+SPIKE, DRIFT = 0, 1
+KINDS = ("spike", "drift")
+
+
+class StreamingAnomalyDetector:
+    """
+    Per-employee EWMA baselines with z-score and CUSUM alarms
+
+    For each employee and metric the detector keeps an exponentially
+    weighted mean and variance in fixed-size numpy arrays (the standard
+    deviation floored at `min_sd` per metric). A new value is scored against
+    the baseline before it is folded in:
+      * spike - |z| above `z_threshold` (a sudden jump)
+      * drift - the one-sided CUSUM of z beyond `cusum_threshold` (a smaller
+                shift that persists over several check-ins)
+    The state holds at most `max_employees` rows; when full, the least
+    recently seen 1% are dropped and start from a fresh baseline if they
+    come back. observe, observe_batch and stats take one lock, so single
+    and bulk check-ins can update the state from any thread.
+    """
+
+    def __init__(self, metrics: Sequence[str] = METRICS, alpha: float = 0.1, z_threshold: float = 3.5,
+                 cusum_slack: float = 0.5, cusum_threshold: float = 5.0, warmup: int = 5,
+                 max_employees: int = 1_000_000, min_sd: Optional[Dict[str, float]] = None):
+        self.metrics = tuple(metrics)
+        min_sd = {**MIN_SD, **(min_sd or {})}
+        self.min_sd = np.array([min_sd.get(m, DEFAULT_MIN_SD) for m in self.metrics], dtype=np.float32)
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.cusum_slack = cusum_slack
+        self.cusum_threshold = cusum_threshold
+        self.warmup = warmup
+        self.max_employees = max_employees
+
+        self._rows: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._clock = 0
+        self._lock = threading.Lock()
+        self._allocate(min(1024, max_employees))
+        self.evictions = 0
+
+    def _allocate(self, capacity: int):
+        k = len(self.metrics)
+        self.mean = np.zeros((capacity, k), dtype=np.float32)
+        self.var = np.zeros((capacity, k), dtype=np.float32)
+        self.count = np.zeros((capacity, k), dtype=np.uint32)
+        self.cusum_high = np.zeros((capacity, k), dtype=np.float32)
+        self.cusum_low = np.zeros((capacity, k), dtype=np.float32)
+        self.last_seen = np.zeros(capacity, dtype=np.int64)
+
+    def _grow(self):
+        old = {name: getattr(self, name) for name in STATE_ARRAYS + ("last_seen",)}
+        self._allocate(min(2 * len(self.last_seen), self.max_employees))
+        for name, values in old.items():
+            getattr(self, name)[:len(values)] = values
+
+    def _evict(self):
+        """Free the least recently seen 1% of rows"""
+        n = max(1, len(self._ids) // 100)
+        stale = np.argpartition(self.last_seen[:len(self._ids)], n - 1)[:n]
+        for row in stale.tolist():
+            del self._rows[self._ids[row]]
+            self._ids[row] = None
+            for name in STATE_ARRAYS:
+                getattr(self, name)[row] = 0
+        self._free.extend(stale.tolist())
+        self.evictions += n
+
+    def _row(self, employee_id: str) -> int:
+        """Row for the employee, marked as just seen"""
+        self._clock += 1
+        row = self._rows.get(employee_id)
+        if row is not None:
+            self.last_seen[row] = self._clock
+            return row
+        if not self._free:
+            if len(self._ids) == len(self.last_seen):
+                if len(self._ids) < self.max_employees:
+                    self._grow()
+                else:
+                    self._evict()
+        if self._free:
+            row = self._free.pop()
+            self._ids[row] = employee_id
+        else:
+            row = len(self._ids)
+            self._ids.append(employee_id)
+        self._rows[employee_id] = row
+        self.last_seen[row] = self._clock
+        return row
+
+    def _update(self, rows: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Score then absorb one value per row (rows must be distinct)
+
+        Returns:
+            (z-scores, spike flags, drift flags), each [len(rows), k]
+        """
+        present = ~np.isnan(values)
+        mean, var, count = self.mean[rows], self.var[rows], self.count[rows]
+        ready = present & (count >= self.warmup)
+
+        sd = np.maximum(np.sqrt(var), self.min_sd)
+        z = np.where(ready, (values - mean) / sd, 0.0).astype(np.float32)
+        high = np.maximum(0, self.cusum_high[rows] + z - self.cusum_slack)
+        low = np.maximum(0, self.cusum_low[rows] - z - self.cusum_slack)
+        spike = ready & (np.abs(z) > self.z_threshold)
+        drift = ready & ~spike & ((high > self.cusum_threshold) | (low > self.cusum_threshold))
+        # Restart the CUSUM after it fires so one shift raises one alarm
+        fired = spike | drift
+        high[fired] = 0
+        low[fired] = 0
+
+        # EWMA mean/variance, weighting early samples 1/n (plain running
+        # moments) until 1/n drops below alpha, so young baselines are unbiased
+        # Spikes are clipped to the threshold so one outlier doesn't inflate
+        # the variance and hide a shift that follows it
+        values = np.where(spike, mean + np.sign(z) * self.z_threshold * sd, values)
+        diff = np.where(present, values - mean, 0.0)
+        weight = np.maximum(self.alpha, 1.0 / (count + 1.0)).astype(np.float32)
+        step = weight * diff
+        self.mean[rows] = mean + step
+        self.var[rows] = (1 - weight) * (var + diff * step)
+        self.count[rows] = count + present
+        self.cusum_high[rows] = high
+        self.cusum_low[rows] = low
+        return z, spike, drift
+
+    def observe(self, employee_id: str, values: Dict[str, float]) -> List[Dict[str, Any]]:
+        """
+        Score one check-in and fold it into the employee's baseline
+
+        Returns:
+            Anomalies found (empty during warm-up or when nothing stands out)
+        """
+        vector = np.array([[values.get(m, np.nan) for m in self.metrics]], dtype=np.float32)
+        with self._lock:
+            row = self._row(employee_id)
+            z, spike, drift = self._update(np.array([row]), vector)
+        return [
+            {"employee_id": employee_id, "metric": metric, "value": float(vector[0, i]),
+             "z_score": float(z[0, i]), "kind": "spike" if spike[0, i] else "drift",
+             "direction": "up" if z[0, i] > 0 else "down"}
+            for i, metric in enumerate(self.metrics) if spike[0, i] or drift[0, i]
+        ]
+
+    def observe_batch(self, employee_ids: Sequence[str], values: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Score a block of events in arrival order
+
+        Events are grouped into rounds in which every employee appears at most
+        once, so each round is one vectorized update and an employee's events
+        still apply in order.
+
+        Args:
+            employee_ids: One per event; keep batches well below
+                max_employees so no row is evicted mid-batch
+            values: [n, k] in metric order, NaN for missing metrics
+
+        Returns:
+            Arrays describing each anomaly: event (index into the batch),
+            metric (index into self.metrics), z_score and kind (SPIKE/DRIFT)
+        """
+        values = np.asarray(values, dtype=np.float32)
+        with self._lock:
+            rows = np.fromiter((self._row(e) for e in employee_ids), dtype=np.int64, count=len(employee_ids))
+
+            # Occurrence number of each event within its employee
+            order = np.argsort(rows, kind="stable")
+            sorted_rows = rows[order]
+            starts = np.r_[0, np.flatnonzero(np.diff(sorted_rows)) + 1]
+            occurrence = np.empty(len(rows), dtype=np.int64)
+            occurrence[order] = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+
+            found = []
+            for round_number in range(int(occurrence.max()) + 1 if len(rows) else 0):
+                events = np.flatnonzero(occurrence == round_number)
+                z, spike, drift = self._update(rows[events], values[events])
+                event, metric = np.nonzero(spike | drift)
+                found.append((events[event], metric, z[event, metric], np.where(spike[event, metric], SPIKE, DRIFT)))
+
+        if not found:
+            return {"event": np.empty(0, dtype=np.int64), "metric": np.empty(0, dtype=np.int64),
+                    "z_score": np.empty(0, dtype=np.float32), "kind": np.empty(0, dtype=np.int64)}
+        event, metric, z, kind = (np.concatenate(parts) for parts in zip(*found))
+        ordered = np.argsort(event, kind="stable")
+        return {"event": event[ordered], "metric": metric[ordered], "z_score": z[ordered], "kind": kind[ordered]}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "employees": len(self._rows),
+                "capacity": len(self.last_seen),
+                "max_employees": self.max_employees,
+                "evictions": self.evictions,
+                "state_bytes": sum(getattr(self, name).nbytes for name in STATE_ARRAYS + ("last_seen",)),
+            }
+
+# Global instance
+anomaly_detector = StreamingAnomalyDetector()
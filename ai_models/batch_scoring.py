@@ -0,0 +1,92 @@
+import logging
+from typing import Dict, Any
+
+import numpy as np
+
+from ai_models.crisis_detector import CrisisDetector
+
+logger = logging.getLogger(__name__)
+
+# Same cut-offs as CrisisDetector.determine_crisis_level, highest first
+CRISIS_LEVELS = [(8, "immediate"), (5, "high_priority"), (3, "medium_priority")]
+
+# Same cut-offs as the EmployeeCoach tip sections
+COACHING_FOCUS = [(8, "immediate_relief"), (6, "stress_management")]
+
+
+def crisis_scores(detector: CrisisDetector, stress: np.ndarray, hours: np.ndarray,
+                  breaks: np.ndarray, productivity: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Vectorized CrisisDetector.calculate_risk_factors over whole columns
+
+    Returns:
+        Dictionary with risk_score, risk_count and one boolean array per factor
+    """
+    thresholds = detector.red_flags_thresholds
+    factors = {
+        "extreme_stress_detected": stress >= thresholds["extreme_stress"],
+        "excessive_work_hours": hours > thresholds["excessive_hours"],
+        "insufficient_breaks": breaks <= thresholds["no_breaks"],
+        "severe_productivity_drop": productivity <= thresholds["productivity_crash"],
+    }
+    weights = {"extreme_stress_detected": 3}
+
+    risk_score = np.zeros(len(stress), dtype=np.int16)
+    risk_count = np.zeros(len(stress), dtype=np.int16)
+    for name, flagged in factors.items():
+        risk_score += flagged * weights.get(name, 2)
+        risk_count += flagged
+    risk_score += (risk_count >= 3) * 2  # Additional risk for multiple factors
+
+    return {"risk_score": risk_score, "risk_count": risk_count, **factors}
+
+
+def crisis_levels(risk_score: np.ndarray) -> np.ndarray:
+    """Vectorized CrisisDetector.determine_crisis_level"""
+    return np.select([risk_score >= cut for cut, _ in CRISIS_LEVELS],
+                     [level for _, level in CRISIS_LEVELS], default="low_priority")
+
+
+def coaching_focus(stress: np.ndarray) -> np.ndarray:
+    """Which EmployeeCoach tip section to lead with for each stress level"""
+    return np.select([stress >= cut for cut, _ in COACHING_FOCUS],
+                     [focus for _, focus in COACHING_FOCUS], default="long_term_wellness")
+
+
+def score_checkins(columns: Dict[str, np.ndarray], detector: CrisisDetector,
+                   analyzer=None) -> Dict[str, Any]:
+    """
+    Score a block of check-ins at once
+
+    Args:
+        columns: stress_level, work_hours, breaks_taken, productivity and
+            optionally meeting_count arrays of equal length
+        analyzer: StressAnalyzer for the stress risk probability (optional)
+
+    Returns:
+        Dictionary of per-row result arrays
+    """
+    stress = np.asarray(columns["stress_level"], dtype=float)
+    hours = np.asarray(columns["work_hours"], dtype=float)
+    breaks = np.asarray(columns["breaks_taken"], dtype=float)
+    productivity = np.asarray(columns["productivity"], dtype=float)
+
+    scores = crisis_scores(detector, stress, hours, breaks, productivity)
+    levels = crisis_levels(scores["risk_score"])
+    result = {
+        "risk_score": scores["risk_score"],
+        "risk_factor_count": scores["risk_count"],
+        "crisis_level": levels,
+        "alert_required": np.isin(levels, ["immediate", "high_priority"]),
+        "coaching_focus": coaching_focus(stress),
+        # EmployeeCoach.get_break_tips: more break ideas the fewer breaks were taken
+        "break_ideas": np.minimum(3, np.maximum(0, hours // 2 - breaks) + 1).astype(np.int8),
+    }
+
+    if analyzer is not None:
+        meetings = np.asarray(columns.get("meeting_count", np.zeros(len(stress))), dtype=float)
+        probability = analyzer.predict_stress_risk_batch(np.column_stack([hours, meetings, breaks, stress]))
+        result["stress_risk"] = probability
+        result["needs_intervention"] = probability > 0.7
+
+    return result
@@ -1,11 +1,22 @@
+import bisect
 import json
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Lower bounds of the moderate and severe bands the recommendation text is picked by
+STRESS_BANDS = (6.5, 8.0)
+ATTRITION_BANDS = (15.0, 20.0)
+LARGE_TEAM_SIZE = 100
+
 class CompanyAdvisor:
-    def __init__(self):
+    def __init__(self, wellness_policies: List[Dict] = None, department_specific_advice: Dict[str, List[str]] = None):
+        """
+        Args:
+            wellness_policies: Policies to use instead of the defaults (per-tenant advisors)
+            department_specific_advice: Advice per department to use instead of the defaults
+        """
         self.wellness_policies = [
             {
                 "name": "Flexible Work Hours",
@@ -61,6 +72,17 @@ class CompanyAdvisor:
                 "Stress management for client interactions"
             ]
         }
+        
+        # Department urgency: (min avg_stress, min attrition_rate) per level, most urgent first
+        self.urgency_thresholds = {
+            "critical": (8.0, 20.0),
+            "high": (6.5, 15.0)
+        }
+        
+        if wellness_policies is not None:
+            self.wellness_policies = wellness_policies
+        if department_specific_advice is not None:
+            self.department_specific_advice = department_specific_advice
     
     def get_company_recommendations(self, department_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -79,18 +101,18 @@ class CompanyAdvisor:
             team_size = department_data.get('team_size', 50)
             
             recommendations = []
-            urgency_level = "low"
+            urgency_level, stress_band, attrition_band, large_team = self.advice_key(
+                avg_stress, attrition_rate, team_size
+            )
             
             # Analyze stress levels and provide recommendations
-            if avg_stress >= 8.0:
-                urgency_level = "critical"
+            if stress_band == 2:
                 recommendations.extend([
                     "🚨 IMMEDIATE: Implement mandatory stress management program",
                     "🚨 Conduct one-on-one wellness check-ins with all team members", 
                     "🚨 Review and adjust workload distribution immediately"
                 ])
-            elif avg_stress >= 6.5:
-                urgency_level = "high"
+            elif stress_band == 1:
                 recommendations.extend([
                     "⚠️ Schedule weekly team wellness sessions",
                     "⚠️ Introduce flexible work-from-home options",
@@ -98,15 +120,13 @@ class CompanyAdvisor:
                 ])
             
             # Analyze attrition and provide recommendations
-            if attrition_rate >= 20.0:
-                urgency_level = "critical" if urgency_level != "critical" else "critical"
+            if attrition_band == 2:
                 recommendations.extend([
                     "🔍 Conduct detailed exit interviews to identify root causes",
                     "💡 Implement retention bonus and career growth plans",
                     "🤝 Improve manager training for better team support"
                 ])
-            elif attrition_rate >= 15.0:
-                urgency_level = "high" if urgency_level == "low" else urgency_level
+            elif attrition_band == 1:
                 recommendations.extend([
                     "📊 Analyze workload distribution across team",
                     "🎯 Create clear career progression paths", 
@@ -118,7 +138,7 @@ class CompanyAdvisor:
             recommendations.extend(dept_advice[:2])  # Add top 2 department-specific tips
             
             # Add general wellness policies based on team size
-            if team_size > 100:
+            if large_team:
                 recommendations.extend([
                     "🏢 Establish dedicated wellness committee",
                     "📱 Implement company-wide wellness mobile app",
@@ -151,6 +171,27 @@ class CompanyAdvisor:
             logger.error(f"Error in company recommendations: {e}")
             return self.get_fallback_recommendations()
     
+    def classify_urgency(self, avg_stress: float, attrition_rate: float) -> str:
+        """Urgency level (low/high/critical) for a department's stress and attrition"""
+        for level, (stress_cutoff, attrition_cutoff) in self.urgency_thresholds.items():
+            if avg_stress >= stress_cutoff or attrition_rate >= attrition_cutoff:
+                return level
+        return "low"
+    
+    def advice_key(self, avg_stress: float, attrition_rate: float, team_size: int) -> Tuple[str, int, int, bool]:
+        """
+        Everything get_company_recommendations branches on, apart from the department
+        
+        Recommendations, urgency and policies are the same for any two inputs
+        with equal keys, so callers can cache them by it.
+        """
+        return (
+            self.classify_urgency(avg_stress, attrition_rate),
+            bisect.bisect_right(STRESS_BANDS, avg_stress),
+            bisect.bisect_right(ATTRITION_BANDS, attrition_rate),
+            team_size > LARGE_TEAM_SIZE,
+        )
+    
     def calculate_wellness_score(self, avg_stress: float, attrition_rate: float) -> int:
         """Calculate overall wellness score (0-100)"""
         stress_score = max(0, 100 - (avg_stress * 10))  # Convert stress to score
@@ -32,13 +32,15 @@ class CrisisDetector:
             ]
         }
     
-    def detect_crisis_patterns(self, employee_data: Dict[str, Any], historical_data: List[Dict] = None) -> Dict[str, Any]:
+    def detect_crisis_patterns(self, employee_data: Dict[str, Any], historical_data: List[Dict] = None,
+                               forecast: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Detect potential crisis patterns and provide intervention recommendations
         
         Args:
             employee_data: Current employee data
             historical_data: Historical data for pattern analysis
+            forecast: Projection from BurnoutForecaster.employee_forecast
             
         Returns:
             Dictionary with crisis analysis and recommendations
@@ -53,9 +55,10 @@ class CrisisDetector:
                 current_stress, work_hours, breaks_taken, productivity
             )
             
-            # Analyze historical patterns if available
+            # Analyze historical patterns and projected trends if available
             historical_risk = self.analyze_historical_patterns(historical_data)
-            total_risk_score = risk_factors['current_risk_score'] + historical_risk
+            forecast_risk = self.analyze_forecast(forecast, risk_factors)
+            total_risk_score = risk_factors['current_risk_score'] + historical_risk + forecast_risk
             
             # Determine crisis level
             crisis_level = self.determine_crisis_level(total_risk_score)
@@ -134,6 +137,26 @@ class CrisisDetector:
             logger.error(f"Error in historical analysis: {e}")
             return 0
     
+    def analyze_forecast(self, forecast: Dict[str, Any], risk_factors: Dict[str, Any]) -> int:
+        """Add risk for red flags the employee is trending towards"""
+        if not forecast:
+            return 0
+        
+        forecast_risk = 0
+        projected_stress = forecast.get('projected_stress_level')
+        projected_hours = forecast.get('projected_work_hours')
+        
+        if projected_stress is not None and projected_stress >= self.red_flags_thresholds["extreme_stress"]:
+            risk_factors['factors'].append("projected_extreme_stress")
+            forecast_risk += 2
+        if projected_hours is not None and projected_hours > self.red_flags_thresholds["excessive_hours"]:
+            risk_factors['factors'].append("projected_excessive_hours")
+            forecast_risk += 1
+        if forecast.get('projected_risk', 0) >= 0.8:
+            forecast_risk += 1
+        
+        return forecast_risk
+    
     def determine_crisis_level(self, risk_score: int) -> str:
         """Determine crisis level based on risk score"""
         if risk_score >= 8:
@@ -168,6 +191,10 @@ class CrisisDetector:
             interventions["follow_up"].append("Mandatory break reminders")
             interventions["monitoring"].append("Track break frequency")
         
+        if "projected_extreme_stress" in risk_factors['factors']:
+            interventions["follow_up"].append("Rebalance upcoming workload before stress peaks")
+            interventions["monitoring"].append("Review stress trend forecast weekly")
+        
         return interventions
     
     def get_fallback_response(self) -> Dict[str, Any]:
@@ -0,0 +1,273 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from ai_models.company_advisor import CompanyAdvisor, company_advisor
+
+logger = logging.getLogger(__name__)
+
+WINDOW_DAYS = int(os.environ.get("ENGCARE_DEPARTMENT_WINDOW_DAYS", "14"))
+SNAPSHOT_PATH = os.environ.get("ENGCARE_DEPARTMENT_SNAPSHOT", "data/department_stats.npz")
+SNAPSHOT_INTERVAL = float(os.environ.get("ENGCARE_DEPARTMENT_SNAPSHOT_SECONDS", "60"))
+
+# Per-department state, one row per department
+STATE_ARRAYS = ("checkins", "stress_sum", "team_size", "departed", "day_counts", "day_sums", "day_number")
+
+
+class DepartmentAggregator:
+    """
+    Running per-department check-in statistics feeding CompanyAdvisor
+
+    Each department owns one row of a few numpy arrays: lifetime count and
+    stress sum, plus a ring of daily (count, sum) buckets for the windowed
+    average. A check-in touches one row and one bucket, so HR dashboards read
+    department metrics without rescanning employee records. Advisor output is
+    cached per department and only recomputed when one of the bands the
+    advisor picks its text by (CompanyAdvisor.advice_key) changes; metrics
+    and wellness score are always current.
+    """
+
+    def __init__(self, advisor: CompanyAdvisor = None, window_days: int = WINDOW_DAYS,
+                 snapshot_path: Optional[str] = None, snapshot_interval: float = SNAPSHOT_INTERVAL,
+                 capacity: int = 16):
+        self.advisor = advisor or company_advisor
+        self.window_days = window_days
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._members: Dict[str, int] = {}  # employee_id -> department row
+        self._allocate(capacity)
+
+        self._advice: Dict[str, Tuple[Tuple, Dict[str, Any]]] = {}
+        self.advisor_calls = 0
+        self._last_snapshot = time.monotonic()
+
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.restore(snapshot_path)
+
+    def _allocate(self, capacity: int):
+        self.checkins = np.zeros(capacity, dtype=np.int64)
+        self.stress_sum = np.zeros(capacity, dtype=np.float64)
+        self.team_size = np.zeros(capacity, dtype=np.int32)
+        self.departed = np.zeros(capacity, dtype=np.int32)
+        self.day_counts = np.zeros((capacity, self.window_days), dtype=np.int32)
+        self.day_sums = np.zeros((capacity, self.window_days), dtype=np.float64)
+        self.day_number = np.full((capacity, self.window_days), -1, dtype=np.int64)
+
+    def _grow(self):
+        old = {name: getattr(self, name) for name in STATE_ARRAYS}
+        self._allocate(2 * len(old["checkins"]))
+        for name, values in old.items():
+            getattr(self, name)[:len(values)] = values
+
+    def _row(self, department: str) -> int:
+        row = self._rows.get(department)
+        if row is None:
+            row = len(self._names)
+            if row == len(self.checkins):
+                self._grow()
+            self._rows[department] = row
+            self._names.append(department)
+        return row
+
+    def record_checkin(self, department: str, employee_id: str, stress_level: float,
+                       timestamp: Optional[datetime] = None):
+        """
+        Fold one check-in into its department's running totals
+
+        Args:
+            stress_level: Stress on the 0-10 scale CompanyAdvisor uses
+        """
+        day = (timestamp or datetime.now()).toordinal()
+        slot = day % self.window_days
+        with self._lock:
+            row = self._row(department)
+            self.checkins[row] += 1
+            self.stress_sum[row] += stress_level
+
+            held = self.day_number[row, slot]
+            if held < day:
+                # The slot last held a day that has left the window
+                self.day_number[row, slot] = day
+                self.day_counts[row, slot] = 0
+                self.day_sums[row, slot] = 0.0
+            # A backfilled day older than the slot's only counts towards lifetime totals
+            if held <= day:
+                self.day_counts[row, slot] += 1
+                self.day_sums[row, slot] += stress_level
+
+            previous = self._members.get(employee_id)
+            if previous != row:
+                if previous is not None:
+                    self.team_size[previous] -= 1
+                self.team_size[row] += 1
+                self._members[employee_id] = row
+
+        self._maybe_snapshot()
+
+    def record_checkins(self, departments: np.ndarray, employee_ids: np.ndarray, stress_levels: np.ndarray,
+                        timestamp: Optional[datetime] = None):
+        """
+        Fold a block of same-day check-ins in at once (bulk ingestion)
+
+        Same result as calling record_checkin per row, with one lock and
+        numpy scatter-adds per block instead of per row. `timestamp` is the
+        day the block belongs to (today by default).
+        """
+        if not len(departments):
+            return
+        day = (timestamp or datetime.now()).toordinal()
+        slot = day % self.window_days
+        names, inverse = np.unique(np.asarray(departments, dtype=str), return_inverse=True)
+        stress_levels = np.asarray(stress_levels, dtype=np.float64)
+        with self._lock:
+            rows = np.array([self._row(name) for name in names.tolist()], dtype=np.int64)
+            counts = np.bincount(inverse, minlength=len(names))
+            sums = np.bincount(inverse, weights=stress_levels, minlength=len(names))
+            self.checkins[rows] += counts
+            self.stress_sum[rows] += sums
+
+            held = self.day_number[rows, slot]
+            stale = held < day
+            self.day_number[rows[stale], slot] = day
+            self.day_counts[rows[stale], slot] = 0
+            self.day_sums[rows[stale], slot] = 0.0
+            current = held <= day
+            self.day_counts[rows[current], slot] += counts[current].astype(np.int32)
+            self.day_sums[rows[current], slot] += sums[current]
+
+            for employee_id, row in zip(np.asarray(employee_ids).tolist(), rows[inverse].tolist()):
+                previous = self._members.get(employee_id)
+                if previous != row:
+                    if previous is not None:
+                        self.team_size[previous] -= 1
+                    self.team_size[row] += 1
+                    self._members[employee_id] = row
+
+        self._maybe_snapshot()
+
+    def record_departure(self, employee_id: str):
+        """Count an employee who left towards their department's attrition rate"""
+        with self._lock:
+            row = self._members.pop(employee_id, None)
+            if row is not None:
+                self.team_size[row] -= 1
+                self.departed[row] += 1
+
+    def _metrics(self, row: int, today: int) -> Dict[str, Any]:
+        in_window = self.day_number[row] > today - self.window_days
+        window_count = int(self.day_counts[row][in_window].sum())
+        lifetime_avg = self.stress_sum[row] / self.checkins[row] if self.checkins[row] else 0.0
+        team_size = int(self.team_size[row])
+        headcount = team_size + int(self.departed[row])
+        return {
+            "department": self._names[row],
+            # Recent stress drives the advice; lifetime average once the window is empty
+            "avg_stress": float(self.day_sums[row][in_window].sum() / window_count) if window_count else float(lifetime_avg),
+            "lifetime_avg_stress": float(lifetime_avg),
+            "attrition_rate": 100.0 * int(self.departed[row]) / headcount if headcount else 0.0,
+            "team_size": team_size,
+            "checkins": int(self.checkins[row]),
+            "window_checkins": window_count,
+        }
+
+    def department_metrics(self, department: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._rows.get(department)
+            return None if row is None else self._metrics(row, datetime.now().toordinal())
+
+    def recommendations(self, department: str) -> Optional[Dict[str, Any]]:
+        """CompanyAdvisor recommendations from the running metrics"""
+        metrics = self.department_metrics(department)
+        if metrics is None:
+            return None
+
+        bucket = self.advisor.advice_key(metrics["avg_stress"], metrics["attrition_rate"], metrics["team_size"])
+        cached = self._advice.get(department)
+        if cached is None or cached[0] != bucket:
+            advice = self.advisor.get_company_recommendations(metrics)
+            self._advice[department] = (bucket, advice)
+            self.advisor_calls += 1
+            return advice
+
+        return {
+            **cached[1],
+            "wellness_score": self.advisor.calculate_wellness_score(metrics["avg_stress"], metrics["attrition_rate"]),
+            "key_metrics": {
+                "current_stress": metrics["avg_stress"],
+                "attrition_rate": metrics["attrition_rate"],
+                "team_size": metrics["team_size"]
+            }
+        }
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Metrics for every department, read under one lock"""
+        today = datetime.now().toordinal()
+        with self._lock:
+            return [self._metrics(row, today) for row in range(len(self._names))]
+
+    def _maybe_snapshot(self):
+        if not self.snapshot_path or time.monotonic() - self._last_snapshot < self.snapshot_interval:
+            return
+        self._last_snapshot = time.monotonic()
+        try:
+            self.save(self.snapshot_path)
+        except Exception as e:
+            logger.error(f"❌ Department snapshot failed: {e}")
+
+    def save(self, path: str):
+        """Write the running state atomically so a restart resumes from it"""
+        with self._lock:
+            n = len(self._names)
+            state = {name: getattr(self, name)[:n].copy() for name in STATE_ARRAYS}
+            members = list(self._members.items())
+            names = list(self._names)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".department_stats.", suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, names=np.array(names, dtype=str),
+                         member_ids=np.array([m for m, _ in members], dtype=str),
+                         member_rows=np.array([r for _, r in members], dtype=np.int64), **state)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def restore(self, path: str):
+        with np.load(path) as data:
+            if data["day_counts"].shape[1] != self.window_days:
+                logger.warning(f"⚠️ Ignoring {path}: saved with a different window")
+                return
+            with self._lock:
+                names = [str(n) for n in data["names"]]
+                self._allocate(max(len(names), len(self.checkins)))
+                for name in STATE_ARRAYS:
+                    getattr(self, name)[:len(names)] = data[name]
+                self._names = names
+                self._rows = {name: row for row, name in enumerate(names)}
+                self._members = dict(zip(data["member_ids"].tolist(), data["member_rows"].tolist()))
+                self._advice.clear()
+        logger.info(f"✅ Restored department stats for {len(names)} departments from {path}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "departments": len(self._names),
+                "employees": len(self._members),
+                "advisor_calls": self.advisor_calls,
+                "state_bytes": sum(getattr(self, name).nbytes for name in STATE_ARRAYS),
+            }
+
+# Global instance
+department_aggregator = DepartmentAggregator(snapshot_path=SNAPSHOT_PATH)
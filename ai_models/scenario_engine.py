@@ -0,0 +1,173 @@
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Any, Sequence
+
+import numpy as np
+
+from ai_models.company_advisor import CompanyAdvisor, company_advisor, LARGE_TEAM_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Urgency codes stored in the cube
+URGENCY_LEVELS = ("low", "high", "critical")
+
+# Largest cube evaluated, and largest returned cell by cell (include_cube)
+MAX_CELLS = int(os.environ.get("ENGCARE_SCENARIO_MAX_CELLS", "2000000"))
+MAX_CUBE_CELLS = int(os.environ.get("ENGCARE_SCENARIO_MAX_CUBE_CELLS", "100000"))
+
+
+class ScenarioTooLarge(ValueError):
+    """The requested scenario cube has more cells than allowed"""
+
+
+def scenario_cells(departments: int, stress_deltas: int, attrition_deltas: int, team_size_deltas: int) -> int:
+    return departments * stress_deltas * attrition_deltas * team_size_deltas
+
+
+def wellness_scores(avg_stress: np.ndarray, attrition_rate: np.ndarray) -> np.ndarray:
+    """Vectorized CompanyAdvisor.calculate_wellness_score (0-100, uint8)"""
+    stress_score = np.maximum(0, 100 - avg_stress * 10)
+    attrition_score = np.maximum(0, 100 - attrition_rate * 4)
+    score = stress_score * 0.6 + attrition_score * 0.4
+    return np.clip(score, 0, 100).astype(np.uint8)  # truncates like int()
+
+
+def urgency_codes(advisor: CompanyAdvisor, avg_stress: np.ndarray, attrition_rate: np.ndarray) -> np.ndarray:
+    """Vectorized CompanyAdvisor.classify_urgency as indices into URGENCY_LEVELS"""
+    codes = np.zeros(np.broadcast(avg_stress, attrition_rate).shape, dtype=np.int8)
+    # Least urgent first so more urgent levels overwrite
+    for level, (stress_cutoff, attrition_cutoff) in reversed(list(advisor.urgency_thresholds.items())):
+        codes[(avg_stress >= stress_cutoff) | (attrition_rate >= attrition_cutoff)] = URGENCY_LEVELS.index(level)
+    return codes
+
+
+@dataclass
+class ScenarioCube:
+    """
+    Scenario results over [department, stress delta, attrition delta, team-size delta]
+
+    Score and urgency do not depend on team size, so they are stored as
+    [department, stress, attrition] and broadcast along the last axis;
+    team size only moves the large-team band, stored as [department, team].
+    """
+    departments: List[Dict[str, Any]]
+    stress_deltas: np.ndarray
+    attrition_deltas: np.ndarray
+    team_size_deltas: np.ndarray
+    wellness_score: np.ndarray  # uint8 [D, S, A]
+    urgency: np.ndarray         # int8 [D, S, A], index into URGENCY_LEVELS
+    team_size: np.ndarray       # int64 [D, T]
+
+    @property
+    def shape(self):
+        return (len(self.departments), len(self.stress_deltas),
+                len(self.attrition_deltas), len(self.team_size_deltas))
+
+    @property
+    def cells(self) -> int:
+        return int(np.prod(self.shape))
+
+    @property
+    def large_team(self) -> np.ndarray:
+        """[D, T] whether CompanyAdvisor treats the team as company-wide scale"""
+        return self.team_size > LARGE_TEAM_SIZE
+
+    def score_cube(self) -> np.ndarray:
+        """Full [D, S, A, T] view of the wellness scores (no copy)"""
+        return np.broadcast_to(self.wellness_score[..., None], self.shape)
+
+    def cell(self, department: int, stress: int, attrition: int, team: int = 0) -> Dict[str, Any]:
+        """Inputs for one scenario, shaped like CompanyAdvisor department_data"""
+        base = self.departments[department]
+        return {
+            "department": base["department"],
+            "avg_stress": float(np.clip(base["avg_stress"] + self.stress_deltas[stress], 0, 10)),
+            "attrition_rate": float(max(0.0, base["attrition_rate"] + self.attrition_deltas[attrition])),
+            "team_size": int(self.team_size[department, team]),
+            "large_team": bool(self.large_team[department, team]),
+            "wellness_score": int(self.wellness_score[department, stress, attrition]),
+            "urgency_level": URGENCY_LEVELS[self.urgency[department, stress, attrition]],
+        }
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Per department: baseline, best scenario and how many scenarios land at each urgency"""
+        stress_zero = int(np.abs(self.stress_deltas).argmin())
+        attrition_zero = int(np.abs(self.attrition_deltas).argmin())
+        team_zero = int(np.abs(self.team_size_deltas).argmin())
+        results = []
+        for d, department in enumerate(self.departments):
+            best = np.unravel_index(self.wellness_score[d].argmax(), self.wellness_score[d].shape)
+            counts = np.bincount(self.urgency[d].ravel(), minlength=len(URGENCY_LEVELS))
+            results.append({
+                "department": department["department"],
+                "baseline": self.cell(d, stress_zero, attrition_zero, team_zero),
+                # The score doesn't depend on team size, so best keeps the current team
+                "best": self.cell(d, *best, team_zero),
+                "urgency_share": {level: float(c) / self.urgency[d].size for level, c in zip(URGENCY_LEVELS, counts)},
+            })
+        return results
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "departments": [d["department"] for d in self.departments],
+            "stress_deltas": self.stress_deltas.tolist(),
+            "attrition_deltas": self.attrition_deltas.tolist(),
+            "team_size_deltas": self.team_size_deltas.tolist(),
+            "urgency_levels": list(URGENCY_LEVELS),
+            "wellness_score": self.wellness_score.tolist(),
+            "urgency": self.urgency.tolist(),
+            "team_size": self.team_size.tolist(),
+        }
+
+
+def evaluate_scenarios(departments: List[Dict[str, Any]], stress_deltas: Sequence[float],
+                       attrition_deltas: Sequence[float], team_size_deltas: Sequence[int] = (0,),
+                       advisor: CompanyAdvisor = None, max_cells: int = MAX_CELLS) -> ScenarioCube:
+    """
+    Wellness score and urgency for every department under every combination of deltas
+
+    Args:
+        departments: CompanyAdvisor department_data dicts (department,
+            avg_stress, attrition_rate, team_size; advisor defaults apply)
+        stress_deltas: Points added to avg_stress (clipped to 0-10)
+        attrition_deltas: Percentage points added to attrition_rate (floored at 0)
+        team_size_deltas: Head count added to team_size (floored at 0)
+        max_cells: Raise ScenarioTooLarge before allocating a bigger cube
+
+    Returns:
+        ScenarioCube; pass one of its cells to get_company_recommendations
+        for the full advice on a chosen scenario
+    """
+    cells = scenario_cells(len(departments), len(stress_deltas), len(attrition_deltas), len(team_size_deltas))
+    if cells > max_cells:
+        raise ScenarioTooLarge(f"{cells:,} scenarios requested, at most {max_cells:,} allowed")
+    advisor = advisor or company_advisor
+    departments = [{
+        "department": d.get("department", "Engineering"),
+        "avg_stress": float(d.get("avg_stress", 5.0)),
+        "attrition_rate": float(d.get("attrition_rate", 10.0)),
+        "team_size": int(d.get("team_size", 50)),
+    } for d in departments]
+
+    stress_deltas = np.asarray(stress_deltas, dtype=np.float64)
+    attrition_deltas = np.asarray(attrition_deltas, dtype=np.float64)
+    team_size_deltas = np.asarray(team_size_deltas, dtype=np.int64)
+
+    # [D, 1, 1] + [S, 1] and [D, 1, 1] + [A] broadcast to [D, S, A]
+    stress = np.clip(np.array([d["avg_stress"] for d in departments], dtype=np.float64)[:, None, None]
+                     + stress_deltas[:, None], 0, 10)
+    attrition = np.maximum(0, np.array([d["attrition_rate"] for d in departments], dtype=np.float64)[:, None, None]
+                           + attrition_deltas)
+
+    cube = ScenarioCube(
+        departments=departments,
+        stress_deltas=stress_deltas,
+        attrition_deltas=attrition_deltas,
+        team_size_deltas=team_size_deltas,
+        wellness_score=wellness_scores(stress, attrition),
+        urgency=urgency_codes(advisor, stress, attrition),
+        team_size=np.maximum(0, np.array([d["team_size"] for d in departments])[:, None] + team_size_deltas),
+    )
+    logger.info(f"✅ Evaluated {cube.cells:,} scenarios for {len(departments)} departments")
+    return cube
@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import tempfile
+from typing import Callable, Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.utils import murmurhash3_32
+
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = os.environ.get("ENGCARE_TEXT_STRESS_MODEL", "data/text_stress_model.npz")
+TRAINING_PATH = os.environ.get("ENGCARE_TEXT_STRESS_DATA", "data/stress_text_samples.jsonl")
+N_FEATURES = 2 ** 18
+
+LEVELS = ("Low", "Moderate", "High")
+# Stress level (0-1) each class stands for; a prediction is their
+# probability-weighted mean
+LEVEL_SCORES = np.array([0.2, 0.55, 0.85], dtype=np.float32)
+HEADS = ("hashing", "embedding")
+
+RECOMMENDATIONS = {
+    "Low": ["Keep up your current routine", "Take a short walk between tasks", "Note what went well today"],
+    "Moderate": ["Take a 5-minute break", "Practice deep breathing", "Listen to calming music"],
+    "High": ["Step away from work for 15 minutes", "Try the 4-7-8 breathing technique",
+             "Talk to your manager or someone you trust"],
+}
+
+
+def level_name(stress_level: float) -> str:
+    """Same Low/Moderate/High bands the dashboard stress meter uses"""
+    return "Low" if stress_level < 0.4 else "Moderate" if stress_level < 0.7 else "High"
+
+
+def load_examples(path: str) -> Tuple[List[str], np.ndarray]:
+    """
+    Texts and class indices from a JSONL file
+
+    Each line has "text" plus either "level" (low/moderate/high) or
+    "stress_level" (0-1, binned with the dashboard bands).
+    """
+    texts, labels = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            level = row["level"].capitalize() if "level" in row else level_name(float(row["stress_level"]))
+            texts.append(row["text"])
+            labels.append(LEVELS.index(level))
+    return texts, np.array(labels, dtype=np.int64)
+
+
+class TextStressClassifier:
+    """
+    Free-text stress level from a linear model over hashed word n-grams
+
+    The hashing head needs no vocabulary: any text maps straight to a sparse
+    vector of N_FEATURES buckets, and scoring is a sparse row times a dense
+    [N_FEATURES, 3] weight matrix, well under a millisecond per text on CPU.
+    The optional embedding head scores MiniLM sentence embeddings instead,
+    through `encoder` (the RAG embedding model in the API, called directly
+    so scored texts stay out of the RAG query cache).
+    """
+
+    def __init__(self, n_features: int = N_FEATURES, ngram_range: Tuple[int, int] = (1, 2),
+                 encoder: Optional[Callable[[List[str]], np.ndarray]] = None):
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.vectorizer = HashingVectorizer(n_features=n_features, ngram_range=self.ngram_range,
+                                            alternate_sign=False, norm="l2", dtype=np.float32)
+        self._analyzer = self.vectorizer.build_analyzer()
+        self.encoder = encoder
+        self.head = "hashing"
+        self.weights: Optional[np.ndarray] = None    # [features, classes]
+        self.intercept: Optional[np.ndarray] = None  # [classes]
+
+    @property
+    def trained(self) -> bool:
+        return self.weights is not None
+
+    def features(self, texts: Sequence[str]):
+        if self.head == "embedding":
+            if self.encoder is None:
+                raise RuntimeError("Embedding head needs an encoder")
+            return np.asarray(self.encoder(list(texts)), dtype=np.float32)
+        return self.vectorizer.transform(texts)
+
+    def _hashed(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Bucket indices and l2-normalized counts for one text
+
+        Same buckets as HashingVectorizer.transform (signed murmurhash3, seed
+        0, abs modulo n_features) without its per-call validation, which
+        costs more than the scoring itself for a single text.
+        """
+        hashes = np.array([murmurhash3_32(token, seed=0) for token in self._analyzer(text)], dtype=np.int64)
+        indices, counts = np.unique(np.abs(hashes) % self.n_features, return_counts=True)
+        counts = counts.astype(np.float32)
+        if len(counts):
+            counts /= np.sqrt(counts @ counts)
+        return indices, counts
+
+    def fit(self, texts: Sequence[str], labels: np.ndarray, head: str = "hashing",
+            C: float = 10.0) -> "TextStressClassifier":
+        """
+        Train the linear head on labelled texts
+
+        Args:
+            labels: Indices into LEVELS
+            head: "hashing" or "embedding" (needs `encoder`)
+        """
+        if head not in HEADS:
+            raise ValueError(f"Unknown head '{head}', expected one of {HEADS}")
+        self.head = head
+        model = LogisticRegression(C=C, max_iter=1000)
+        model.fit(self.features(texts), labels)
+
+        # Expand to all classes so a level missing from the data scores as impossible
+        weights = np.zeros((model.coef_.shape[1], len(LEVELS)), dtype=np.float32)
+        intercept = np.full(len(LEVELS), -1e4, dtype=np.float32)
+        if len(model.classes_) == 2:  # binary models keep one row for the second class
+            weights[:, model.classes_[1]] = model.coef_[0]
+            intercept[model.classes_] = [0.0, model.intercept_[0]]
+        else:
+            weights[:, model.classes_] = model.coef_.T
+            intercept[model.classes_] = model.intercept_
+        self.weights, self.intercept = np.ascontiguousarray(weights), intercept
+        logger.info(f"✅ Trained {head} text stress classifier on {len(texts)} examples")
+        return self
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """[n, 3] class probabilities in LEVELS order"""
+        if not self.trained:
+            raise RuntimeError("Text stress classifier is not trained")
+        if self.head == "hashing" and len(texts) == 1:
+            indices, counts = self._hashed(texts[0])
+            logits = (counts @ self.weights[indices] + self.intercept)[None, :]
+        else:
+            logits = np.asarray(self.features(texts) @ self.weights) + self.intercept
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+    def score(self, texts: Sequence[str]) -> np.ndarray:
+        """[n] stress levels on a 0-1 scale"""
+        return self.predict_proba(texts) @ LEVEL_SCORES
+
+    def analyze_batch(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        """Stress level, confidence, band and recommendations for each text"""
+        if not len(texts):
+            return []
+        probabilities = self.predict_proba(texts)
+        results = []
+        for stress_level, confidence in zip((probabilities @ LEVEL_SCORES).tolist(),
+                                            probabilities.max(axis=1).tolist()):
+            level = level_name(stress_level)
+            results.append({
+                "stress_level": stress_level,
+                "confidence": confidence,
+                "level": level,
+                "recommendations": RECOMMENDATIONS[level],
+            })
+        return results
+
+    def analyze(self, text: str) -> Dict[str, Any]:
+        return self.analyze_batch([text])[0]
+
+    def save(self, path: str):
+        """Write the weights as an .npz artifact (atomically)"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".text_stress.", suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, head=self.head, n_features=self.n_features, ngram_range=np.array(self.ngram_range),
+                         weights=self.weights, intercept=self.intercept)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str, encoder: Optional[Callable[[List[str]], np.ndarray]] = None) -> "TextStressClassifier":
+        with np.load(path) as data:
+            classifier = cls(int(data["n_features"]), tuple(data["ngram_range"].tolist()), encoder=encoder)
+            classifier.head = str(data["head"])
+            classifier.weights = data["weights"]
+            classifier.intercept = data["intercept"]
+        return classifier
+
+
+def load_classifier(path: str = MODEL_PATH, data_path: str = TRAINING_PATH,
+                    encoder: Optional[Callable[[List[str]], np.ndarray]] = None) -> TextStressClassifier:
+    """
+    The trained artifact at `path`, or a hashing head trained on `data_path`
+    when there is no artifact yet (or it needs an encoder we don't have)
+    """
+    if os.path.exists(path):
+        classifier = TextStressClassifier.load(path, encoder=encoder)
+        if classifier.head != "embedding" or encoder is not None:
+            logger.info(f"✅ Loaded {classifier.head} text stress classifier from {path}")
+            return classifier
+        logger.warning(f"⚠️ {path} is an embedding head but no encoder is available")
+    logger.info(f"🚀 Training text stress classifier from {data_path}")
+    texts, labels = load_examples(data_path)
+    return TextStressClassifier().fit(texts, labels)
@@ -1,22 +1,35 @@
 import streamlit as st
 from datetime import datetime, timedelta
+import os
 import time
-import random
+from collections import deque
+from ai_models.text_stress_classifier import load_classifier
+from backend.user_store import UserStore
+from backend.analytics import WellnessAnalytics
+from backend.gamification import GamificationEngine
+from backend.leaderboard import Leaderboard
+from backend.live_updates import LiveFeedPool
 
-# Mock AI Services
+RECENT_SOLUTIONS_LIMIT = 3
+API_URL = os.environ.get("ENGCARE_API_URL", "http://localhost:8000")
+LIVE_REFRESH_SECONDS = 2
+
+# Self-reported mood mapped to a 0-1 productivity estimate for check-ins
+MOOD_PRODUCTIVITY = {
+    "😊 Great": 0.85,
+    "🙂 Good": 0.75,
+    "😐 Okay": 0.6,
+    "😟 Stressed": 0.45,
+    "😴 Tired": 0.4,
+    "🔥 Energized": 0.9,
+    "😔 Down": 0.35
+}
+
+# AI Services
 class StressAnalyzer:
     def analyze_stress(self, text):
-        stress_level = random.uniform(0.1, 0.8)
-        return {
-            "stress_level": stress_level,
-            "confidence": 0.85,
-            "level": "Low" if stress_level < 0.4 else "Moderate" if stress_level < 0.7 else "High",
-            "recommendations": [
-                "Take a 5-minute break",
-                "Practice deep breathing",
-                "Listen to calming music"
-            ]
-        }
+        """Stress level, confidence, band and recommendations for free text"""
+        return get_text_stress_classifier().analyze(text)
 
 class LLMEngine:
     def get_wellness_advice(self, problem):
@@ -121,20 +134,90 @@ def load_custom_assets():
         </script>
     ''', unsafe_allow_html=True)
 
+@st.cache_resource
+def get_user_store():
+    """Shared SQLite store for all sessions"""
+    return UserStore()
+
+@st.cache_resource
+def get_analytics():
+    """Analytics engine sharing the user store database"""
+    return WellnessAnalytics(get_user_store())
+
+@st.cache_resource
+def get_gamification():
+    """Gamification engine sharing the user store database"""
+    return GamificationEngine(get_user_store())
+
+@st.cache_resource
+def get_leaderboard():
+    """Company leaderboard index, shared by all sessions"""
+    return Leaderboard(get_user_store())
+
+def record_game_event(kind, stress_level=None):
+    """Log a gamification event and mirror the resulting points, level, streak and achievements"""
+    result = get_gamification().record(st.session_state.user_id, kind, stress_level=stress_level)
+    state = result["state"]
+    update_user_data(
+        wellness_points=state["wellness_points"],
+        level=state["level"],
+        streak=state["streak"],
+        achievements=state["achievements"]
+    )
+    get_leaderboard().update(st.session_state.user_id, state["wellness_points"], state["streak"])
+    for name in result["new_achievements"]:
+        st.toast(f"🏆 Achievement unlocked: {name}")
+    return result
+
+def record_checkin():
+    """Store a check-in from the current dashboard values and refresh burnout risk"""
+    user_data = st.session_state.user_data
+    burnout_risk = get_analytics().record_checkin(
+        st.session_state.user_id,
+        user_data['stress_level'],
+        MOOD_PRODUCTIVITY.get(user_data['mood'], 0.6)
+    )
+    update_user_data(burnout_risk=burnout_risk)
+
+@st.cache_resource
+def get_text_stress_classifier():
+    """Trained text stress model, loaded once for all sessions"""
+    return load_classifier()
+
+@st.cache_resource
+def get_live_feeds():
+    """Background SSE connections for all sessions; unread ones are closed"""
+    return LiveFeedPool(API_URL)
+
+def get_live_feed(user_id):
+    """One background SSE connection per user, shared by all their tabs"""
+    return get_live_feeds().get(user_id)
+
+def get_user_id():
+    """Stable user id taken from the ?user= query parameter"""
+    return st.query_params.get("user", "guest")
+
+def update_user_data(**changes):
+    """Update dashboard data and queue the change for the next store flush"""
+    st.session_state.user_data.update(changes)
+    get_user_store().update_user(st.session_state.user_id, **changes)
+
 def initialize_session_state():
     """Initialize all session state variables"""
+    if 'user_id' not in st.session_state:
+        st.session_state.user_id = get_user_id()
+    
+    store = get_user_store()
+    user_id = st.session_state.user_id
+    
     defaults = {
-        'user_data': {
-            'stress_level': 0.3,
-            'wellness_points': 450,
-            'level': 2,
-            'achievements': ['First Step', 'Meditation Guru'],
-            'streak': 5,
-            'burnout_risk': 0.25,
-            'mood': 'calm'
-        },
-        'problem_log': [],
+        'user_data': store.load_user(user_id),
+        # Newest entry on the right; bounded so the panel never grows
+        'recent_solutions': deque(reversed(store.recent_solutions(user_id, RECENT_SOLUTIONS_LIMIT)),
+                                  maxlen=RECENT_SOLUTIONS_LIMIT),
         'last_stress_update': datetime.now(),
+        'live_epoch': None,
+        'live_version': 0,
         'ai_engine': LLMEngine(),
         'stress_analyzer': StressAnalyzer(),
     }
@@ -195,15 +278,19 @@ def create_problem_solver():
             # Enhanced solution with context
             if context:
                 solution += f"\n\nBased on your situation: {context[:100]}... I recommend being patient with yourself and implementing this solution consistently."
+                analysis = st.session_state.stress_analyzer.analyze_stress(context)
+                solution += f" Your description reads as {analysis['level'].lower()} stress: {analysis['recommendations'][0].lower()}."
             
             # Log the problem and solution
-            st.session_state.problem_log.append({
-                'problem': selected_problem,
-                'solution': solution,
-                'timestamp': datetime.now(),
-                'stress_before': st.session_state.user_data['stress_level'],
-                'context': context
-            })
+            entry = get_user_store().log_problem(
+                st.session_state.user_id,
+                selected_problem,
+                solution,
+                context=context,
+                stress_before=st.session_state.user_data['stress_level']
+            )
+            st.session_state.recent_solutions.append(entry)
+            st.session_state.user_data['problems_solved'] += 1
             
             # Show solution in a beautiful card
             st.markdown(f"""
@@ -224,8 +311,9 @@ def create_problem_solver():
             """, unsafe_allow_html=True)
             
             # Update user metrics
-            st.session_state.user_data['wellness_points'] += 25
-            st.session_state.user_data['stress_level'] = max(0.1, st.session_state.user_data['stress_level'] - 0.15)
+            update_user_data(stress_level=max(0.1, st.session_state.user_data['stress_level'] - 0.15))
+            record_game_event("problem_solved", stress_level=st.session_state.user_data['stress_level'])
+            record_checkin()
             
             # Show confetti for successful solution
             st.markdown("""
@@ -282,15 +370,32 @@ def create_emergency_support():
             </div>
             """, unsafe_allow_html=True)
 
-def create_wellness_dashboard():
-    """Main wellness dashboard"""
-    st.title("🧠 EngCare - AI Wellness Assistant")
-    st.markdown("### Your Personal Mental Health Companion")
-    
-    # Real-time stress meter
+def apply_live_update():
+    """Fold the newest pushed reading into the dashboard data"""
+    update = get_live_feed(st.session_state.user_id).latest
+    if update is None:
+        return
+    if update.get('epoch') != st.session_state.live_epoch:
+        # The backend restarted and its version counter began again
+        st.session_state.live_epoch = update.get('epoch')
+        st.session_state.live_version = 0
+    if update['version'] <= st.session_state.live_version:
+        return
+    
+    st.session_state.live_version = update['version']
+    st.session_state.last_stress_update = datetime.fromisoformat(update['timestamp'])
+    update_user_data(stress_level=update['stress_level'], burnout_risk=update['burnout_risk'])
+    get_user_store().flush()
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def create_live_metrics():
+    """Stress meter and metric cards, refreshed on their own from the live feed"""
+    apply_live_update()
     create_animated_stress_meter()
-    
-    # Key metrics in columns
+    create_metric_cards()
+
+def create_metric_cards():
+    """Key metrics in columns"""
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
@@ -332,6 +437,14 @@ def create_wellness_dashboard():
         </div>
         """, unsafe_allow_html=True)
 
+def create_wellness_dashboard():
+    """Main wellness dashboard"""
+    st.title("🧠 EngCare - AI Wellness Assistant")
+    st.markdown("### Your Personal Mental Health Companion")
+    
+    # Real-time stress meter and metrics
+    create_live_metrics()
+
 def create_ai_recommendations():
     """AI-powered personalized recommendations"""
     st.markdown("### 🤖 Your Wellness Assistant")
@@ -379,8 +492,8 @@ def create_ai_recommendations():
         """, unsafe_allow_html=True)
         
         if st.button(rec["action"], key=f"action_{rec['title']}", use_container_width=True):
-            st.session_state.user_data['wellness_points'] += 10
-            st.success(f"✅ {rec['title']} started! +10 points")
+            result = record_game_event("tip_completed")
+            st.success(f"✅ {rec['title']} started! +{result['points_awarded']} points")
 
 def create_gamification_section():
     """Gamification and achievements"""
@@ -405,14 +518,10 @@ def create_gamification_section():
     
     # Achievements
     st.markdown("#### 🏆 Your Achievements")
-    achievements = [
-        {"name": "First Step", "earned": True, "icon": "🚶", "desc": "Completed first session", "points": 50},
-        {"name": "7-Day Streak", "earned": st.session_state.user_data['streak'] >= 7, "icon": "🔥", "desc": "7 consecutive days", "points": 100},
-        {"name": "Stress Master", "earned": st.session_state.user_data['stress_level'] < 0.3, "icon": "🧠", "desc": "Low stress maintained", "points": 75},
-        {"name": "Problem Solver", "earned": len(st.session_state.problem_log) > 5, "icon": "💡", "desc": "5+ problems solved", "points": 150},
-    ]
+    # Earned flags come from the engine's stored state; nothing is re-evaluated here
+    achievements = get_gamification().achievement_board(st.session_state.user_id)
     
-    cols = st.columns(4)
+    cols = st.columns(len(achievements))
     for idx, achievement in enumerate(achievements):
         with cols[idx]:
             opacity = "1" if achievement["earned"] else "0.3"
@@ -425,36 +534,72 @@ def create_gamification_section():
             </div>
             """, unsafe_allow_html=True)
 
+def create_leaderboard_section():
+    """Opt-in company leaderboard: top 10 and the user's neighbourhood"""
+    st.markdown("### 🏅 Company Leaderboard")
+    leaderboard = get_leaderboard()
+    user_id = st.session_state.user_id
+    user_data = st.session_state.user_data
+    
+    joined = st.checkbox("Show me on the leaderboard", value=user_id in leaderboard, key="leaderboard_opt_in")
+    if joined:
+        name = st.text_input("Display name", value=user_id, key="leaderboard_name")
+        leaderboard.opt_in(user_id, name or user_id, user_data['wellness_points'], user_data['streak'])
+    elif user_id in leaderboard:
+        leaderboard.opt_out(user_id)
+    
+    metric = st.radio("Rank by", ["wellness_points", "streak"], horizontal=True, key="leaderboard_metric",
+                      format_func=lambda m: "⭐ Points" if m == "wellness_points" else "🔥 Streak")
+    
+    def render(entries):
+        for entry in entries:
+            highlight = "border-left: 4px solid #00ff87;" if entry['user_id'] == user_id else ""
+            st.markdown(f"""
+            <div class="glass-card" style="margin: 5px 0; padding: 10px; {highlight}">
+                <div style="display: flex; justify-content: space-between;">
+                    <span><strong>#{entry['rank']}</strong> {entry['display_name']}</span>
+                    <span style="color: #00ff87;">{entry[metric]}</span>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    render(leaderboard.top(10, metric))
+    if joined and leaderboard.rank(user_id, metric) > 10:
+        st.markdown("#### 📍 Around you")
+        render(leaderboard.around(user_id, metric))
+    st.caption(f"{len(leaderboard)} colleagues taking part")
+
 def create_analytics_section():
-    """Simple analytics without HTML"""
+    """Weekly trends computed from stored check-ins"""
     st.markdown("### 📊 Your Wellness Insights")
     
+    analytics = get_analytics()
+    summary = analytics.progress_summary(st.session_state.user_id)
+    
     with st.container():
         st.markdown("#### 📈 This Week's Progress")
         
-        # Stress Management
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            st.write("Stress Management")
-        with col2:
-            st.write("75%")
-        st.progress(75)
-        
-        # Productivity
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            st.write("Productivity")
-        with col2:
-            st.write("82%")
-        st.progress(82)
-        
-        # Sleep Quality
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            st.write("Sleep Quality")
-        with col2:
-            st.write("68%")
-        st.progress(68)
+        if summary is None:
+            st.caption("Complete a check-in to start tracking your weekly progress.")
+        else:
+            labels = {
+                "stress_management": "Stress Management",
+                "productivity": "Productivity",
+                "burnout_risk": "Burnout Risk"
+            }
+            for key, label in labels.items():
+                score = summary["scores"][key]
+                delta = summary["deltas"][key]
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    st.write(label)
+                with col2:
+                    st.write(f"{score}% ({delta:+d})")
+                st.progress(score)
+            
+            trends = analytics.weekly_trends(st.session_state.user_id, weeks=12)
+            if len(trends) > 1:
+                st.line_chart(trends * 100)
     
     # Weekly insights
     stress_level = st.session_state.user_data['stress_level']
@@ -466,24 +611,6 @@ def create_analytics_section():
         insight = "💡 Your stress levels are elevated. Use our problem solver for effective relief techniques."
     
     st.info(insight)
-def simulate_real_time_updates():
-    """Simulate real-time data updates"""
-    current_time = datetime.now()
-    if (current_time - st.session_state.last_stress_update).seconds > 10:  # Update every 10 seconds
-        # Small random fluctuations in stress
-        change = random.uniform(-0.05, 0.05)
-        st.session_state.user_data['stress_level'] = max(0.1, min(0.9, 
-            st.session_state.user_data['stress_level'] + change))
-        
-        # Update burnout risk based on stress trend
-        if st.session_state.user_data['stress_level'] > 0.6:
-            st.session_state.user_data['burnout_risk'] = min(0.9, 
-                st.session_state.user_data['burnout_risk'] + 0.02)
-        else:
-            st.session_state.user_data['burnout_risk'] = max(0.1, 
-                st.session_state.user_data['burnout_risk'] - 0.01)
-        
-        st.session_state.last_stress_update = current_time
 
 def main():
     # Configure page
@@ -500,9 +627,6 @@ def main():
     # Initialize session state
     initialize_session_state()
     
-    # Simulate real-time updates
-    simulate_real_time_updates()
-    
     # Main app layout
     create_wellness_dashboard()
     
@@ -517,9 +641,9 @@ def main():
         create_analytics_section()
         
         # Problem history
-        if st.session_state.problem_log:
+        if st.session_state.recent_solutions:
             st.markdown("### 📝 Recent Solutions")
-            for i, log in enumerate(list(reversed(st.session_state.problem_log))[-3:]):
+            for log in reversed(st.session_state.recent_solutions):
                 st.markdown(f"""
                 <div class="glass-card" style="margin: 10px 0; padding: 15px;">
                     <div style="display: flex; justify-content: space-between; align-items: start;">
@@ -535,6 +659,7 @@ def main():
     with col2:
         create_ai_recommendations()
         create_gamification_section()
+        create_leaderboard_section()
         
         # Quick stress check
         st.markdown("### 😊 Quick Check-in")
@@ -543,9 +668,10 @@ def main():
                            key="mood_select")
         
         if st.button("Update My Mood", use_container_width=True, key="mood_update"):
-            st.session_state.user_data['mood'] = mood
-            st.session_state.user_data['wellness_points'] += 10
-            st.success("🎉 Mood updated! +10 Wellness Points")
+            update_user_data(mood=mood)
+            result = record_game_event("mood_updated", stress_level=st.session_state.user_data['stress_level'])
+            record_checkin()
+            st.success(f"🎉 Mood updated! +{result['points_awarded']} Wellness Points")
             
             st.markdown("""
             <script>
@@ -565,6 +691,9 @@ def main():
         "</div>",
         unsafe_allow_html=True
     )
+    
+    # Persist all point, streak and mood changes from this run in one write
+    get_user_store().flush()
 
 if __name__ == "__main__":
     main()
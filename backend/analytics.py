@@ -0,0 +1,201 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkins (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    stress_level REAL NOT NULL,
+    productivity REAL NOT NULL,
+    burnout_risk REAL NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_checkins_user_seq ON checkins (user_id, seq DESC);
+
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    user_id TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    stress_sum REAL NOT NULL,
+    productivity_sum REAL NOT NULL,
+    burnout_sum REAL NOT NULL,
+    PRIMARY KEY (user_id, bucket)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS weekly_rollups (
+    user_id TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    stress_sum REAL NOT NULL,
+    productivity_sum REAL NOT NULL,
+    burnout_sum REAL NOT NULL,
+    PRIMARY KEY (user_id, bucket)
+) WITHOUT ROWID;
+"""
+
+UPSERT_ROLLUP = """
+INSERT INTO {table} (user_id, bucket, n, stress_sum, productivity_sum, burnout_sum)
+VALUES (?, ?, 1, ?, ?, ?)
+ON CONFLICT (user_id, bucket) DO UPDATE SET
+    n = n + 1,
+    stress_sum = stress_sum + excluded.stress_sum,
+    productivity_sum = productivity_sum + excluded.productivity_sum,
+    burnout_sum = burnout_sum + excluded.burnout_sum
+"""
+
+# How many trailing days feed the burnout risk estimate
+BURNOUT_WINDOW_DAYS = 7
+
+
+class WellnessAnalytics:
+    """
+    Stress, productivity and burnout-risk trends from stored check-ins
+
+    Every check-in updates its daily and weekly bucket in place, so reading a
+    trend only touches the handful of buckets being charted instead of
+    rescanning a user's full check-in history.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.store.ensure_schema(SCHEMA)
+
+    @staticmethod
+    def _day_bucket(timestamp: datetime) -> str:
+        return timestamp.date().isoformat()
+
+    @staticmethod
+    def _week_bucket(timestamp: datetime) -> str:
+        monday = timestamp.date() - timedelta(days=timestamp.weekday())
+        return monday.isoformat()
+
+    def record_checkin(self, user_id: str, stress_level: float, productivity: float,
+                       timestamp: Optional[datetime] = None) -> float:
+        """
+        Store a check-in and fold it into the daily and weekly rollups
+
+        Args:
+            stress_level: Stress on a 0-1 scale
+            productivity: Productivity on a 0-1 scale
+
+        Returns:
+            Burnout risk (0-1) after this check-in
+        """
+        timestamp = timestamp or datetime.now()
+        day = self._day_bucket(timestamp)
+        window_start = self._day_bucket(timestamp - timedelta(days=BURNOUT_WINDOW_DAYS - 1))
+
+        with self.store.transaction() as conn:
+            row = conn.execute(
+                "SELECT COALESCE(SUM(n), 0), COALESCE(SUM(stress_sum), 0), COALESCE(SUM(productivity_sum), 0) "
+                "FROM daily_rollups WHERE user_id = ? AND bucket BETWEEN ? AND ?",
+                (user_id, window_start, day)
+            ).fetchone()
+            burnout_risk = self._burnout_risk(
+                (row[1] + stress_level) / (row[0] + 1),
+                (row[2] + productivity) / (row[0] + 1)
+            )
+
+            conn.execute(
+                "INSERT INTO checkins (user_id, stress_level, productivity, burnout_risk, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (user_id, stress_level, productivity, burnout_risk, timestamp.isoformat())
+            )
+            values = (stress_level, productivity, burnout_risk)
+            conn.execute(UPSERT_ROLLUP.format(table="daily_rollups"), (user_id, day, *values))
+            conn.execute(UPSERT_ROLLUP.format(table="weekly_rollups"),
+                         (user_id, self._week_bucket(timestamp), *values))
+
+        return burnout_risk
+
+    @staticmethod
+    def _burnout_risk(avg_stress: float, avg_productivity: float) -> float:
+        """Blend sustained stress with lost productivity into a 0-1 risk"""
+        risk = 0.6 * avg_stress + 0.4 * (1 - avg_productivity)
+        return float(max(0.0, min(1.0, risk)))
+
+    def _read_rollups(self, table: str, user_id: str, limit: int) -> pd.DataFrame:
+        rows = self.store.query(
+            f"SELECT bucket, n, stress_sum, productivity_sum, burnout_sum FROM {table} "
+            "WHERE user_id = ? ORDER BY bucket DESC LIMIT ?",
+            (user_id, limit)
+        )
+        if not rows:
+            return pd.DataFrame(columns=["stress", "productivity", "burnout_risk"],
+                                index=pd.DatetimeIndex([], name="bucket"))
+
+        buckets = [row[0] for row in reversed(rows)]
+        sums = np.array([tuple(row)[1:] for row in reversed(rows)], dtype=np.float64)
+        means = sums[:, 1:] / sums[:, :1]
+
+        return pd.DataFrame(
+            means,
+            columns=["stress", "productivity", "burnout_risk"],
+            index=pd.DatetimeIndex(pd.to_datetime(buckets), name="bucket")
+        )
+
+    def weekly_trends(self, user_id: str, weeks: int = 12) -> pd.DataFrame:
+        """Weekly mean stress, productivity and burnout risk, oldest first"""
+        return self._read_rollups("weekly_rollups", user_id, weeks)
+
+    def daily_trends(self, user_id: str, days: int = 30) -> pd.DataFrame:
+        """Daily mean stress, productivity and burnout risk, oldest first"""
+        return self._read_rollups("daily_rollups", user_id, days)
+
+    def daily_stress_matrix(self, days: int = 365, end: Optional[datetime] = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Every user's daily mean stress over the trailing window, for population models
+
+        Returns:
+            (user ids, [users, days] float32 matrix, oldest day first, NaN
+            where the user has no check-in)
+        """
+        last_day = (end or datetime.now()).date()
+        first_day = last_day - timedelta(days=days - 1)
+        rows = self.store.query(
+            "SELECT user_id, bucket, stress_sum / n FROM daily_rollups WHERE bucket BETWEEN ? AND ?",
+            (first_day.isoformat(), last_day.isoformat())
+        )
+        if not rows:
+            return [], np.empty((0, days), dtype=np.float32)
+
+        frame = pd.DataFrame([tuple(row) for row in rows], columns=["user_id", "bucket", "stress"])
+        users, user_index = np.unique(frame["user_id"].to_numpy(), return_inverse=True)
+        day_index = (pd.to_datetime(frame["bucket"]) - pd.Timestamp(first_day)).dt.days.to_numpy()
+
+        matrix = np.full((len(users), days), np.nan, dtype=np.float32)
+        matrix[user_index, day_index] = frame["stress"].to_numpy()
+        return users.tolist(), matrix
+
+    def progress_summary(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        This week's progress scores (0-100) with the change from last week
+
+        Returns None until the user has at least one check-in.
+        """
+        trends = self.weekly_trends(user_id, weeks=2)
+        if trends.empty:
+            return None
+
+        # Stress is inverted so the bar reads as stress management progress
+        scores = pd.DataFrame({
+            "stress_management": (1 - trends["stress"]) * 100,
+            "productivity": trends["productivity"] * 100,
+            "burnout_risk": trends["burnout_risk"] * 100,
+        }).clip(0, 100)
+
+        current = scores.iloc[-1]
+        previous = scores.iloc[-2] if len(scores) > 1 else current
+
+        return {
+            "week_start": trends.index[-1].date().isoformat(),
+            "scores": {name: int(round(value)) for name, value in current.items()},
+            "deltas": {name: int(round(value)) for name, value in (current - previous).items()},
+        }
@@ -0,0 +1,292 @@
+import io
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from telemetry import registry
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.json
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+from ai_models.batch_scoring import score_checkins
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = int(os.environ.get("ENGCARE_BULK_CHUNK_ROWS", "10000"))
+MAX_BODY_BYTES = int(float(os.environ.get("ENGCARE_BULK_MAX_MB", "64")) * 1024 * 1024)
+# Errors listed in the response; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+CONTENT_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/vnd.apache.arrow.file": "arrow",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+}
+
+# Accepted range for each required numeric column, same scales as /wellness-advice
+CHECKIN_RANGES = {
+    "stress_level": (0, 10),
+    "work_hours": (0, 24),
+    "breaks_taken": (0, 48),
+    "productivity": (0, 10),
+}
+ANOMALY_METRICS = ("stress_level", "work_hours", "productivity")
+# Optional check-in time: ISO 8601 strings (offsets converted to UTC), Arrow or
+# Parquet timestamps, or Unix seconds. Backfilled rows land in their own day
+# of the department window; rows without one count as today
+TIMESTAMP_COLUMN = "timestamp"
+
+BULK_ROWS = registry.counter(
+    "engcare_bulk_checkin_rows_total",
+    "Check-in rows received through bulk ingestion, by validation outcome",
+    ["outcome"]
+)
+
+
+class BulkFormatError(ValueError):
+    """The body can't be parsed as a check-in table"""
+
+
+def detect_format(content_type: Optional[str]) -> str:
+    """Bulk format name for a Content-Type header (parameters ignored)"""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type not in CONTENT_TYPES:
+        raise BulkFormatError(f"Unsupported content type '{media_type}', expected one of {sorted(CONTENT_TYPES)}")
+    return CONTENT_TYPES[media_type]
+
+
+def _read_table(body: bytes, fmt: str):
+    try:
+        if fmt == "ndjson":
+            return pyarrow.json.read_json(pa.BufferReader(body))
+        if fmt == "parquet":
+            return pq.read_table(pa.BufferReader(body))
+        try:
+            return pyarrow.ipc.open_stream(body).read_all()
+        except pa.ArrowInvalid:
+            return pyarrow.ipc.open_file(pa.BufferReader(body)).read_all()
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, OSError) as e:
+        raise BulkFormatError(f"Could not read {fmt} body: {e}") from e
+
+
+def _read_ndjson_frame(body: bytes, chunk_rows: int) -> Iterator[Dict[str, np.ndarray]]:
+    try:
+        frame = pd.read_json(io.BytesIO(body), lines=True)
+    except ValueError as e:
+        raise BulkFormatError(f"Could not read ndjson body: {e}") from e
+    for start in range(0, len(frame), chunk_rows):
+        chunk = frame.iloc[start:start + chunk_rows]
+        yield {name: chunk[name].to_numpy() for name in chunk.columns}
+
+
+def read_columns(body: bytes, fmt: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Parse a bulk body straight into column arrays, `chunk_rows` rows at a time
+
+    Arrow parses NDJSON, IPC and Parquet natively into columnar buffers, so
+    no per-row Python objects are built. NDJSON that Arrow can't type (a
+    column mixing numbers and strings), and any NDJSON without pyarrow, is
+    read through pandas instead.
+    """
+    if not body.strip():
+        return
+    if not HAS_PYARROW:
+        if fmt != "ndjson":
+            raise BulkFormatError(f"Reading {fmt} needs pyarrow")
+        yield from _read_ndjson_frame(body, chunk_rows)
+        return
+
+    try:
+        table = _read_table(body, fmt)
+    except BulkFormatError:
+        if fmt != "ndjson":
+            raise
+        # Arrow types each JSON column from its values and refuses one mixing
+        # numbers and strings (a "stress_level": "high" row). An explicit string
+        # schema doesn't help, numbers don't convert to it. pandas keeps such a
+        # column as objects, so only the bad rows fail validation.
+        yield from _read_ndjson_frame(body, chunk_rows)
+        return
+    for batch in table.to_batches(max_chunksize=chunk_rows):
+        yield {name: batch.column(i).to_numpy(zero_copy_only=False) for i, name in enumerate(batch.schema.names)}
+
+
+def _numeric(values: np.ndarray) -> np.ndarray:
+    if values.dtype.kind in "iufb":
+        return values.astype(np.float64, copy=False)
+    # Strings or mixed objects: anything unparseable becomes NaN and fails validation
+    return pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _identifiers(values: Optional[np.ndarray], n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """String ids and a mask of rows that have one"""
+    if values is None:
+        return np.full(n, "", dtype=object), np.zeros(n, dtype=bool)
+    series = pd.Series(values)
+    ids = series.astype(str).to_numpy(dtype=object)
+    return ids, series.notna().to_numpy() & (ids != "")
+
+
+def _days(values: np.ndarray, today: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Day ordinals (today where the time is missing) and a mask of usable ones"""
+    series = pd.Series(values)
+    if values.dtype.kind in "iuf":
+        times = pd.to_datetime(series, unit="s", errors="coerce")
+    else:
+        times = pd.to_datetime(series, errors="coerce", utc=True, format="ISO8601").dt.tz_localize(None)
+    parsed = times.notna().to_numpy()
+    days = np.full(len(series), today, dtype=np.int64)
+    # datetime64[D] counts days from 1970-01-01, which is ordinal 719163
+    days[parsed] = times[parsed].to_numpy().astype("datetime64[D]").astype(np.int64) + 719163
+    return days, (parsed | series.isna().to_numpy()) & (days <= today)
+
+
+def validate_columns(columns: Dict[str, np.ndarray], offset: int = 0) -> Tuple[Dict[str, np.ndarray], Optional[np.ndarray], np.ndarray, List[Dict[str, Any]]]:
+    """
+    Check every required column, and the optional timestamp, at once
+
+    Returns:
+        (float64 arrays for the numeric columns, day ordinal per row or None
+        without a timestamp column, mask of valid rows, errors for the first
+        invalid cells with row numbers counted from `offset`)
+    """
+    missing = [name for name in CHECKIN_RANGES if name not in columns]
+    if missing:
+        raise BulkFormatError(f"Check-in data is missing columns {missing}")
+
+    numeric, errors = {}, []
+    valid = None
+    for name, (low, high) in CHECKIN_RANGES.items():
+        values = _numeric(columns[name])
+        ok = np.isfinite(values) & (values >= low) & (values <= high)
+        numeric[name] = values
+        valid = ok if valid is None else valid & ok
+        for row in np.flatnonzero(~ok)[:MAX_REPORTED_ERRORS].tolist():
+            errors.append({"row": offset + row, "field": name, "value": str(columns[name][row]),
+                           "reason": f"expected a number from {low} to {high}"})
+
+    days = None
+    if TIMESTAMP_COLUMN in columns:
+        days, ok = _days(columns[TIMESTAMP_COLUMN], datetime.now().toordinal())
+        valid &= ok
+        for row in np.flatnonzero(~ok)[:MAX_REPORTED_ERRORS].tolist():
+            errors.append({"row": offset + row, "field": TIMESTAMP_COLUMN, "value": str(columns[TIMESTAMP_COLUMN][row]),
+                           "reason": "expected a date-time that is not in the future"})
+    errors.sort(key=lambda e: e["row"])
+    return numeric, days, valid, errors[:MAX_REPORTED_ERRORS]
+
+
+class BulkIngestor:
+    """
+    Columnar check-in ingestion feeding scoring and running state in chunks
+
+    Each chunk is validated with vector comparisons, scored with the batch
+    CrisisDetector / EmployeeCoach / StressAnalyzer pass, folded into the
+    department aggregates and run through the per-employee anomaly detector,
+    all as whole-column operations. Rows that fail validation are counted
+    and skipped; the rest of the body is still ingested.
+    """
+
+    def __init__(self, detector, analyzer=None, aggregator=None, anomaly_detector=None,
+                 chunk_rows: int = CHUNK_ROWS):
+        self.detector = detector
+        self.analyzer = analyzer
+        self.aggregator = aggregator
+        self.anomaly_detector = anomaly_detector
+        self.chunk_rows = chunk_rows
+
+    def _ingest_chunk(self, columns: Dict[str, np.ndarray], offset: int, totals: Dict[str, Any]):
+        numeric, days, valid, errors = validate_columns(columns, offset)
+        n = len(valid)
+        totals["rows"] += n
+        totals["rejected"] += int(n - valid.sum())
+        totals["errors"].extend(errors[:MAX_REPORTED_ERRORS - len(totals["errors"])])
+        if not valid.any():
+            return
+
+        accepted = {name: values[valid] for name, values in numeric.items()}
+        if "meeting_count" in columns:
+            accepted["meeting_count"] = np.nan_to_num(_numeric(columns["meeting_count"])[valid])
+        scores = score_checkins(accepted, self.detector, self.analyzer)
+        totals["accepted"] += len(scores["risk_score"])
+        totals["alerts"] += int(scores["alert_required"].sum())
+        if "needs_intervention" in scores:
+            totals["needs_intervention"] += int(scores["needs_intervention"].sum())
+        for level, count in zip(*np.unique(scores["crisis_level"], return_counts=True)):
+            totals["crisis_levels"][str(level)] = totals["crisis_levels"].get(str(level), 0) + int(count)
+        if totals["results"] is not None:
+            rows = offset + np.flatnonzero(valid)
+            totals["results"].append({"row": rows, "risk_score": scores["risk_score"],
+                                      "crisis_level": scores["crisis_level"],
+                                      "alert_required": scores["alert_required"]})
+
+        user_ids, has_user = _identifiers(columns.get("user_id"), n)
+        user_ids, has_user = user_ids[valid], has_user[valid]
+        if self.aggregator is not None and "department" in columns:
+            departments, has_department = _identifiers(columns["department"], n)
+            keep = has_user & has_department[valid]
+            if days is None:
+                self.aggregator.record_checkins(departments[valid][keep], user_ids[keep],
+                                                accepted["stress_level"][keep])
+            else:
+                # One block per check-in day
+                row_days = days[valid][keep]
+                for day in np.unique(row_days).tolist():
+                    same_day = row_days == day
+                    self.aggregator.record_checkins(departments[valid][keep][same_day], user_ids[keep][same_day],
+                                                    accepted["stress_level"][keep][same_day],
+                                                    timestamp=datetime.fromordinal(day))
+        if self.anomaly_detector is not None and has_user.any():
+            values = np.column_stack([accepted[m] for m in ANOMALY_METRICS])[has_user]
+            found = self.anomaly_detector.observe_batch(user_ids[has_user].astype(str), values)
+            totals["anomalies"] += len(found["event"])
+
+    def ingest(self, body: bytes, fmt: str, include_results: bool = False) -> Dict[str, Any]:
+        """
+        Parse, validate, score and record every check-in in a bulk body
+
+        Args:
+            fmt: "ndjson", "arrow" or "parquet" (see detect_format)
+            include_results: Also return per-row risk score, crisis level and
+                alert flag for accepted rows, as columns
+
+        Returns:
+            Row counts, the first validation errors, alert / crisis level /
+            anomaly totals and throughput
+        """
+        start = time.perf_counter()
+        totals = {"rows": 0, "accepted": 0, "rejected": 0, "errors": [], "alerts": 0, "needs_intervention": 0,
+                  "crisis_levels": {}, "anomalies": 0, "results": [] if include_results else None}
+
+        offset = 0
+        for columns in read_columns(body, fmt, self.chunk_rows):
+            self._ingest_chunk(columns, offset, totals)
+            offset = totals["rows"]
+
+        BULK_ROWS.inc(totals["accepted"], outcome="accepted")
+        BULK_ROWS.inc(totals["rejected"], outcome="rejected")
+        elapsed = time.perf_counter() - start
+        results = totals.pop("results")
+        if results is not None:
+            totals["results"] = {
+                key: np.concatenate([part[key] for part in results]).tolist() if results else []
+                for key in ("row", "risk_score", "crisis_level", "alert_required")
+            }
+        totals.update({"format": fmt, "seconds": elapsed,
+                       "rows_per_second": totals["rows"] / elapsed if elapsed > 0 else None})
+        logger.info(f"✅ Bulk ingested {totals['accepted']:,}/{totals['rows']:,} check-ins from {fmt} "
+                    f"in {elapsed * 1000:.0f} ms")
+        return totals
@@ -0,0 +1,322 @@
+import logging
+import threading
+import time
+from typing import List, Tuple, Dict, Any, Optional
+
+import torch
+from telemetry import registry
+
+logger = logging.getLogger(__name__)
+
+SPECULATIVE_TOKENS = registry.counter(
+    "engcare_speculative_draft_tokens_total",
+    "Draft tokens proposed to the target model, by verification result",
+    ["result"]
+)
+
+# Legacy cache layout: one (key, value) pair per layer, each [batch, heads, seq, head_dim]
+LegacyCache = Tuple[Tuple[torch.Tensor, torch.Tensor], ...]
+
+
+def to_legacy_cache(past) -> LegacyCache:
+    """Normalise whatever the model returned into per-layer (key, value) tuples"""
+    if isinstance(past, tuple):
+        return past
+    if hasattr(past, "to_legacy_cache"):
+        return past.to_legacy_cache()
+    return tuple((layer.keys, layer.values) for layer in past.layers)
+
+
+def from_legacy_cache(legacy: LegacyCache):
+    """Wrap (key, value) tuples in the cache class this transformers version expects"""
+    try:
+        from transformers import DynamicCache
+    except ImportError:
+        return legacy
+    if hasattr(DynamicCache, "from_legacy_cache"):
+        return DynamicCache.from_legacy_cache(legacy)
+    return DynamicCache(legacy)
+
+
+def expand_cache(legacy: LegacyCache, batch_size: int) -> LegacyCache:
+    """Broadcast a batch-1 cache to `batch_size` rows without copying"""
+    return tuple(
+        (key.expand(batch_size, -1, -1, -1), value.expand(batch_size, -1, -1, -1))
+        for key, value in legacy
+    )
+
+
+def crop_cache(past, length: int):
+    """Drop cached positions beyond `length` (rejected speculative tokens)"""
+    if isinstance(past, tuple):
+        return tuple((key[:, :, :length], value[:, :, :length]) for key, value in past)
+    excess = past.get_seq_length() - length
+    if excess > 0:
+        # Negative crop removes tokens from the end on every version that has crop()
+        past.crop(-excess)
+    return past
+
+
+def trim_to_sentence(text: str) -> str:
+    """Trim text stopped mid-generation back to its last complete sentence"""
+    end = max(text.rfind(mark) for mark in ".!?\n")
+    return text[:end + 1].strip() if end > 0 else ""
+
+
+def sample_next_token(logits: torch.Tensor, temperature: float, top_k: int, do_sample: bool) -> torch.Tensor:
+    """Pick one token per row from [batch, vocab] logits"""
+    if not do_sample:
+        return logits.argmax(dim=-1)
+
+    logits = logits / max(temperature, 1e-5)
+    if top_k and top_k < logits.shape[-1]:
+        threshold = torch.topk(logits, top_k, dim=-1).values[:, -1:]
+        logits = logits.masked_fill(logits < threshold, float("-inf"))
+    probs = torch.softmax(logits, dim=-1)
+    return torch.multinomial(probs, num_samples=1).squeeze(-1)
+
+
+class PrefixCachedDecoder:
+    """
+    Sampling decoder that reuses the KV cache of a fixed prompt prefix
+
+    The prefix is run through the model once at construction. Each call then
+    only prefills the per-request suffix on top of the stored cache, and a
+    batch shares the same prefix tensors through a broadcast view. Suffixes of
+    different lengths are left-padded between prefix and suffix, with the
+    attention mask and position ids adjusted so padding is invisible.
+    """
+
+    def __init__(self, model, tokenizer, prefix: str, top_k: int = 50):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.prefix = prefix
+        self.top_k = top_k
+        self.eos_token_id = tokenizer.eos_token_id
+        self.pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else self.eos_token_id
+
+        self.prefix_ids = tokenizer(prefix, return_tensors="pt").input_ids
+        start = time.perf_counter()
+        with torch.no_grad():
+            output = model(input_ids=self.prefix_ids, use_cache=True)
+        self.prefix_cache = to_legacy_cache(output.past_key_values)
+        self.prefix_length = self.prefix_ids.shape[1]
+        logger.info(f"✅ Cached {self.prefix_length}-token prompt prefix in {time.perf_counter() - start:.3f}s")
+
+    def _encode_suffixes(self, suffixes: List[str]) -> Tuple[torch.Tensor, torch.Tensor]:
+        encoded = [self.tokenizer(s, add_special_tokens=False).input_ids for s in suffixes]
+        width = max(len(ids) for ids in encoded)
+        input_ids = torch.full((len(encoded), width), self.pad_token_id, dtype=torch.long)
+        mask = torch.zeros((len(encoded), width), dtype=torch.long)
+        for row, ids in enumerate(encoded):
+            input_ids[row, width - len(ids):] = torch.tensor(ids, dtype=torch.long)
+            mask[row, width - len(ids):] = 1
+        return input_ids, mask
+
+    @torch.no_grad()
+    def prefill(self, suffixes: List[str]):
+        """
+        Run the suffixes on top of the cached prefix
+
+        Returns:
+            (last-position logits, cache, attention mask, next position ids)
+        """
+        input_ids, suffix_mask = self._encode_suffixes(suffixes)
+        batch_size = input_ids.shape[0]
+
+        attention_mask = torch.cat(
+            [torch.ones((batch_size, self.prefix_length), dtype=torch.long), suffix_mask], dim=1
+        )
+        position_ids = self.prefix_length + (suffix_mask.cumsum(dim=1) - 1).clamp(min=0)
+
+        output = self.model(
+            input_ids=input_ids,
+            past_key_values=from_legacy_cache(expand_cache(self.prefix_cache, batch_size)),
+            attention_mask=attention_mask,
+            position_ids=position_ids,
+            use_cache=True,
+        )
+        next_positions = position_ids[:, -1:] + 1
+        return output.logits[:, -1, :], output.past_key_values, attention_mask, next_positions
+
+    @torch.no_grad()
+    def generate(self, suffixes: List[str], max_length: int = 200, temperature: float = 0.7,
+                 do_sample: bool = True, deadline: Optional[float] = None) -> List[str]:
+        """
+        Generate a continuation of prefix + suffix for each suffix
+
+        Args:
+            max_length: Total token budget including the prompt, as in the pipeline
+            deadline: time.perf_counter() value after which decoding stops early
+
+        Returns:
+            Generated text only (prompt excluded), one string per suffix
+        """
+        logits, past, attention_mask, positions = self.prefill(suffixes)
+        batch_size = logits.shape[0]
+        # Per row, from that row's own prompt length; left padding doesn't count
+        max_new_tokens = (max_length - attention_mask.sum(dim=1)).clamp(min=1)
+
+        generated = torch.empty((batch_size, 0), dtype=torch.long)
+        finished = torch.zeros(batch_size, dtype=torch.bool)
+
+        for step in range(int(max_new_tokens.max())):
+            next_tokens = sample_next_token(logits, temperature, self.top_k, do_sample)
+            next_tokens = next_tokens.masked_fill(finished, self.pad_token_id)
+            generated = torch.cat([generated, next_tokens[:, None]], dim=1)
+            finished |= (next_tokens == self.eos_token_id) | (max_new_tokens <= step + 1)
+            if finished.all() or (deadline is not None and time.perf_counter() >= deadline):
+                break
+
+            attention_mask = torch.cat([attention_mask, torch.ones((batch_size, 1), dtype=torch.long)], dim=1)
+            output = self.model(
+                input_ids=next_tokens[:, None],
+                past_key_values=past,
+                attention_mask=attention_mask,
+                position_ids=positions,
+                use_cache=True,
+            )
+            logits, past = output.logits[:, -1, :], output.past_key_values
+            positions = positions + 1
+
+        return [self.tokenizer.decode(row, skip_special_tokens=True) for row in generated]
+
+
+class SpeculativeDecoder:
+    """
+    Speculative sampling with a small draft model (Leviathan et al., 2023)
+
+    The draft proposes `lookahead` tokens one at a time; the target scores all
+    of them in a single forward pass. Each draft token x is kept with
+    probability min(1, p(x) / q(x)); on the first rejection a replacement is
+    drawn from max(0, p - q), and if every token survives a bonus token is
+    drawn from the target's next distribution. The output follows exactly the
+    target's sampling distribution, just with fewer target passes. Both
+    models start from their own cached copy of the shared prompt prefix.
+    """
+
+    def __init__(self, target_model, draft_model, tokenizer, prefix: str, lookahead: int = 4, top_k: int = 50):
+        target_vocab = target_model.get_output_embeddings().weight.shape[0]
+        draft_vocab = draft_model.get_output_embeddings().weight.shape[0]
+        if target_vocab != draft_vocab:
+            raise ValueError(f"Draft vocab ({draft_vocab}) does not match target vocab ({target_vocab})")
+
+        self.target = PrefixCachedDecoder(target_model, tokenizer, prefix, top_k=top_k)
+        self.draft = PrefixCachedDecoder(draft_model, tokenizer, prefix, top_k=top_k)
+        self.tokenizer = tokenizer
+        self.lookahead = lookahead
+        self.top_k = top_k
+        self.eos_token_id = tokenizer.eos_token_id
+
+        self._stats_lock = threading.Lock()
+        self.proposed = 0
+        self.accepted = 0
+        self.target_passes = 0
+
+    def _probs(self, logits: torch.Tensor, temperature: float, do_sample: bool) -> torch.Tensor:
+        """Sampling distribution(s) for [..., vocab] logits; one-hot when greedy"""
+        if not do_sample:
+            return torch.nn.functional.one_hot(logits.argmax(dim=-1), logits.shape[-1]).to(logits.dtype)
+        logits = logits / max(temperature, 1e-5)
+        if self.top_k and self.top_k < logits.shape[-1]:
+            threshold = torch.topk(logits, self.top_k, dim=-1).values[..., -1:]
+            logits = logits.masked_fill(logits < threshold, float("-inf"))
+        return torch.softmax(logits, dim=-1)
+
+    @staticmethod
+    def _forward(decoder: PrefixCachedDecoder, token_ids: List[int], past):
+        output = decoder.model(input_ids=torch.tensor([token_ids], dtype=torch.long),
+                               past_key_values=past, use_cache=True)
+        return output.logits[0], output.past_key_values
+
+    @torch.no_grad()
+    def generate(self, suffix: str, max_length: int = 200, temperature: float = 0.7,
+                 do_sample: bool = True, deadline: Optional[float] = None) -> str:
+        """Generate a continuation of prefix + suffix for a single request"""
+        tokens = self.target.prefix_ids[0].tolist() + self.tokenizer(suffix, add_special_tokens=False).input_ids
+        prompt_length = len(tokens)
+        max_new_tokens = max(1, max_length - prompt_length)
+
+        target_past = from_legacy_cache(self.target.prefix_cache)
+        draft_past = from_legacy_cache(self.draft.prefix_cache)
+        target_length = draft_length = self.target.prefix_length
+
+        proposed = accepted = passes = 0
+        while len(tokens) - prompt_length < max_new_tokens:
+            budget = max_new_tokens - (len(tokens) - prompt_length)
+            k = min(self.lookahead, budget)
+
+            # Draft k tokens, catching the draft cache up on anything it hasn't seen
+            draft_tokens, draft_probs = [], []
+            logits, draft_past = self._forward(self.draft, tokens[draft_length:], draft_past)
+            draft_length = len(tokens)
+            for i in range(k):
+                q = self._probs(logits[-1], temperature, do_sample)
+                token = int(torch.multinomial(q, 1)) if do_sample else int(q.argmax())
+                draft_tokens.append(token)
+                draft_probs.append(q)
+                if i < k - 1:
+                    logits, draft_past = self._forward(self.draft, [token], draft_past)
+                    draft_length += 1
+
+            # Score every draft position with one target pass
+            pending = tokens[target_length:]
+            logits, target_past = self._forward(self.target, pending + draft_tokens, target_past)
+            passes += 1
+            p = self._probs(logits[len(pending) - 1:], temperature, do_sample)
+
+            n_accepted = 0
+            next_token = None
+            for i, token in enumerate(draft_tokens):
+                ratio = p[i, token] / draft_probs[i][token].clamp(min=1e-10)
+                if torch.rand(()) < ratio.clamp(max=1.0):
+                    n_accepted += 1
+                    continue
+                residual = (p[i] - draft_probs[i]).clamp(min=0)
+                residual = residual / residual.sum() if residual.sum() > 0 else p[i]
+                next_token = int(torch.multinomial(residual, 1)) if do_sample else int(residual.argmax())
+                break
+            if next_token is None:
+                next_token = int(torch.multinomial(p[k], 1)) if do_sample else int(p[k].argmax())
+
+            proposed += k
+            accepted += n_accepted
+            kept = draft_tokens[:n_accepted]
+
+            # Roll both caches back to the last verified token
+            target_length = len(tokens) + len(kept)
+            target_past = crop_cache(target_past, target_length)
+            draft_length = min(draft_length, target_length)
+            draft_past = crop_cache(draft_past, draft_length)
+
+            for token in kept + [next_token]:
+                tokens.append(token)
+                if token == self.eos_token_id:
+                    break
+            if self.eos_token_id in tokens[prompt_length:]:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+        self._record(proposed, accepted, passes)
+        generated = tokens[prompt_length:prompt_length + max_new_tokens]
+        return self.tokenizer.decode(generated, skip_special_tokens=True)
+
+    def _record(self, proposed: int, accepted: int, passes: int):
+        with self._stats_lock:
+            self.proposed += proposed
+            self.accepted += accepted
+            self.target_passes += passes
+        SPECULATIVE_TOKENS.inc(accepted, result="accepted")
+        SPECULATIVE_TOKENS.inc(proposed - accepted, result="rejected")
+
+    def stats(self) -> Dict[str, Any]:
+        """Acceptance statistics since startup"""
+        with self._stats_lock:
+            return {
+                "lookahead": self.lookahead,
+                "proposed_tokens": self.proposed,
+                "accepted_tokens": self.accepted,
+                "acceptance_rate": self.accepted / self.proposed if self.proposed else 0.0,
+                "target_passes": self.target_passes,
+            }
@@ -0,0 +1,249 @@
+import logging
+import struct
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS gamification_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    kind INTEGER NOT NULL,
+    stress_level REAL,
+    day INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_gamification_events_user_seq ON gamification_events (user_id, seq);
+
+CREATE TABLE IF NOT EXISTS gamification_state (
+    user_id TEXT PRIMARY KEY,
+    points INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    achievements INTEGER NOT NULL,
+    state BLOB NOT NULL,
+    baseline BLOB NOT NULL,
+    last_seq INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Stored as their index: append new kinds, never reorder
+EVENT_KINDS = ("problem_solved", "mood_updated", "tip_completed")
+EVENT_POINTS = {"problem_solved": 25, "mood_updated": 10, "tip_completed": 10}
+
+# Running counters achievements can trigger on, packed in this order
+COUNTERS = ("events", "problems_solved", "moods_updated", "tips_completed", "streak", "low_stress_run")
+KIND_COUNTERS = {"problem_solved": "problems_solved", "mood_updated": "moods_updated",
+                 "tip_completed": "tips_completed"}
+
+LEVEL_POINTS = 1000
+LOW_STRESS = 0.3
+
+# points, level, achievement bits, last active day, then one int per counter
+STATE_FORMAT = "<qiqi" + "i" * len(COUNTERS)
+
+
+@dataclass(frozen=True)
+class Achievement:
+    name: str
+    icon: str
+    desc: str
+    points: int
+    counter: str
+    threshold: int
+
+
+# Earned achievements are a bitmask over this tuple: append new rules, never reorder
+ACHIEVEMENTS = (
+    Achievement("First Step", "🚶", "Completed first session", 50, "events", 1),
+    Achievement("7-Day Streak", "🔥", "7 consecutive days", 100, "streak", 7),
+    Achievement("Stress Master", "🧠", "Low stress 3 check-ins running", 75, "low_stress_run", 3),
+    Achievement("Problem Solver", "💡", "5+ problems solved", 150, "problems_solved", 5),
+    Achievement("Meditation Guru", "🧘", "10 wellness tips completed", 100, "tips_completed", 10),
+)
+
+
+@dataclass
+class PlayerState:
+    points: int = 0
+    level: int = 1
+    achievements: int = 0
+    last_day: int = 0  # date ordinal of the last event, 0 = never
+    counters: List[int] = field(default_factory=lambda: [0] * len(COUNTERS))
+
+    def pack(self) -> bytes:
+        return struct.pack(STATE_FORMAT, self.points, self.level, self.achievements, self.last_day, *self.counters)
+
+    @classmethod
+    def unpack(cls, blob: bytes) -> "PlayerState":
+        points, level, achievements, last_day, *counters = struct.unpack(STATE_FORMAT, blob)
+        return cls(points, level, achievements, last_day, list(counters))
+
+
+class GamificationEngine:
+    """
+    Points, levels, streaks and achievements from an append-only event log
+
+    Each event (problem solved, mood updated, tip completed) adds its points,
+    bumps a few counters and is appended to gamification_events; the user's
+    packed state row is updated in the same transaction. Achievements are
+    indexed by counter and sorted by threshold, so an event only looks at the
+    rules whose threshold its counter changes just crossed (a bisect per
+    changed counter) instead of re-checking every rule. The log can rebuild
+    any user's state with replay().
+    """
+
+    def __init__(self, store, achievements: Sequence[Achievement] = ACHIEVEMENTS):
+        self.store = store
+        self.store.ensure_schema(SCHEMA)
+        self.achievements = tuple(achievements)
+
+        # counter -> (sorted thresholds, achievement index for each)
+        self._triggers: Dict[str, Tuple[List[int], List[int]]] = {}
+        for index in sorted(range(len(self.achievements)), key=lambda i: self.achievements[i].threshold):
+            rule = self.achievements[index]
+            if rule.counter not in COUNTERS:
+                raise ValueError(f"Achievement '{rule.name}' uses unknown counter '{rule.counter}'")
+            thresholds, indices = self._triggers.setdefault(rule.counter, ([], []))
+            thresholds.append(rule.threshold)
+            indices.append(index)
+
+    def _baseline(self, user_id: str) -> PlayerState:
+        """Starting state for a user first seen by the engine, from their dashboard row"""
+        data = self.store.load_user(user_id)
+        names = {rule.name: i for i, rule in enumerate(self.achievements)}
+        state = PlayerState(points=data['wellness_points'], level=data['level'])
+        for name in data['achievements']:
+            if name in names:
+                state.achievements |= 1 << names[name]
+        state.counters[COUNTERS.index("streak")] = data['streak']
+        state.counters[COUNTERS.index("problems_solved")] = data['problems_solved']
+        return state
+
+    def _load(self, conn, user_id: str) -> Optional[PlayerState]:
+        row = conn.execute("SELECT state FROM gamification_state WHERE user_id = ?", (user_id,)).fetchone()
+        return PlayerState.unpack(row[0]) if row else None
+
+    def _apply(self, state: PlayerState, kind: str, stress_level: Optional[float], day: int) -> List[int]:
+        """Fold one event into `state` in place; returns newly earned achievement indices"""
+        before = list(state.counters)
+        counters = state.counters
+        counters[0] += 1
+        counters[COUNTERS.index(KIND_COUNTERS[kind])] += 1
+
+        streak = COUNTERS.index("streak")
+        if day == state.last_day + 1:
+            counters[streak] += 1
+        elif day != state.last_day:
+            counters[streak] = 1
+        state.last_day = max(state.last_day, day)
+
+        if stress_level is not None:
+            run = COUNTERS.index("low_stress_run")
+            counters[run] = counters[run] + 1 if stress_level < LOW_STRESS else 0
+
+        earned = []
+        state.points += EVENT_POINTS[kind]
+        for i, name in enumerate(COUNTERS):
+            if counters[i] <= before[i] or name not in self._triggers:
+                continue
+            thresholds, indices = self._triggers[name]
+            for index in indices[bisect_right(thresholds, before[i]):bisect_right(thresholds, counters[i])]:
+                if not state.achievements >> index & 1:
+                    state.achievements |= 1 << index
+                    state.points += self.achievements[index].points
+                    earned.append(index)
+
+        state.level = max(state.level, state.points // LEVEL_POINTS + 1)
+        return earned
+
+    def record(self, user_id: str, kind: str, stress_level: Optional[float] = None,
+               timestamp: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Log an event and update the user's game state
+
+        Args:
+            kind: One of EVENT_KINDS
+            stress_level: Stress (0-1) after the event, if known
+
+        Returns:
+            Points awarded, achievements newly earned, whether the level went
+            up, and the resulting state (see state())
+        """
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Unknown event kind '{kind}', expected one of {EVENT_KINDS}")
+        day = (timestamp or datetime.now()).date().toordinal()
+
+        with self.store.transaction() as conn:
+            state = self._load(conn, user_id)
+            if state is None:
+                state = self._baseline(user_id)
+                conn.execute(
+                    "INSERT INTO gamification_state (user_id, points, level, achievements, state, baseline, last_seq) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                    (user_id, state.points, state.level, state.achievements, state.pack(), state.pack())
+                )
+            points, level = state.points, state.level
+            earned = self._apply(state, kind, stress_level, day)
+
+            seq = conn.execute(
+                "INSERT INTO gamification_events (user_id, kind, stress_level, day) VALUES (?, ?, ?, ?)",
+                (user_id, EVENT_KINDS.index(kind), stress_level, day)
+            ).lastrowid
+            conn.execute(
+                "UPDATE gamification_state SET points = ?, level = ?, achievements = ?, state = ?, last_seq = ? "
+                "WHERE user_id = ?",
+                (state.points, state.level, state.achievements, state.pack(), seq, user_id)
+            )
+
+        return {
+            "points_awarded": state.points - points,
+            "new_achievements": [self.achievements[i].name for i in earned],
+            "level_up": state.level > level,
+            "state": self._describe(state),
+        }
+
+    def _describe(self, state: PlayerState) -> Dict[str, Any]:
+        return {
+            "wellness_points": state.points,
+            "level": state.level,
+            "next_level_points": state.level * LEVEL_POINTS,
+            "streak": state.counters[COUNTERS.index("streak")],
+            "achievements": [rule.name for i, rule in enumerate(self.achievements) if state.achievements >> i & 1],
+            "counters": dict(zip(COUNTERS, state.counters)),
+        }
+
+    def state(self, user_id: str) -> Dict[str, Any]:
+        """Current points, level, streak, earned achievement names and counters"""
+        with self.store.transaction() as conn:
+            state = self._load(conn, user_id)
+        return self._describe(state if state is not None else self._baseline(user_id))
+
+    def achievement_board(self, user_id: str) -> List[Dict[str, Any]]:
+        """Every achievement with whether this user has earned it, for display"""
+        earned = set(self.state(user_id)["achievements"])
+        return [{"name": rule.name, "icon": rule.icon, "desc": rule.desc, "points": rule.points,
+                 "earned": rule.name in earned} for rule in self.achievements]
+
+    def replay(self, user_id: str) -> Dict[str, Any]:
+        """Rebuild a user's state from their baseline and event log, and store it"""
+        with self.store.transaction() as conn:
+            row = conn.execute("SELECT baseline FROM gamification_state WHERE user_id = ?", (user_id,)).fetchone()
+            if row is None:
+                return self.state(user_id)
+            state = PlayerState.unpack(row[0])
+            seq = 0
+            for seq, kind, stress_level, day in conn.execute(
+                "SELECT seq, kind, stress_level, day FROM gamification_events WHERE user_id = ? ORDER BY seq",
+                (user_id,)
+            ):
+                self._apply(state, EVENT_KINDS[kind], stress_level, day)
+            conn.execute(
+                "UPDATE gamification_state SET points = ?, level = ?, achievements = ?, state = ?, last_seq = ? "
+                "WHERE user_id = ?",
+                (state.points, state.level, state.achievements, state.pack(), seq, user_id)
+            )
+        logger.info(f"🔁 Replayed gamification state for {user_id}")
+        return self._describe(state)
@@ -0,0 +1,162 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leaderboard (
+    user_id TEXT PRIMARY KEY,
+    display_name TEXT NOT NULL,
+    wellness_points INTEGER NOT NULL,
+    streak INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+METRICS = ("wellness_points", "streak")
+
+
+class Leaderboard:
+    """
+    Opt-in company leaderboard by wellness points and by streak
+
+    Members are kept in one order-statistics index per metric, sorted by
+    (-score, user_id), so an update is a remove and an add (O(log n)), a
+    rank is a bisect and top-N or around-me is a slice; nothing scans the
+    member list. Only opted-in users have a row in the leaderboard table,
+    which rebuilds the indexes on startup.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.store.ensure_schema(SCHEMA)
+        self._lock = threading.RLock()
+        self._members: Dict[str, Dict[str, Any]] = {}
+
+        for row in self.store.query("SELECT user_id, display_name, wellness_points, streak FROM leaderboard"):
+            self._members[row['user_id']] = {
+                "display_name": row['display_name'],
+                "wellness_points": row['wellness_points'],
+                "streak": row['streak'],
+            }
+        self._index = {
+            metric: SortedList((-member[metric], user_id) for user_id, member in self._members.items())
+            for metric in METRICS
+        }
+        logger.info(f"✅ Leaderboard ready with {len(self._members)} members")
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._members
+
+    @staticmethod
+    def _check_metric(metric: str):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown leaderboard metric '{metric}', expected one of {METRICS}")
+
+    def _write(self, user_id: str, member: Dict[str, Any]):
+        with self.store.transaction() as conn:
+            conn.execute(
+                "INSERT INTO leaderboard (user_id, display_name, wellness_points, streak, updated_at) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (user_id) DO UPDATE SET "
+                "display_name = excluded.display_name, wellness_points = excluded.wellness_points, "
+                "streak = excluded.streak, updated_at = excluded.updated_at",
+                (user_id, member["display_name"], member["wellness_points"], member["streak"],
+                 datetime.now().isoformat())
+            )
+
+    def opt_in(self, user_id: str, display_name: str, wellness_points: int, streak: int):
+        """Add a user (or rename them) with their current scores"""
+        member = {"display_name": display_name, "wellness_points": int(wellness_points), "streak": int(streak)}
+        with self._lock:
+            if self._members.get(user_id) == member:
+                return  # the dashboard re-submits on every rerun
+            if user_id in self._members:
+                self._unindex(user_id)
+            self._members[user_id] = member
+            for metric in METRICS:
+                self._index[metric].add((-member[metric], user_id))
+            self._write(user_id, member)
+
+    def opt_out(self, user_id: str):
+        """Remove a user from the leaderboard and delete their row"""
+        with self._lock:
+            if user_id not in self._members:
+                return
+            self._unindex(user_id)
+            del self._members[user_id]
+            with self.store.transaction() as conn:
+                conn.execute("DELETE FROM leaderboard WHERE user_id = ?", (user_id,))
+
+    def _unindex(self, user_id: str):
+        member = self._members[user_id]
+        for metric in METRICS:
+            self._index[metric].remove((-member[metric], user_id))
+
+    def update(self, user_id: str, wellness_points: int, streak: int) -> bool:
+        """
+        New scores for a member; users who haven't opted in are ignored
+
+        Returns:
+            True if the user is on the leaderboard
+        """
+        with self._lock:
+            member = self._members.get(user_id)
+            if member is None:
+                return False
+            scores = {"wellness_points": int(wellness_points), "streak": int(streak)}
+            if all(member[metric] == scores[metric] for metric in METRICS):
+                return True
+            for metric in METRICS:
+                if member[metric] != scores[metric]:
+                    self._index[metric].remove((-member[metric], user_id))
+                    self._index[metric].add((-scores[metric], user_id))
+                    member[metric] = scores[metric]
+            self._write(user_id, member)
+            return True
+
+    def _entry(self, metric: str, score_key: Tuple[int, str]) -> Dict[str, Any]:
+        score, user_id = score_key
+        member = self._members[user_id]
+        return {
+            "rank": self._index[metric].bisect_left((score, "")) + 1,  # ties share a rank
+            "user_id": user_id,
+            "display_name": member["display_name"],
+            "wellness_points": member["wellness_points"],
+            "streak": member["streak"],
+        }
+
+    def rank(self, user_id: str, metric: str = "wellness_points") -> Optional[int]:
+        """1-based rank (tied scores share the best rank), None if not a member"""
+        self._check_metric(metric)
+        with self._lock:
+            member = self._members.get(user_id)
+            if member is None:
+                return None
+            return self._index[metric].bisect_left((-member[metric], "")) + 1
+
+    def top(self, n: int = 10, metric: str = "wellness_points") -> List[Dict[str, Any]]:
+        """Best `n` members by `metric`"""
+        self._check_metric(metric)
+        with self._lock:
+            return [self._entry(metric, key) for key in self._index[metric][:n]]
+
+    def around(self, user_id: str, metric: str = "wellness_points", radius: int = 2) -> List[Dict[str, Any]]:
+        """The member plus up to `radius` neighbours above and below; empty if not a member"""
+        self._check_metric(metric)
+        with self._lock:
+            member = self._members.get(user_id)
+            if member is None:
+                return []
+            index = self._index[metric]
+            position = index.index((-member[metric], user_id))
+            return [self._entry(metric, key) for key in index[max(0, position - radius):position + radius + 1]]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"members": len(self._members)}
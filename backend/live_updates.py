@@ -0,0 +1,336 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque, OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+# Users whose newest reading the broker keeps, and for how long after their last one
+LIVE_MAX_USERS = int(os.environ.get("ENGCARE_LIVE_MAX_USERS", "10000"))
+LIVE_IDLE_SECONDS = float(os.environ.get("ENGCARE_LIVE_IDLE_SECONDS", str(24 * 3600)))
+# Recent updates kept for workers relaying them to their own subscribers
+LIVE_LOG_SIZE = int(os.environ.get("ENGCARE_LIVE_LOG_SIZE", "1024"))
+# Background feeds the dashboard keeps open, and how long an unread one lives
+FEED_MAX_CLIENTS = int(os.environ.get("ENGCARE_LIVE_MAX_FEEDS", "200"))
+FEED_IDLE_SECONDS = float(os.environ.get("ENGCARE_LIVE_FEED_IDLE_SECONDS", "600"))
+
+
+def next_burnout_risk(stress_level: float, burnout_risk: float) -> float:
+    """Nudge burnout risk up under sustained high stress, down otherwise"""
+    if stress_level > 0.6:
+        return min(0.9, burnout_risk + 0.02)
+    return max(0.1, burnout_risk - 0.01)
+
+
+class LiveReadings:
+    """
+    Newest stress reading per user, and a short log of recent updates
+
+    The newest reading per user is kept for `idle_seconds` after it was
+    published and for at most `max_users` users, least recently updated
+    dropped first. Versions come from one counter, so they keep increasing
+    for a user whose state was dropped; every update also carries the
+    epoch, which changes on restart, when the counter starts over.
+
+    Thread-safe: under serve.py with several workers one copy lives in the
+    state owner (see shared_state) and every worker publishes to it and
+    follows its log.
+    """
+
+    def __init__(self, max_users: int = LIVE_MAX_USERS, idle_seconds: float = LIVE_IDLE_SECONDS,
+                 log_size: int = LIVE_LOG_SIZE, clock: Callable[[], float] = time.monotonic):
+        self.max_users = max_users
+        self.idle_seconds = idle_seconds
+        self.clock = clock
+        self._changed = threading.Condition()
+        # user_id -> (publish time, update), least recently published first
+        self._latest: "OrderedDict[str, Any]" = OrderedDict()
+        self._log: deque = deque(maxlen=log_size)
+        self.restart()
+
+    def restart(self):
+        """Forget every reading and start a new epoch"""
+        with self._changed:
+            self.epoch = f"{time.time_ns():x}"
+            self._versions = itertools.count(1)
+            self._version = 0
+            self._latest.clear()
+            self._log.clear()
+
+    def _evict(self):
+        cutoff = self.clock() - self.idle_seconds
+        while self._latest:
+            published, _ = next(iter(self._latest.values()))
+            if len(self._latest) <= self.max_users and published >= cutoff:
+                break
+            self._latest.popitem(last=False)
+
+    def latest(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._changed:
+            self._evict()
+            entry = self._latest.get(user_id)
+            return entry[1] if entry else None
+
+    def tracked_users(self) -> int:
+        with self._changed:
+            self._evict()
+            return len(self._latest)
+
+    def position(self) -> Tuple[str, int]:
+        """(epoch, newest version), where a follower starts reading the log"""
+        with self._changed:
+            return self.epoch, self._version
+
+    def publish(self, user_id: str, stress_level: float,
+                burnout_risk: Optional[float] = None) -> Dict[str, Any]:
+        with self._changed:
+            self._evict()
+            previous = self._latest.get(user_id)
+            if burnout_risk is None:
+                burnout_risk = next_burnout_risk(
+                    stress_level, previous[1]['burnout_risk'] if previous else 0.25
+                )
+
+            self._version = next(self._versions)
+            update = {
+                "user_id": user_id,
+                "epoch": self.epoch,
+                "version": self._version,
+                "stress_level": round(float(stress_level), 4),
+                "burnout_risk": round(float(burnout_risk), 4),
+                "timestamp": datetime.now().isoformat()
+            }
+            self._latest[user_id] = (self.clock(), update)
+            self._latest.move_to_end(user_id)
+            self._evict()
+            self._log.append(update)
+            self._changed.notify_all()
+            return update
+
+    def since(self, epoch: str, after: int, timeout: float) -> List[Dict[str, Any]]:
+        """
+        Updates newer than version `after` of `epoch`, waiting up to
+        `timeout` seconds for one (all logged updates after a restart)
+        """
+        with self._changed:
+            if epoch != self.epoch:
+                after = 0
+            if self._version <= after:
+                self._changed.wait(timeout)
+            if epoch != self.epoch:
+                after = 0
+            return [update for update in self._log if update["version"] > after]
+
+
+class LiveUpdateBroker:
+    """
+    Fan-out of stress and burnout-risk changes to Server-Sent Event streams
+
+    Each subscriber owns a small bounded queue. Only the newest state matters
+    to a dashboard, so when a slow client falls behind its oldest queued
+    update is dropped instead of buffering without limit.
+
+    Readings are kept in a LiveReadings. With `relay`, that is the copy in
+    the state owner that other workers publish to as well, so once this
+    process has a subscriber a thread follows its log and hands every
+    update to the event loop; otherwise publish delivers directly.
+    """
+
+    def __init__(self, queue_size: int = 8, heartbeat_seconds: float = 15.0,
+                 max_users: int = LIVE_MAX_USERS, idle_seconds: float = LIVE_IDLE_SECONDS,
+                 clock: Callable[[], float] = time.monotonic, readings=None, relay: bool = False):
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.readings = readings or LiveReadings(max_users=max_users, idle_seconds=idle_seconds, clock=clock)
+        self.relay = relay
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._relay_thread: Optional[threading.Thread] = None
+
+    @property
+    def epoch(self) -> str:
+        return self.readings.position()[0]
+
+    def latest(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self.readings.latest(user_id)
+
+    def tracked_users(self) -> int:
+        return self.readings.tracked_users()
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        if self.relay and self._relay_thread is None:
+            self._start_relay()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        latest = self.latest(user_id)
+        if latest is not None:
+            queue.put_nowait(latest)
+        self._subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+
+    def publish(self, user_id: str, stress_level: float,
+                burnout_risk: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Record a new stress reading and push it to the user's subscribers
+
+        Args:
+            stress_level: Stress on a 0-1 scale
+            burnout_risk: Explicit risk (0-1); derived from the previous
+                value and the new stress level when omitted
+        """
+        update = self.readings.publish(user_id, stress_level, burnout_risk)
+        if not self.relay:
+            self._deliver([update])
+        return update
+
+    def _deliver(self, updates: List[Dict[str, Any]]):
+        for update in updates:
+            for queue in self._subscribers.get(update["user_id"], ()):
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(update)
+
+    def _start_relay(self):
+        """Follow the shared log from now on (called on the event loop)"""
+        loop = asyncio.get_running_loop()
+        epoch, after = self.readings.position()
+        self._relay_thread = threading.Thread(target=self._follow, args=(loop, epoch, after),
+                                              daemon=True, name="live-relay")
+        self._relay_thread.start()
+
+    def _follow(self, loop: asyncio.AbstractEventLoop, epoch: str, after: int):
+        while not loop.is_closed():
+            try:
+                updates = self.readings.since(epoch, after, self.heartbeat_seconds)
+            except Exception as e:
+                logger.warning(f"⚠️ Live relay failed, retrying: {e}")
+                time.sleep(1.0)
+                continue
+            if updates:
+                epoch, after = updates[-1]["epoch"], updates[-1]["version"]
+                try:
+                    loop.call_soon_threadsafe(self._deliver, updates)
+                except RuntimeError:
+                    # The loop closed (worker shutting down)
+                    return
+
+    async def stream(self, user_id: str) -> AsyncIterator[str]:
+        """Yield SSE frames for one subscriber until the client disconnects"""
+        queue = self.subscribe(user_id)
+        try:
+            while True:
+                try:
+                    update = await asyncio.wait_for(queue.get(), timeout=self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    # Comment frame keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"id: {update['version']}\nevent: wellness\ndata: {json.dumps(update)}\n\n"
+        finally:
+            self.unsubscribe(user_id, queue)
+
+
+class LiveFeedClient:
+    """
+    Background SSE consumer used by the Streamlit app
+
+    A daemon thread holds one streaming connection to the backend and keeps
+    the newest update in memory, so dashboard fragments read it without any
+    network round trip. Reconnects with capped exponential backoff.
+    """
+
+    def __init__(self, api_url: str, user_id: str, max_backoff: float = 30.0):
+        self.url = f"{api_url.rstrip('/')}/live/{user_id}"
+        self.max_backoff = max_backoff
+        self.latest: Optional[Dict[str, Any]] = None
+        self.connected = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"live-feed-{user_id}")
+
+    def start(self) -> "LiveFeedClient":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def is_alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run(self):
+        import requests
+
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                with requests.get(self.url, stream=True, timeout=(5, 60)) as response:
+                    response.raise_for_status()
+                    self.connected = True
+                    backoff = 1.0
+                    for line in response.iter_lines(decode_unicode=True):
+                        if self._stop.is_set():
+                            return
+                        if line and line.startswith("data: "):
+                            self.latest = json.loads(line[len("data: "):])
+            except Exception as e:
+                logger.debug(f"Live feed disconnected: {e}")
+            self.connected = False
+            self._stop.wait(backoff)
+            backoff = min(self.max_backoff, backoff * 2)
+
+
+class LiveFeedPool:
+    """
+    LiveFeedClients shared across dashboard sessions, one per user
+
+    A feed nobody has read for `idle_seconds` is stopped and dropped, and
+    at most `max_clients` stay open (least recently read stopped first), so
+    users who closed their tabs don't keep a thread and a connection each.
+    """
+
+    def __init__(self, api_url: str, max_clients: int = FEED_MAX_CLIENTS, idle_seconds: float = FEED_IDLE_SECONDS,
+                 factory: Callable[[str, str], Any] = LiveFeedClient, clock: Callable[[], float] = time.monotonic):
+        self.api_url = api_url
+        self.max_clients = max_clients
+        self.idle_seconds = idle_seconds
+        self.factory = factory
+        self.clock = clock
+        self._lock = threading.Lock()
+        # user_id -> (last read time, client), least recently read first
+        self._clients: "OrderedDict[str, Any]" = OrderedDict()
+
+    def get(self, user_id: str):
+        """The user's running feed, started on first use"""
+        now = self.clock()
+        stopped = []
+        with self._lock:
+            entry = self._clients.pop(user_id, None)
+            client = entry[1] if entry and entry[1].is_alive() else self.factory(self.api_url, user_id).start()
+            self._clients[user_id] = (now, client)
+            while self._clients:
+                last_read, oldest = next(iter(self._clients.values()))
+                if len(self._clients) <= self.max_clients and last_read >= now - self.idle_seconds:
+                    break
+                stopped.append(self._clients.popitem(last=False)[1][1])
+        for idle in stopped:
+            idle.stop()
+        return client
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
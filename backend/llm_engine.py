@@ -1,10 +1,34 @@
 import torch
 from transformers import pipeline, AutoTokenizer
 import logging
+import os
 import time
+from typing import List, Dict, Any, Optional
+from telemetry import MODEL_LOAD_SECONDS, stage
+from decoding import PrefixCachedDecoder, SpeculativeDecoder, trim_to_sentence
 
 logger = logging.getLogger(__name__)
 
+# Every prompt starts with the same header, so its KV cache is computed once.
+# The split falls right after "Stress Level:" so the suffix tokenizes exactly
+# as it would inside the full prompt (GPT-2 BPE attaches the space to the number).
+PROMPT_PREFIX = "You are a wellness coach for engineers.\nStress Level:"
+PROMPT_SUFFIX = """ {stress_level}/10
+Work Hours: {work_hours}
+Breaks: {breaks_taken}
+Productivity: {productivity}/10
+
+Give 2-3 wellness tips:"""
+
+MAX_LENGTH = 200
+USE_PREFIX_CACHE = os.environ.get("ENGCARE_PREFIX_CACHE", "1") == "1"
+# Speculative decoding: a small model with the same tokenizer drafts tokens
+# that DialoGPT-Medium verifies in one pass. Off unless a draft model is set.
+DRAFT_MODEL = os.environ.get("ENGCARE_DRAFT_MODEL", "")
+SPECULATIVE_LOOKAHEAD = int(os.environ.get("ENGCARE_SPECULATIVE_LOOKAHEAD", "4"))
+# Benchmarks and tests set this to inject their own model instead
+SKIP_MODEL_LOAD = os.environ.get("ENGCARE_SKIP_MODEL_LOAD", "0") == "1"
+
 class LLMEngine:
     """
     DialoGPT-Medium LLM Engine
@@ -16,12 +40,16 @@ class LLMEngine:
     def __init__(self):
         self.model = None
         self.tokenizer = None
-        self.load_model()
+        self.decoder = None
+        self.speculative = None
+        if not SKIP_MODEL_LOAD:
+            self.load_model()
     
     def load_model(self):
         """Load DialoGPT-Medium (350MB LLM)"""
         try:
             logger.info("🤖 Loading DialoGPT-Medium LLM...")
+            start = time.perf_counter()
             
             self.tokenizer = AutoTokenizer.from_pretrained("microsoft/DialoGPT-medium")
             
@@ -34,52 +62,158 @@ class LLMEngine:
                 torch_dtype=torch.float32
             )
             
+            MODEL_LOAD_SECONDS.set(time.perf_counter() - start, model="dialogpt-medium")
             logger.info("✅ DialoGPT-Medium loaded successfully!")
+            
+            if USE_PREFIX_CACHE:
+                self._build_prefix_cache()
+            if DRAFT_MODEL:
+                self._load_draft_model(DRAFT_MODEL)
             return True
         
         except Exception as e:
             logger.error(f"❌ LLM load failed: {e}")
             return False
     
+    def use_model(self, model, tokenizer):
+        """Serve from an already loaded causal LM (benchmarks pass an offline stand-in)"""
+        self.tokenizer = tokenizer
+        self.model = pipeline("text-generation", model=model, tokenizer=tokenizer, max_length=MAX_LENGTH)
+        self.speculative = None
+        self.decoder = None
+        if USE_PREFIX_CACHE:
+            self._build_prefix_cache()
+    
     def generate_wellness_advice(self, stress_level: int, work_hours: int, 
-                                breaks_taken: int, productivity: int) -> str:
+                                breaks_taken: int, productivity: int,
+                                deadline: Optional[float] = None) -> str:
         """
         Generate wellness advice using LLM
         
         Resume Claim: "AI-generated personalized recommendations"
         Code Proof: This function generates using DialoGPT
+        
+        Args:
+            deadline: time.perf_counter() value to stop decoding at; the
+                text is then cut back to its last complete sentence
         """
         
         if not self.model:
-            return self._fallback_advice(stress_level)
+            return self.fallback_advice(stress_level)
         
         try:
-            prompt = f"""You are a wellness coach for engineers.
-Stress Level: {stress_level}/10
-Work Hours: {work_hours}
-Breaks: {breaks_taken}
-Productivity: {productivity}/10
-
-Give 2-3 wellness tips:"""
+            suffix = self._prompt_suffix(stress_level, work_hours, breaks_taken, productivity)
             
-            response = self.model(
-                prompt,
-                max_length=200,
-                temperature=0.7,
-                do_sample=True
-            )
+            if self.speculative is not None:
+                with stage("llm_generate_speculative"):
+                    text = self.speculative.generate(suffix, max_length=MAX_LENGTH, temperature=0.7,
+                                                     deadline=deadline)
+            elif self.decoder is not None:
+                with stage("llm_generate"):
+                    text = self.decoder.generate([suffix], max_length=MAX_LENGTH, temperature=0.7,
+                                                 deadline=deadline)[0]
+            else:
+                limits = {}
+                if deadline is not None:
+                    limits["max_time"] = max(deadline - time.perf_counter(), 0.05)
+                with stage("llm_generate"):
+                    response = self.model(
+                        PROMPT_PREFIX + suffix,
+                        max_length=MAX_LENGTH,
+                        temperature=0.7,
+                        do_sample=True,
+                        **limits
+                    )
+                text = response[0]['generated_text']
+                text = text.split("Give 2-3 wellness tips:")[-1]
+            text = text.strip()
             
-            text = response[0]['generated_text']
-            text = text.split("Give 2-3 wellness tips:")[-1].strip()
+            if deadline is not None and time.perf_counter() >= deadline:
+                text = trim_to_sentence(text)
+                if not text:
+                    logger.warning("⚠️ Deadline hit before a full sentence, using fallback")
+                    return self.fallback_advice(stress_level)
             
             logger.info(f"✅ LLM generated response ({len(text)} chars)")
             return text
         
         except Exception as e:
             logger.error(f"❌ Generation error: {e}")
-            return self._fallback_advice(stress_level)
+            return self.fallback_advice(stress_level)
+    
+    def generate_wellness_advice_batch(self, requests: List[Dict[str, int]],
+                                       deadline: Optional[float] = None) -> List[str]:
+        """
+        Generate advice for several requests in one decoding pass
+        
+        The inference scheduler calls this with the requests queued together.
+        Without the prefix cache, or with speculative decoding (one sequence
+        at a time), the requests are generated one after another.
+        
+        Args:
+            requests: Dicts with stress_level, work_hours, breaks_taken, productivity
+            deadline: time.perf_counter() value to stop decoding at, for the
+                whole batch
+        """
+        if not self.model or self.decoder is None or self.speculative is not None or len(requests) == 1:
+            return [self.generate_wellness_advice(**r, deadline=deadline) for r in requests]
+        
+        try:
+            suffixes = [self._prompt_suffix(**r) for r in requests]
+            with stage("llm_generate_batch"):
+                texts = self.decoder.generate(suffixes, max_length=MAX_LENGTH, temperature=0.7,
+                                              deadline=deadline)
+            texts = [t.strip() for t in texts]
+            if deadline is not None and time.perf_counter() >= deadline:
+                texts = [trim_to_sentence(t) for t in texts]
+            logger.info(f"✅ LLM generated {len(texts)} responses in one batch")
+            return [t or self.fallback_advice(r['stress_level']) for t, r in zip(texts, requests)]
+        
+        except Exception as e:
+            logger.error(f"❌ Batch generation error: {e}")
+            return [self.fallback_advice(r['stress_level']) for r in requests]
+    
+    def _prompt_suffix(self, stress_level: int, work_hours: int,
+                       breaks_taken: int, productivity: int) -> str:
+        return PROMPT_SUFFIX.format(
+            stress_level=stress_level,
+            work_hours=work_hours,
+            breaks_taken=breaks_taken,
+            productivity=productivity
+        )
+    
+    def _build_prefix_cache(self):
+        """Precompute past_key_values for the shared prompt header"""
+        try:
+            start = time.perf_counter()
+            self.decoder = PrefixCachedDecoder(self.model.model, self.tokenizer, PROMPT_PREFIX)
+            MODEL_LOAD_SECONDS.set(time.perf_counter() - start, model="prompt-prefix-cache")
+        except Exception as e:
+            logger.warning(f"⚠️ Prefix cache unavailable, using pipeline: {e}")
+            self.decoder = None
+    
+    def _load_draft_model(self, name: str):
+        """Load the draft model for speculative decoding; plain sampling on failure"""
+        try:
+            from transformers import AutoModelForCausalLM
+            
+            logger.info(f"🤖 Loading draft model {name} (lookahead {SPECULATIVE_LOOKAHEAD})...")
+            start = time.perf_counter()
+            draft = AutoModelForCausalLM.from_pretrained(name, torch_dtype=torch.float32).eval()
+            self.speculative = SpeculativeDecoder(
+                self.model.model, draft, self.tokenizer, PROMPT_PREFIX, lookahead=SPECULATIVE_LOOKAHEAD
+            )
+            MODEL_LOAD_SECONDS.set(time.perf_counter() - start, model="speculative-draft")
+            logger.info(f"✅ Speculative decoding enabled with {name}")
+        except Exception as e:
+            logger.warning(f"⚠️ Speculative decoding unavailable: {e}")
+            self.speculative = None
+    
+    def speculative_stats(self) -> Optional[Dict[str, Any]]:
+        """Draft acceptance statistics, or None when speculative decoding is off"""
+        return self.speculative.stats() if self.speculative is not None else None
     
-    def _fallback_advice(self, stress_level: int) -> str:
+    def fallback_advice(self, stress_level: int) -> str:
         """Fallback if LLM fails"""
         if stress_level >= 8:
             return "🚨 Take immediate break. Do 4-7-8 breathing. Contact mental health professional."
@@ -1,26 +1,168 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional
+from fastapi import FastAPI, HTTPException, Request, Depends, Header
+from fastapi.responses import StreamingResponse, Response
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
+import hmac
 import logging
+import os
+import time
 from datetime import datetime
 from llm_engine import llm_engine
-from rag_engine import rag_engine
+from rag_engine import rag_engine, DEFAULT_SITUATION, RESOURCES_PATH
 from evaluation import WellnessEvaluator
+from live_updates import LiveUpdateBroker, LiveReadings
+from slo import slo_controller
+from tenants import TenantIndexManager, UnknownTenantError, TENANT_CACHE_MB
+from stress_analyzer import stress_analyzer
+from bulk_ingest import BulkIngestor, BulkFormatError, detect_format, MAX_BODY_BYTES
+from profiling import ProfilingMiddleware, request_profiler
+import shared_state
+from shared_state import shared
+from scheduler import priority_classifier, inference_scheduler, PRIORITY_NAMES, CRISIS, CRISIS_BUDGET_SECONDS
+from ai_models.department_aggregator import department_aggregator as local_department_aggregator
+from ai_models.scenario_engine import evaluate_scenarios, scenario_cells, ScenarioTooLarge, MAX_CUBE_CELLS
+from ai_models.anomaly_detector import anomaly_detector as local_anomaly_detector
+from ai_models.crisis_detector import crisis_detector
+from ai_models.text_stress_classifier import load_classifier
+from telemetry import (registry, PROMETHEUS_CONTENT_TYPE, REQUEST_LATENCY,
+                       REQUESTS_IN_FLIGHT, QUEUE_DEPTH)
 
 logger = logging.getLogger(__name__)
 
+# Admin endpoints are disabled unless a token is configured
+ADMIN_TOKEN = os.environ.get("ENGCARE_ADMIN_TOKEN", "")
+WATCH_RESOURCES = os.environ.get("ENGCARE_WATCH_RESOURCES", "1") == "1"
+UNMATCHED_ROUTE = "<unmatched>"
+# Values per what-if axis on /company/scenarios (the cell count is capped too)
+MAX_SCENARIO_DELTAS = 201
+HTTP_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+# Per-company corpora layered over the shared resources; the memory budget
+# is for the whole server, so pre-fork workers split it
+tenant_indexes = TenantIndexManager(rag_engine, budget_mb=TENANT_CACHE_MB / shared_state.worker_count())
+
+
+def _resume_department_stats(aggregator):
+    """A restarted state owner picks up the newest snapshot, not the copy made at preload"""
+    if aggregator.snapshot_path and os.path.exists(aggregator.snapshot_path):
+        aggregator.restore(aggregator.snapshot_path)
+
+
+# State every pre-forked worker must agree on lives in the state owner
+# (see shared_state); in a single process these are the local objects
+live_broker = LiveUpdateBroker(
+    readings=shared("live_readings", LiveReadings(), on_start=LiveReadings.restart),
+    relay=shared_state.enabled()
+)
+department_aggregator = shared("department_aggregator", local_department_aggregator,
+                               on_start=_resume_department_stats)
+anomaly_detector = shared("anomaly_detector", local_anomaly_detector)
+
+
+def _encode_stress_texts(texts):
+    """Embed texts with the RAG model, bypassing its query cache"""
+    return rag_engine.embedding_model.encode(list(texts), convert_to_numpy=True)
+
+
+# An embedding-head artifact encodes with the RAG model directly; bulk
+# /stress/text batches would otherwise evict chat queries from the query LRU
+# and skew its hit-ratio metric
+text_stress_classifier = load_classifier(
+    encoder=_encode_stress_texts if rag_engine.embedding_model is not None else None
+)
+# Bulk check-ins feed the same department and anomaly state as single ones
+bulk_ingestor = BulkIngestor(
+    crisis_detector,
+    stress_analyzer,
+    aggregator=department_aggregator,
+    anomaly_detector=anomaly_detector
+)
+
 app = FastAPI(
     title="EngCare - AI Wellness Platform",
     description="Production-ready AI system with LLM + RAG + Evaluation",
     version="1.0.0"
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Per-route latency histogram and in-flight gauge"""
+    start = time.perf_counter()
+    # Unmatched paths (scanners, typos) share one label so they can't grow the label set
+    route = UNMATCHED_ROUTE
+    REQUESTS_IN_FLIGHT.inc()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label with the route template so path parameters don't explode cardinality
+        matched = request.scope.get("route")
+        if matched is not None:
+            route = matched.path
+        REQUESTS_IN_FLIGHT.dec()
+        method = request.method if request.method in HTTP_METHODS else "OTHER"
+        REQUEST_LATENCY.observe(time.perf_counter() - start, method=method,
+                                route=route, status=str(status))
+
+# Outermost, so a profile covers the whole request; a no-op unless switched on
+app.add_middleware(ProfilingMiddleware, profiler=request_profiler)
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API disabled; set ENGCARE_ADMIN_TOKEN")
+    if not hmac.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.on_event("startup")
+async def start_resource_watcher():
+    # Runs in every worker, so a file change (or an admin edit, which writes
+    # the file) reaches all of them; with several workers that is the only
+    # way an edit made through one worker reaches the others
+    if WATCH_RESOURCES or shared_state.enabled():
+        rag_engine.watch(RESOURCES_PATH)
+
+class ResourceUpsertRequest(BaseModel):
+    category: str
+    resources: List[Dict[str, Any]]
+
+class ResourceDeleteRequest(BaseModel):
+    resource_ids: List[str]
+
 class StressAnalysisRequest(BaseModel):
     stress_level: int
     work_hours: int
     breaks_taken: int
     productivity: int
     situation: Optional[str] = None
+    user_id: Optional[str] = None
+    tenant_id: Optional[str] = None
+    department: Optional[str] = None
+
+class CompanyAdviceRequest(BaseModel):
+    department_data: Dict[str, Any]
+
+class ScenarioRequest(BaseModel):
+    stress_deltas: List[float] = Field(min_length=1, max_length=MAX_SCENARIO_DELTAS)
+    attrition_deltas: List[float] = Field(min_length=1, max_length=MAX_SCENARIO_DELTAS)
+    team_size_deltas: List[int] = Field(default=[0], min_length=1, max_length=MAX_SCENARIO_DELTAS)
+    departments: Optional[List[Dict[str, Any]]] = Field(default=None, max_length=1000)
+    include_cube: bool = False
+
+class TextStressRequest(BaseModel):
+    texts: List[str] = Field(min_length=1, max_length=10000)
+
+class ProfilingConfigRequest(BaseModel):
+    enabled: Optional[bool] = None
+    sample_rate: Optional[float] = Field(default=None, ge=0.0, le=1.0)
+    interval_ms: Optional[float] = Field(default=None, gt=0.0)
+    torch_ops: Optional[bool] = None
+
+class LiveCheckinRequest(BaseModel):
+    stress_level: float = Field(ge=0.0, le=1.0)
+    burnout_risk: Optional[float] = Field(default=None, ge=0.0, le=1.0)
 
 @app.get("/")
 async def root():
@@ -41,42 +183,256 @@ async def get_wellness_advice(request: StressAnalysisRequest):
     Code Proof: Uses LLM to generate + RAG to ground responses
     """
     try:
+        start = time.perf_counter()
         logger.info(f"📥 Request: stress={request.stress_level}, hours={request.work_hours}")
         
-        # 1. Generate using LLM
-        advice = llm_engine.generate_wellness_advice(
-            request.stress_level,
-            request.work_hours,
-            request.breaks_taken,
-            request.productivity
+        # A bad tenant id gets its 404 before any generation
+        if request.tenant_id:
+            tenant_indexes.check(request.tenant_id)
+        
+        situation = request.situation or DEFAULT_SITUATION.format(stress_level=request.stress_level)
+        priority = priority_classifier.classify(
+            request.stress_level, request.work_hours, request.breaks_taken, request.productivity
         )
+        crisis = priority == CRISIS
         
-        # 2. Retrieve grounded resources using RAG
-        situation = request.situation or f"Stress level {request.stress_level}"
-        resources = rag_engine.retrieve_resources(situation, top_k=3)
+        with slo_controller.request(budget=CRISIS_BUDGET_SECONDS if crisis else None, critical=crisis) as slot:
+            # 1. Generate using LLM, within the latency budget and ahead of
+            #    less urgent requests; under overload serve rule-based advice
+            if slot.use_llm:
+                with QUEUE_DEPTH.track(queue="llm"):
+                    # Requests queued together at this priority share one decoding pass
+                    advice = await inference_scheduler.run_batched(
+                        priority,
+                        llm_engine.generate_wellness_advice_batch,
+                        {
+                            "stress_level": request.stress_level,
+                            "work_hours": request.work_hours,
+                            "breaks_taken": request.breaks_taken,
+                            "productivity": request.productivity
+                        },
+                        deadline=slot.deadline
+                    )
+                if slot.deadline_exceeded():
+                    slot.outcome = "truncated"
+            else:
+                advice = llm_engine.fallback_advice(request.stress_level)
+            
+            # 2. Retrieve grounded resources using RAG (keyword matching when shedding)
+            with QUEUE_DEPTH.track(queue="rag"):
+                if request.tenant_id:
+                    resources = await run_in_threadpool(tenant_indexes.retrieve, request.tenant_id, situation,
+                                                        3, slot.use_llm)
+                elif slot.use_llm:
+                    resources = await rag_engine.retrieve_resources_async(situation, top_k=3)
+                else:
+                    resources = rag_engine.retrieve_resources(situation, top_k=3, use_embeddings=False)
         
+        inference_scheduler.observe(priority, time.perf_counter() - start)
         logger.info(f"✅ Generated advice + {len(resources)} resources")
         
+        # 3. Push the new stress reading to the user's live dashboard
+        if request.user_id:
+            live_broker.publish(request.user_id, request.stress_level / 10)
+        
+        # 4. Fold it into the department's running stats for the HR dashboard
+        if request.user_id and request.department:
+            department_aggregator.record_checkin(request.department, request.user_id, request.stress_level)
+        
+        # 5. Flag sudden changes against this user's own baseline
+        anomalies = []
+        if request.user_id:
+            # Off the event loop: a bulk ingest may hold the detector lock for a chunk
+            anomalies = await run_in_threadpool(anomaly_detector.observe, request.user_id, {
+                "stress_level": request.stress_level,
+                "work_hours": request.work_hours,
+                "productivity": request.productivity
+            })
+            if anomalies:
+                logger.warning(f"⚠️ {len(anomalies)} check-in anomalies for {request.user_id}")
+        
         return {
             "status": "success",
             "advice": advice,
             "resources": resources,
             "metadata": {
-                "model": "DialoGPT-Medium",
+                "model": "DialoGPT-Medium" if slot.use_llm else "rule-based",
                 "rag_enabled": True,
+                "degraded": slot.outcome != "llm",
+                "priority": PRIORITY_NAMES[priority],
+                "anomalies": anomalies,
                 "timestamp": datetime.now().isoformat()
             }
         }
     
+    except UnknownTenantError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"❌ Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/live/{user_id}")
+async def live_updates(user_id: str):
+    """Server-Sent Events stream of stress and burnout-risk changes"""
+    return StreamingResponse(
+        live_broker.stream(user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/live/{user_id}/checkin")
+async def live_checkin(user_id: str, request: LiveCheckinRequest):
+    """Publish a stress reading to every dashboard the user has open"""
+    return live_broker.publish(user_id, request.stress_level, request.burnout_risk)
+
+@app.get("/slo")
+async def slo_status():
+    """Latency SLO breaker state and how often advice was degraded"""
+    return slo_controller.stats()
+
+@app.get("/scheduler")
+async def scheduler_status():
+    """Queued requests and recent latency per priority level"""
+    return inference_scheduler.stats()
+
+@app.get("/admin/resources", dependencies=[Depends(require_admin)])
+async def resource_index_status():
+    """Current resource index version and size"""
+    return rag_engine.index_stats()
+
+@app.put("/admin/resources", dependencies=[Depends(require_admin)])
+async def upsert_resources(request: ResourceUpsertRequest):
+    """Add or replace resources by resource_id / tool_id (re-encodes only those)"""
+    try:
+        items = [(request.category, r) for r in request.resources]
+        return await run_in_threadpool(rag_engine.upsert_resources, items)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/admin/resources/delete", dependencies=[Depends(require_admin)])
+async def delete_resources(request: ResourceDeleteRequest):
+    """Remove resources by id"""
+    return await run_in_threadpool(rag_engine.delete_resources, request.resource_ids)
+
+@app.post("/admin/resources/reload", dependencies=[Depends(require_admin)])
+async def reload_resources():
+    """Apply changes made to the resources file on disk"""
+    return await run_in_threadpool(rag_engine.reload_from_file, RESOURCES_PATH)
+
+@app.post("/tenants/{tenant_id}/company-advice")
+async def tenant_company_advice(tenant_id: str, request: CompanyAdviceRequest):
+    """Company recommendations using the tenant's own policies and department advice"""
+    try:
+        return await run_in_threadpool(tenant_indexes.company_recommendations, tenant_id, request.department_data)
+    except UnknownTenantError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.get("/company/departments")
+async def department_overview():
+    """Running metrics and advice for every department that has check-ins"""
+    return {
+        "departments": [
+            {**metrics, "advice": department_aggregator.recommendations(metrics["department"])}
+            for metrics in department_aggregator.snapshot()
+        ],
+        "stats": department_aggregator.stats()
+    }
+
+@app.get("/company/departments/{department}")
+async def department_advice(department: str):
+    """Company recommendations for one department from its running check-in stats"""
+    advice = department_aggregator.recommendations(department)
+    if advice is None:
+        raise HTTPException(status_code=404, detail=f"No check-ins for department '{department}'")
+    return advice
+
+@app.post("/company/scenarios")
+async def company_scenarios(request: ScenarioRequest):
+    """
+    What-if wellness scores and urgency for every department under every
+    combination of stress, attrition and team-size changes
+    """
+    departments = request.departments or department_aggregator.snapshot()
+    if not departments:
+        raise HTTPException(status_code=400, detail="No departments given and no check-ins recorded")
+    
+    cells = scenario_cells(len(departments), len(request.stress_deltas), len(request.attrition_deltas),
+                           len(request.team_size_deltas))
+    if request.include_cube and cells > MAX_CUBE_CELLS:
+        raise HTTPException(status_code=400, detail=f"include_cube is limited to {MAX_CUBE_CELLS:,} scenarios, "
+                                                    f"{cells:,} requested; use the summary or fewer deltas")
+    try:
+        cube = await run_in_threadpool(evaluate_scenarios, departments, request.stress_deltas,
+                                       request.attrition_deltas, request.team_size_deltas)
+    except ScenarioTooLarge as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response = {"cells": cube.cells, "shape": cube.shape, "summary": cube.summary()}
+    if request.include_cube:
+        response["cube"] = cube.to_dict()
+    return response
+
+@app.post("/stress/text")
+async def text_stress(request: TextStressRequest):
+    """Stress level for each chat or journal text, scored in one batch"""
+    if text_stress_classifier is None:
+        raise HTTPException(status_code=503, detail="Text stress classifier unavailable")
+    start = time.perf_counter()
+    results = await run_in_threadpool(text_stress_classifier.analyze_batch, request.texts)
+    return {
+        "results": results,
+        "head": text_stress_classifier.head,
+        "latency_ms": (time.perf_counter() - start) * 1000
+    }
+
+@app.post("/checkins/bulk")
+async def bulk_checkins(request: Request, include_results: bool = False):
+    """
+    Ingest thousands of check-ins in one body: NDJSON (application/x-ndjson),
+    Arrow IPC (application/vnd.apache.arrow.stream) or Parquet
+    (application/vnd.apache.parquet), with the /wellness-advice numeric
+    fields plus optional user_id, department and meeting_count columns
+    """
+    try:
+        fmt = detect_format(request.headers.get("content-type"))
+    except BulkFormatError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    if int(request.headers.get("content-length") or 0) > MAX_BODY_BYTES:
+        raise HTTPException(status_code=413, detail=f"Bulk bodies are limited to {MAX_BODY_BYTES} bytes")
+    
+    body = await request.body()
+    if len(body) > MAX_BODY_BYTES:
+        raise HTTPException(status_code=413, detail=f"Bulk bodies are limited to {MAX_BODY_BYTES} bytes")
+    try:
+        return await run_in_threadpool(bulk_ingestor.ingest, body, fmt, include_results)
+    except BulkFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/admin/profiling", dependencies=[Depends(require_admin)])
+async def profiling_status():
+    """Profiler settings and the most recent profiles written"""
+    return request_profiler.status()
+
+@app.put("/admin/profiling", dependencies=[Depends(require_admin)])
+async def configure_profiling(request: ProfilingConfigRequest):
+    """Switch request profiling on or off and change sampling at runtime"""
+    return await run_in_threadpool(request_profiler.configure, request.enabled, request.sample_rate,
+                                   request.interval_ms, request.torch_ops)
+
+@app.get("/admin/tenants", dependencies=[Depends(require_admin)])
+async def tenant_index_stats():
+    """Loaded tenant indexes, memory use and eviction counts"""
+    return tenant_indexes.stats()
+
 @app.get("/metrics")
 async def get_metrics():
+    """Prometheus text-format metrics for latency, caches, queues and model loads"""
+    return Response(content=registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.get("/evaluation")
+async def get_evaluation():
     """
     Resume Claim: "F1 Score 0.87 on wellness plan generation"
-    Code Proof: /metrics endpoint returns evaluation scores
+    Code Proof: /evaluation endpoint returns evaluation scores
     """
     test_cases = [
         {'stress_level': 9, 'description': 'Extreme'},
@@ -111,6 +467,7 @@ async def health_check():
     return {
         "status": "🟢 healthy",
         "llm": "DialoGPT-Medium",
+        "speculative_decoding": llm_engine.speculative_stats(),
         "rag": "active",
         "timestamp": datetime.now().isoformat()
     }
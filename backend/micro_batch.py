@@ -0,0 +1,87 @@
+"""
+Micro-batching of concurrent async calls
+
+Callers await `submit(item)`; items arriving within a short window are handed
+to `batch_fn(items)` together on a worker thread, and each caller gets its own
+slot of the returned list. While a batch is running, new items keep
+collecting and go out as the next batch as soon as it finishes, so batches
+grow with load instead of queueing one call per request.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+from telemetry import registry
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = registry.histogram(
+    "engcare_micro_batch_size",
+    "Items per micro-batch",
+    ["batcher"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+
+class MicroBatcher:
+    """Coalesce concurrent awaits into one batched call on a worker thread"""
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], window_ms: float = 5.0,
+                 max_batch: int = 32, name: str = "batch"):
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.name = name
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running = False
+        # Created on first use so forked workers each get their own thread
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._dispatch(loop)
+        elif self._timer is None and not self._running:
+            self._timer = loop.call_later(self.window, self._dispatch, loop)
+        return await future
+
+    def _dispatch(self, loop: asyncio.AbstractEventLoop):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._running or not self._pending:
+            # The running batch picks these up when it completes
+            return
+
+        batch = self._pending[:self.max_batch]
+        self._pending = self._pending[self.max_batch:]
+        self._running = True
+        BATCH_SIZE.observe(len(batch), batcher=self.name)
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{self.name}-batch")
+        task = loop.run_in_executor(self._executor, self.batch_fn, [item for item, _ in batch])
+        task.add_done_callback(lambda done: self._deliver(loop, batch, done))
+
+    def _deliver(self, loop: asyncio.AbstractEventLoop, batch, done: asyncio.Future):
+        self._running = False
+        error = done.exception()
+        if error is not None:
+            logger.error(f"❌ {self.name} batch of {len(batch)} failed: {error}")
+        else:
+            results = done.result()
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(results[index])
+
+        if self._pending:
+            self._dispatch(loop)
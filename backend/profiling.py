@@ -0,0 +1,399 @@
+"""
+On-demand request profiling
+
+While enabled, a sampled fraction of requests, plus any request whose
+X-EngCare-Profile header carries the admin token, is profiled end to end:
+
+  * a statistical stack sampler reads every thread's Python stack each
+    few milliseconds. /wellness-advice spreads its work over the event
+    loop, the inference scheduler workers (tokenization, generation) and
+    the RAG micro-batch thread (encoding, similarity), and cProfile only
+    sees the thread that enabled it. Stacks are written in the collapsed
+    format flamegraph.pl, speedscope and inferno read, rooted at the
+    thread name.
+  * the torch profiler records op-level CPU time for every thread and
+    writes the top ops as a table.
+
+One request is profiled at a time, since both profilers see the whole
+process; others that arrive meanwhile run normally. A profile stops after
+PROFILE_MAX_SECONDS even if the response is still streaming, and
+Server-Sent Event streams are not profiled at all. When disabled the
+middleware costs one attribute check per request. The settings live in
+shared memory allocated at import, so with pre-fork workers an admin call
+to any worker switches all of them; recent profiles are listed per worker.
+"""
+import asyncio
+import ctypes
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from multiprocessing.sharedctypes import RawValue
+from typing import Dict, Any, List, Optional
+
+from telemetry import registry
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENABLED = os.environ.get("ENGCARE_PROFILE", "0") == "1"
+PROFILE_DIR = os.environ.get("ENGCARE_PROFILE_DIR", "data/profiles")
+PROFILE_SAMPLE_RATE = float(os.environ.get("ENGCARE_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL = float(os.environ.get("ENGCARE_PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_TORCH = os.environ.get("ENGCARE_PROFILE_TORCH", "1") == "1"
+# Profiles kept on disk by this process; older ones are deleted
+PROFILE_KEEP = int(os.environ.get("ENGCARE_PROFILE_KEEP", "50"))
+# Longest a profile runs; a slow or streaming response carries on unprofiled
+PROFILE_MAX_SECONDS = float(os.environ.get("ENGCARE_PROFILE_MAX_SECONDS", "30"))
+# The header value must equal this token; without one the header is ignored
+PROFILE_TOKEN = os.environ.get("ENGCARE_ADMIN_TOKEN", "")
+PROFILE_HEADER = b"x-engcare-profile"
+PROFILE_ID_HEADER = b"x-engcare-profile-id"
+TORCH_TOP_OPS = 30
+# Ops listed in the admin status; the full table is in the .torch.txt file
+TORCH_SUMMARY_OPS = 5
+
+# (file, function) of leaf frames that mean a thread is parked, not working
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+PROFILES_CAPTURED = registry.counter(
+    "engcare_profiles_captured_total",
+    "Requests profiled, by trigger",
+    ["trigger"]
+)
+
+
+class StackSampler:
+    """Counts collapsed Python stacks of every other thread at a fixed interval"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._labels: Dict[Any, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="engcare-profiler", daemon=True)
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            path = code.co_filename.replace(os.sep, "/").rsplit("/", 2)
+            label = f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})".replace(";", ":")
+            self._labels[code] = label
+        return label
+
+    def sample(self):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            code = frame.f_code
+            if (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}").replace(";", ":"))
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """One `root;...;leaf count` line per distinct stack"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _torch_profiler():
+    """A CPU torch profiler that records ops on all threads, or None without torch"""
+    try:
+        from torch.profiler import profile, ProfilerActivity
+    except ImportError:
+        return None
+    try:
+        # Private config; without it only ops on the starting thread are seen
+        from torch._C._profiler import _ExperimentalConfig
+        return profile(activities=[ProfilerActivity.CPU],
+                       experimental_config=_ExperimentalConfig(profile_all_threads=True))
+    except (ImportError, TypeError):
+        return profile(activities=[ProfilerActivity.CPU])
+
+
+class ProfileSettings(ctypes.Structure):
+    """Runtime settings, in memory that forked workers share with the master"""
+    _fields_ = [
+        ("enabled", ctypes.c_bool),
+        ("sample_rate", ctypes.c_double),
+        ("interval", ctypes.c_double),
+        ("torch_ops", ctypes.c_bool),
+    ]
+
+
+def _shared_setting(name: str) -> property:
+    return property(lambda self: getattr(self._settings, name),
+                    lambda self, value: setattr(self._settings, name, value))
+
+
+@dataclass
+class ProfileRun:
+    profile_id: str
+    method: str
+    path: str
+    trigger: str
+    sampler: StackSampler
+    torch_profile: Any = None
+    start: float = field(default_factory=time.perf_counter)
+    status: Optional[int] = None
+    truncated: bool = False
+
+
+class RequestProfiler:
+    """Runtime-switchable profiling of sampled or flagged requests"""
+
+    enabled = _shared_setting("enabled")
+    sample_rate = _shared_setting("sample_rate")
+    interval = _shared_setting("interval")
+    torch_ops = _shared_setting("torch_ops")
+
+    def __init__(self, directory: str = PROFILE_DIR, enabled: bool = PROFILE_ENABLED,
+                 sample_rate: float = PROFILE_SAMPLE_RATE, interval: float = PROFILE_INTERVAL,
+                 torch_ops: bool = PROFILE_TORCH, keep: int = PROFILE_KEEP, token: str = PROFILE_TOKEN,
+                 max_seconds: float = PROFILE_MAX_SECONDS):
+        self.directory = directory
+        self._settings = RawValue(ProfileSettings)
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.torch_ops = torch_ops
+        self.keep = keep
+        self.max_seconds = max_seconds
+        self._token = token.encode()
+        self._active = threading.Lock()
+        self._seq = 0
+        self._recent: deque = deque()
+        self._torch_ready = False
+        self.skipped_busy = 0
+
+    def configure(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None,
+                  interval_ms: Optional[float] = None, torch_ops: Optional[bool] = None) -> Dict[str, Any]:
+        """Change settings at runtime; unset arguments keep their value (blocking, run off the event loop)"""
+        if sample_rate is not None:
+            if not 0.0 <= sample_rate <= 1.0:
+                raise ValueError("sample_rate must be between 0 and 1")
+            self.sample_rate = sample_rate
+        if interval_ms is not None:
+            if interval_ms <= 0:
+                raise ValueError("interval_ms must be positive")
+            self.interval = interval_ms / 1000
+        if torch_ops is not None:
+            self.torch_ops = torch_ops
+        if enabled and self.torch_ops:
+            self._warm_up_torch()
+        if enabled is not None and enabled != self.enabled:
+            self.enabled = enabled
+            logger.info(f"🔁 Request profiling {'enabled' if enabled else 'disabled'} "
+                        f"(sample rate {self.sample_rate}, torch ops {'on' if self.torch_ops else 'off'})")
+        return self.status()
+
+    def _warm_up_torch(self):
+        """The first torch profile in a process pays about a second of start-up; keep it out of profiles"""
+        if not self._torch_ready:
+            warm_up = _torch_profiler()
+            if warm_up is not None:
+                with warm_up:
+                    pass
+            self._torch_ready = True
+
+    def authorized(self, value: bytes) -> bool:
+        """Whether a profile header value carries the token (a profile stalls the process for seconds)"""
+        return bool(self._token) and hmac.compare_digest(value, self._token)
+
+    def start(self, method: str, path: str, flagged: bool) -> Optional[ProfileRun]:
+        """Begin profiling a request if it is flagged or sampled and no other profile is running"""
+        if not flagged and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            return None
+        if not self._active.acquire(blocking=False):
+            self.skipped_busy += 1
+            return None
+        try:
+            self._seq += 1
+            profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._seq}"
+            run = ProfileRun(profile_id, method, path, "header" if flagged else "sampled",
+                             StackSampler(self.interval))
+            if self.torch_ops:
+                # Workers that did not serve the admin call warm up on their first profile
+                self._warm_up_torch()
+                run.torch_profile = _torch_profiler()
+                if run.torch_profile is not None:
+                    run.torch_profile.__enter__()
+            run.sampler.start()
+            run.start = time.perf_counter()
+            return run
+        except Exception:
+            self._active.release()
+            raise
+
+    def finish(self, run: ProfileRun) -> Dict[str, Any]:
+        """Stop the profilers and write the profile files (blocking; any thread)"""
+        try:
+            duration = time.perf_counter() - run.start
+            run.sampler.stop()
+            torch_table, torch_ops = None, []
+            if run.torch_profile is not None:
+                run.torch_profile.__exit__(None, None, None)
+                averages = run.torch_profile.key_averages()
+                torch_table = averages.table(sort_by="self_cpu_time_total", row_limit=TORCH_TOP_OPS)
+                ops = sorted(averages, key=lambda e: e.self_cpu_time_total, reverse=True)[:TORCH_SUMMARY_OPS]
+                torch_ops = [{"op": e.key, "calls": e.count, "self_cpu_ms": e.self_cpu_time_total / 1000,
+                              "cpu_total_ms": e.cpu_time_total / 1000} for e in ops]
+
+            os.makedirs(self.directory, exist_ok=True)
+            base = os.path.join(self.directory, run.profile_id)
+            files = [base + ".collapsed"]
+            with open(files[0], "w") as f:
+                f.write(run.sampler.collapsed())
+            if torch_table is not None:
+                files.append(base + ".torch.txt")
+                with open(files[-1], "w") as f:
+                    f.write(torch_table)
+
+            summary = {
+                "profile_id": run.profile_id,
+                "method": run.method,
+                "path": run.path,
+                "status": run.status,
+                "trigger": run.trigger,
+                "duration_ms": duration * 1000,
+                "truncated": run.truncated,
+                "samples": run.sampler.samples,
+                "interval_ms": run.sampler.interval * 1000,
+                "torch_ops": torch_ops,
+                "files": files,
+            }
+            self._recent.append(summary)
+            while len(self._recent) > self.keep:
+                self._discard(self._recent.popleft())
+            PROFILES_CAPTURED.inc(trigger=run.trigger)
+            logger.info(f"✅ Profiled {run.method} {run.path} in {duration * 1000:.0f} ms -> {base}.*")
+            return summary
+        finally:
+            self._active.release()
+
+    def cancel(self, run: ProfileRun):
+        """Stop the profilers without writing anything (blocking; any thread)"""
+        try:
+            run.sampler.stop()
+            if run.torch_profile is not None:
+                run.torch_profile.__exit__(None, None, None)
+        finally:
+            self._active.release()
+
+    @staticmethod
+    def _discard(summary: Dict[str, Any]):
+        for path in summary["files"]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Newest profiles first"""
+        return list(self._recent)[::-1][:limit]
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "interval_ms": self.interval * 1000,
+            "torch_ops": self.torch_ops,
+            "directory": os.path.abspath(self.directory),
+            "pid": os.getpid(),
+            "header": PROFILE_HEADER.decode(),
+            "profiling_now": self._active.locked(),
+            "skipped_busy": self.skipped_busy,
+            "recent": self.recent(),
+        }
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests chosen by a RequestProfiler
+
+    Plain ASGI rather than @app.middleware so the disabled path adds no
+    extra task or response wrapping.
+    """
+
+    def __init__(self, app, profiler: Optional[RequestProfiler] = None):
+        self.app = app
+        self.profiler = profiler or request_profiler
+
+    async def __call__(self, scope, receive, send):
+        profiler = self.profiler
+        if not profiler.enabled or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        flagged = any(name == PROFILE_HEADER and profiler.authorized(value)
+                      for name, value in scope.get("headers", ()))
+        run = profiler.start(scope["method"], scope["path"], flagged)
+        if run is None:
+            return await self.app(scope, receive, send)
+
+        loop = asyncio.get_running_loop()
+        closing = None
+
+        def close(stop):
+            # First caller wins: the end of the request, the time limit or an event stream
+            nonlocal closing
+            if closing is None:
+                # Aggregating torch events takes seconds for a full generation; keep it off the event loop
+                closing = loop.run_in_executor(None, stop, run)
+            return closing
+
+        def time_limit():
+            if closing is None:
+                run.truncated = True
+                close(profiler.finish)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                run.status = message["status"]
+                headers = message.get("headers", ())
+                if any(name == b"content-type" and value.startswith(b"text/event-stream") for name, value in headers):
+                    # Open for as long as the client listens; nothing useful to profile
+                    close(profiler.cancel)
+                else:
+                    message["headers"] = [*headers, (PROFILE_ID_HEADER, run.profile_id.encode())]
+            await send(message)
+
+        timer = loop.call_later(profiler.max_seconds, time_limit)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            timer.cancel()
+            try:
+                await close(profiler.finish)
+            except Exception as e:
+                logger.error(f"❌ Writing profile {run.profile_id} failed: {e}")
+
+# Global instance
+request_profiler = RequestProfiler()
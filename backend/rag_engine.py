@@ -1,9 +1,18 @@
 
+import hashlib
 import json
 import logging
-from typing import List, Dict
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from telemetry import MODEL_LOAD_SECONDS, stage, record_cache
+from micro_batch import MicroBatcher
+from vector_store import VectorIndex
+from resource_index import (IndexSnapshot, ResourceWatcher, CATEGORIES, make_entry, flatten_resources,
+                            diff_resources, write_resources, resource_id)
 
 try:
     from sentence_transformers import SentenceTransformer
@@ -13,6 +22,36 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Query used when a request has no situation; only 11 distinct strings, so
+# their embeddings and rankings are computed once at startup
+DEFAULT_SITUATION = "Stress level {stress_level}"
+DEFAULT_STRESS_LEVELS = range(0, 11)
+PRECOMPUTED_TOP_K = 10
+QUERY_CACHE_SIZE = int(os.environ.get("ENGCARE_QUERY_CACHE_SIZE", "1024"))
+# Concurrent retrievals arriving within this window share one encode call
+BATCH_WINDOW_MS = float(os.environ.get("ENGCARE_RAG_BATCH_WINDOW_MS", "5"))
+MAX_BATCH_SIZE = int(os.environ.get("ENGCARE_RAG_MAX_BATCH", "32"))
+# Index storage: float32 (exact), int8 or binary; optional PCA dimensions
+VECTOR_MODE = os.environ.get("ENGCARE_VECTOR_MODE", "float32")
+VECTOR_DIMS = int(os.environ.get("ENGCARE_VECTOR_DIMS", "0")) or None
+# Binary mode: .npy file holding the float rescoring vectors, memory-mapped
+# instead of resident (unset keeps them in RAM)
+VECTOR_RESCORE_PATH = os.environ.get("ENGCARE_VECTOR_RESCORE_PATH") or None
+RESOURCES_PATH = os.environ.get("ENGCARE_RESOURCES_PATH", "data/wellness_resources.json")
+# Benchmarks and tests set this to inject their own encoder (use_encoder)
+SKIP_MODEL_LOAD = os.environ.get("ENGCARE_SKIP_MODEL_LOAD", "0") == "1"
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def query_key(query: str) -> str:
+    """Cache key for a query: hash of its normalized text"""
+    return hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()
+
+DEFAULT_QUERY_KEYS = frozenset(query_key(DEFAULT_SITUATION.format(stress_level=n)) for n in DEFAULT_STRESS_LEVELS)
+
 class RAGEngine:
     """
     RAG with Vector Search + FAISS
@@ -21,21 +60,54 @@ class RAGEngine:
     Code Proof: This file implements retrieval-augmented generation
     """
     
-    def __init__(self):
+    def __init__(self, embedding_model=None):
+        """
+        Args:
+            embedding_model: Encoder to use instead of loading MiniLM
+                (benchmarks pass an offline stand-in)
+        """
         self.resources = self._load_resources()
-        self.embeddings = None
-        self.resource_texts = []
+        self.embedding_model = embedding_model
+        self._default_vectors: Optional[np.ndarray] = None
+        
+        # Queries read self._snapshot once; writers build a new snapshot under
+        # the write lock and swap the reference
+        self._snapshot = IndexSnapshot(version=0, entries=flatten_resources(self.resources))
+        self._write_lock = threading.RLock()
         
-        if HAS_EMBEDDINGS:
+        # LRU of query embeddings for user-typed situations
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.batcher = MicroBatcher(self._retrieve_micro_batch, window_ms=BATCH_WINDOW_MS,
+                                    max_batch=MAX_BATCH_SIZE, name="rag")
+        
+        if (HAS_EMBEDDINGS and not SKIP_MODEL_LOAD) or embedding_model is not None:
             self._create_embeddings()
             logger.info("✅ RAG initialized with embeddings")
         else:
             logger.warning("⚠️ Embeddings not available, using keyword matching")
     
-    def _load_resources(self) -> Dict:
+    # Read-only views of the current snapshot
+    @property
+    def resource_texts(self) -> List[Dict]:
+        return self._snapshot.entries
+    
+    @property
+    def embeddings(self) -> Optional[np.ndarray]:
+        return self._snapshot.embeddings
+    
+    @property
+    def index(self) -> Optional[VectorIndex]:
+        return self._snapshot.index
+    
+    @property
+    def _precomputed(self) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        return self._snapshot.precomputed
+    
+    def _load_resources(self, path: str = RESOURCES_PATH) -> Dict:
         """Load wellness resources from JSON"""
         try:
-            with open('data/wellness_resources.json', 'r') as f:
+            with open(path, 'r') as f:
                 data = json.load(f)
             logger.info(f"✅ Loaded wellness resources")
             return data
@@ -48,73 +120,277 @@ class RAGEngine:
         try:
             logger.info("🔍 Creating vector embeddings...")
             
-            embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-            
-            resources_list = []
-            
-            # Emergency contacts
-            for contact in self.resources.get("emergency_contacts", []):
-                text = f"{contact.get('name', '')} - {contact.get('description', '')}"
-                resources_list.append({
-                    'text': text,
-                    'type': 'emergency',
-                    'data': contact
-                })
-            
-            # Self-help tools
-            for tool in self.resources.get("self_help_tools", []):
-                text = f"{tool.get('name', '')} - {tool.get('benefit', '')}"
-                resources_list.append({
-                    'text': text,
-                    'type': 'self_help',
-                    'data': tool
-                })
+            if self.embedding_model is None:
+                start = time.perf_counter()
+                self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+                MODEL_LOAD_SECONDS.set(time.perf_counter() - start, model="all-minilm-l6-v2")
             
-            if resources_list:
-                self.resource_texts = resources_list
-                texts = [r['text'] for r in resources_list]
+            entries = self._snapshot.entries
+            if entries:
+                texts = [r['text'] for r in entries]
                 
                 # Create vector embeddings
-                self.embeddings = embedding_model.encode(texts, convert_to_numpy=True)
+                start = time.perf_counter()
+                embeddings = self.embedding_model.encode(texts, convert_to_numpy=True)
+                MODEL_LOAD_SECONDS.set(time.perf_counter() - start, model="resource-index")
                 logger.info(f"✅ Created embeddings for {len(texts)} resources")
+                self._swap(entries, embeddings, self._fit_index(embeddings))
         
         except Exception as e:
             logger.warning(f"⚠️ Embedding creation failed: {e}")
     
-    def retrieve_resources(self, query: str, top_k: int = 3) -> List[Dict]:
+    def _fit_index(self, embeddings: np.ndarray) -> VectorIndex:
+        try:
+            return VectorIndex(mode=VECTOR_MODE, dims=VECTOR_DIMS, rescore_path=VECTOR_RESCORE_PATH).fit(embeddings)
+        except Exception as e:
+            logger.warning(f"⚠️ {VECTOR_MODE} index failed, using float32: {e}")
+            return VectorIndex().fit(embeddings)
+    
+    def _swap(self, entries: List[Dict], embeddings: Optional[np.ndarray], index: Optional[VectorIndex]):
+        """Publish a new snapshot (default rankings recomputed against the new index)"""
+        snapshot = IndexSnapshot(
+            version=self._snapshot.version + 1,
+            entries=entries,
+            embeddings=embeddings,
+            index=index,
+            precomputed=self._precompute_default_queries(index),
+        )
+        self._snapshot = snapshot
+        return snapshot
+    
+    def _precompute_default_queries(self, index: Optional[VectorIndex]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Rank every default situation string against `index`"""
+        if index is None or self.embedding_model is None:
+            return {}
+        try:
+            queries = [DEFAULT_SITUATION.format(stress_level=n) for n in DEFAULT_STRESS_LEVELS]
+            if self._default_vectors is None:
+                self._default_vectors = self.embedding_model.encode(queries, convert_to_numpy=True)
+            order, scores = index.search(self._default_vectors, PRECOMPUTED_TOP_K)
+            return {
+                query_key(q): (order[i], scores[i])
+                for i, q in enumerate(queries)
+            }
+        except Exception as e:
+            logger.warning(f"⚠️ Default query precompute failed: {e}")
+            return {}
+    
+    def build_index(self):
+        """Rebuild the vector index over every current entry (full re-encode)"""
+        with self._write_lock:
+            entries = self._snapshot.entries
+            embeddings = self.embedding_model.encode([r['text'] for r in entries], convert_to_numpy=True)
+            self._swap(entries, embeddings, self._fit_index(embeddings))
+    
+    def use_encoder(self, encoder):
+        """Switch to another encoder (e.g. an offline stand-in) and re-encode everything"""
+        with self._write_lock:
+            self.embedding_model = encoder
+            self._default_vectors = None
+            with self._cache_lock:
+                self._query_cache.clear()
+            self.build_index()
+    
+    def apply_changes(self, upserts: List[Tuple[str, Dict]], deletes: List[str]) -> Dict:
+        """
+        Add, update and delete resources without rebuilding the index
+        
+        Only upserts whose text changed are re-encoded (in one call); other
+        rows keep their vectors and codes. The new snapshot is swapped in
+        atomically, so concurrent queries see either the old or new version.
+        
+        Args:
+            upserts: (category, resource dict) pairs, keyed by resource_id / tool_id
+            deletes: Resource ids to remove
+        """
+        with self._write_lock:
+            snapshot = self._snapshot
+            new_entries = list({e['id']: e for e in (make_entry(c, d) for c, d in upserts)}.values())
+            replaced = {e['id'] for e in new_entries} | set(deletes)
+            keep = np.array([row for row, e in enumerate(snapshot.entries) if e['id'] not in replaced],
+                            dtype=np.int64)
+            entries = [snapshot.entries[row] for row in keep] + new_entries
+            
+            embeddings, index, encoded = snapshot.embeddings, snapshot.index, 0
+            if index is not None and self.embedding_model is not None:
+                vectors = np.empty((len(new_entries), snapshot.embeddings.shape[1]), dtype=np.float32)
+                to_encode = []
+                for i, entry in enumerate(new_entries):
+                    row = snapshot.rows.get(entry['id'])
+                    if row is not None and snapshot.entries[row]['text'] == entry['text']:
+                        vectors[i] = snapshot.embeddings[row]
+                    else:
+                        to_encode.append(i)
+                if to_encode:
+                    with stage("rag_index_update"):
+                        vectors[to_encode] = self.embedding_model.encode(
+                            [new_entries[i]['text'] for i in to_encode], convert_to_numpy=True
+                        )
+                encoded = len(to_encode)
+                embeddings = np.concatenate([snapshot.embeddings[keep], vectors])
+                index = index.updated(keep, vectors)
+            
+            deleted = len(set(deletes) & snapshot.rows.keys())
+            snapshot = self._swap(entries, embeddings, index)
+            logger.info(f"✅ Resource index v{snapshot.version}: {len(new_entries)} upserted, "
+                        f"{deleted} deleted, {encoded} re-encoded")
+            return {
+                "version": snapshot.version,
+                "resources": len(entries),
+                "upserted": len(new_entries),
+                "deleted": deleted,
+                "encoded": encoded,
+            }
+    
+    def upsert_resources(self, items: List[Tuple[str, Dict]], persist: bool = True) -> Dict:
+        """Add or replace resources, optionally writing them back to the JSON file"""
+        with self._write_lock:
+            stats = self.apply_changes(items, [])
+            for category, data in items:
+                rid = resource_id(category, data)
+                section = self.resources.setdefault(category, [])
+                section[:] = [r for r in section if resource_id(category, r) != rid] + [data]
+            if persist:
+                write_resources(RESOURCES_PATH, self.resources)
+            return stats
+    
+    def delete_resources(self, ids: List[str], persist: bool = True) -> Dict:
+        """Remove resources by id, optionally writing the change back to the JSON file"""
+        with self._write_lock:
+            stats = self.apply_changes([], ids)
+            for category in CATEGORIES:
+                section = self.resources.get(category, [])
+                section[:] = [r for r in section if resource_id(category, r) not in ids]
+            if persist:
+                write_resources(RESOURCES_PATH, self.resources)
+            return stats
+    
+    def reload_from_file(self, path: str = RESOURCES_PATH) -> Dict:
+        """Apply whatever changed in the resources file since the current snapshot"""
+        with open(path, 'r') as f:
+            resources = json.load(f)
+        with self._write_lock:
+            upserts, deletes = diff_resources(self._snapshot, resources)
+            self.resources = resources
+            if not upserts and not deletes:
+                return {"version": self._snapshot.version, "resources": len(self._snapshot.entries),
+                        "upserted": 0, "deleted": 0, "encoded": 0}
+            return self.apply_changes(upserts, deletes)
+    
+    def watch(self, path: str = RESOURCES_PATH, interval: float = 2.0) -> ResourceWatcher:
+        """Start a background watcher that hot-reloads the resources file"""
+        watcher = ResourceWatcher(self, path, interval)
+        watcher.start()
+        return watcher
+    
+    def index_stats(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version,
+            "resources": len(snapshot.entries),
+            "vector_mode": snapshot.index.mode if snapshot.index is not None else None,
+            "memory_bytes": snapshot.index.memory_bytes() if snapshot.index is not None else None,
+        }
+    
+    def _encode_queries(self, queries: List[str], keys: List[str]) -> np.ndarray:
+        """
+        Query embeddings, from the LRU cache when a text was seen before
+        
+        Texts not in the cache are encoded together in a single call.
+        """
+        vectors: List[Optional[np.ndarray]] = []
+        with self._cache_lock:
+            for key in keys:
+                vector = self._query_cache.get(key)
+                if vector is not None:
+                    self._query_cache.move_to_end(key)
+                vectors.append(vector)
+        for vector in vectors:
+            record_cache("rag_query_embedding", vector is not None)
+        
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            with stage("rag_encode"):
+                encoded = self.embedding_model.encode([queries[i] for i in missing], convert_to_numpy=True)
+            with self._cache_lock:
+                for i, vector in zip(missing, encoded):
+                    vectors[i] = vector
+                    self._query_cache[keys[i]] = vector
+                while len(self._query_cache) > QUERY_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+        return np.stack(vectors)
+    
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Embeddings for raw query texts, through the shared query cache"""
+        return self._encode_queries(queries, [query_key(q) for q in queries])
+    
+    def _format_results(self, snapshot: IndexSnapshot, indices, scores) -> List[Dict]:
+        results = []
+        for idx, score in zip(indices, scores):
+            if score > 0.3:
+                results.append({
+                    'resource': snapshot.entries[idx]['data'],
+                    'type': snapshot.entries[idx]['type'],
+                    'relevance_score': float(score)
+                })
+        return results
+    
+    def retrieve_batch(self, queries: List[str], top_k: int = 3) -> List[List[Dict]]:
+        """
+        Retrieve resources for several queries with one encode and one matrix product
+        
+        Returns:
+            One result list per query, in order
+        """
+        snapshot = self._snapshot
+        if snapshot.index is None or self.embedding_model is None or not snapshot.entries:
+            logger.warning("⚠️ No embeddings available, using keyword matching")
+            return [self._keyword_retrieve(q, top_k, snapshot) for q in queries]
+        
+        keys = [query_key(q) for q in queries]
+        ranked: List[Optional[Tuple[np.ndarray, np.ndarray]]] = []
+        for key in keys:
+            hit = snapshot.precomputed.get(key)
+            usable = hit is not None and top_k <= len(hit[0])
+            if key in DEFAULT_QUERY_KEYS:
+                # A miss: the precompute failed or top_k is beyond PRECOMPUTED_TOP_K
+                record_cache("rag_default_query", usable)
+            if usable:
+                # Default situation: ranking was computed at startup
+                ranked.append((hit[0][:top_k], hit[1][:top_k]))
+            else:
+                ranked.append(None)
+        
+        pending = [i for i, r in enumerate(ranked) if r is None]
+        if pending:
+            query_embeddings = self._encode_queries([queries[i] for i in pending], [keys[i] for i in pending])
+            
+            with stage("rag_search"):
+                # Cosine similarity (FAISS algorithm) and top-k for the whole batch
+                top, top_scores = snapshot.index.search(query_embeddings, top_k)
+            
+            for row, i in enumerate(pending):
+                ranked[i] = (top[row], top_scores[row])
+        
+        return [self._format_results(snapshot, indices, scores) for indices, scores in ranked]
+    
+    def retrieve_resources(self, query: str, top_k: int = 3, use_embeddings: bool = True) -> List[Dict]:
         """
         Retrieve resources using FAISS-equivalent vector search
         
         Resume Claim: "FAISS vector search for resource retrieval"
         Code Proof: Uses cosine similarity (FAISS-equivalent)
+        
+        Args:
+            use_embeddings: False skips the encoder and uses keyword matching
+                (load shedding)
         """
         
-        if not self.embeddings or not self.resource_texts:
-            logger.warning("⚠️ No embeddings available, using keyword matching")
+        if not use_embeddings:
             return self._keyword_retrieve(query, top_k)
         
         try:
-            from sentence_transformers import SentenceTransformer
-            model = SentenceTransformer('all-MiniLM-L6-v2')
-            
-            # Encode query
-            query_embedding = model.encode(query, convert_to_numpy=True)
-            
-            # Calculate cosine similarity (FAISS algorithm)
-            similarities = cosine_similarity([query_embedding], self.embeddings)[0]
-            
-            # Get top-k
-            top_indices = np.argsort(similarities)[::-1][:top_k]
-            
-            results = []
-            for idx in top_indices:
-                if similarities[idx] > 0.3:
-                    results.append({
-                        'resource': self.resource_texts[idx]['data'],
-                        'type': self.resource_texts[idx]['type'],
-                        'relevance_score': float(similarities[idx])
-                    })
-            
+            results = self.retrieve_batch([query], top_k)[0]
             logger.info(f"✅ Retrieved {len(results)} resources (FAISS search)")
             return results
         
@@ -122,20 +398,34 @@ class RAGEngine:
             logger.error(f"❌ FAISS retrieval failed: {e}")
             return self._keyword_retrieve(query, top_k)
     
-    def _keyword_retrieve(self, query: str, top_k: int = 3) -> List[Dict]:
-        """Fallback keyword-based retrieval"""
-        query_words = set(query.lower().split())
-        scores = []
+    async def retrieve_resources_async(self, query: str, top_k: int = 3) -> List[Dict]:
+        """
+        Retrieve from async code, batching with other concurrent queries
         
-        for resource in self.resource_texts:
-            text_words = set(resource['text'].lower().split())
-            overlap = len(query_words & text_words)
-            score = overlap / max(len(query_words), len(text_words), 1)
-            scores.append((score, resource))
+        Default situations are answered immediately from the precomputed
+        rankings; everything else waits at most one batching window.
+        """
+        if query_key(query) in self._precomputed or self.index is None:
+            return self.retrieve_resources(query, top_k)
         
-        scores.sort(reverse=True)
-        return [{'resource': r['data'], 'type': r['type'], 'relevance_score': s} 
-                for s, r in scores[:top_k] if s > 0.1]
+        try:
+            return await self.batcher.submit((query, top_k))
+        except Exception as e:
+            logger.error(f"❌ Batched retrieval failed: {e}")
+            return self._keyword_retrieve(query, top_k)
+    
+    def _retrieve_micro_batch(self, items: List[Tuple[str, int]]) -> List[List[Dict]]:
+        top_k = max(k for _, k in items)
+        results = self.retrieve_batch([q for q, _ in items], top_k)
+        return [r[:k] for r, (_, k) in zip(results, items)]
+    
+    def _keyword_retrieve(self, query: str, top_k: int = 3,
+                          snapshot: Optional[IndexSnapshot] = None) -> List[Dict]:
+        """Fallback keyword-based retrieval (inverted index over resource texts)"""
+        snapshot = snapshot or self._snapshot
+        entries = snapshot.entries
+        return [{'resource': entries[row]['data'], 'type': entries[row]['type'], 'relevance_score': s}
+                for s, row in snapshot.lexical.search(query, top_k) if s > 0.1]
 
 # Global instance
 rag_engine = RAGEngine()
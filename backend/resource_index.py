@@ -0,0 +1,174 @@
+"""
+Snapshots of the wellness resource index, and hot reload
+
+An IndexSnapshot bundles everything a query reads: the flattened resource
+entries, their embeddings, the vector index, the lexical (keyword) index and
+the precomputed default-query rankings. Snapshots are never modified; writers
+build the next one from the current one and swap the reference
+(read-copy-update), so queries in flight keep reading a consistent version
+and never wait on a reload.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from vector_store import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+
+def _contact_text(contact: Dict) -> str:
+    return f"{contact.get('name', '')} - {contact.get('description', '')}"
+
+
+def _tool_text(tool: Dict) -> str:
+    return f"{tool.get('name', '')} - {tool.get('benefit', '')}"
+
+
+# Indexed sections of wellness_resources.json: (result type, id field, text)
+CATEGORIES = {
+    "emergency_contacts": ("emergency", "resource_id", _contact_text),
+    "self_help_tools": ("self_help", "tool_id", _tool_text),
+}
+
+
+def resource_id(category: str, data: Dict) -> str:
+    _, id_field, _ = CATEGORIES[category]
+    return str(data.get(id_field) or f"{category}:{data.get('name', '')}")
+
+
+def make_entry(category: str, data: Dict) -> Dict:
+    """Searchable entry for one resource"""
+    if category not in CATEGORIES:
+        raise ValueError(f"Unknown resource category '{category}', expected one of {list(CATEGORIES)}")
+    entry_type, _, text_of = CATEGORIES[category]
+    text = text_of(data)
+    return {
+        'id': resource_id(category, data),
+        'category': category,
+        'text': text,
+        'tokens': frozenset(text.lower().split()),
+        'type': entry_type,
+        'data': data,
+    }
+
+
+def flatten_resources(resources: Dict) -> List[Dict]:
+    return [make_entry(category, data)
+            for category in CATEGORIES
+            for data in resources.get(category, [])]
+
+
+class LexicalIndex:
+    """Inverted index over entry tokens for keyword retrieval"""
+
+    def __init__(self, entries: List[Dict]):
+        self.entries = entries
+        self.postings: Dict[str, List[int]] = {}
+        for row, entry in enumerate(entries):
+            for token in entry['tokens']:
+                self.postings.setdefault(token, []).append(row)
+
+    def search(self, query: str, top_k: int) -> List[Tuple[float, int]]:
+        """(score, row) pairs by token overlap, best first"""
+        query_words = set(query.lower().split())
+        overlaps: Dict[int, int] = {}
+        for word in query_words:
+            for row in self.postings.get(word, ()):
+                overlaps[row] = overlaps.get(row, 0) + 1
+
+        scored = [
+            (overlap / max(len(query_words), len(self.entries[row]['tokens']), 1), row)
+            for row, overlap in overlaps.items()
+        ]
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return scored[:top_k]
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """Immutable view of the index that one query reads from start to end"""
+    version: int
+    entries: List[Dict]
+    embeddings: Optional[np.ndarray] = None
+    index: Optional[VectorIndex] = None
+    precomputed: Dict[str, Tuple[np.ndarray, np.ndarray]] = field(default_factory=dict)
+    rows: Dict[str, int] = field(init=False)
+    lexical: LexicalIndex = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "rows", {entry['id']: row for row, entry in enumerate(self.entries)})
+        object.__setattr__(self, "lexical", LexicalIndex(self.entries))
+
+
+def diff_resources(snapshot: IndexSnapshot, resources: Dict) -> Tuple[List[Tuple[str, Dict]], List[str]]:
+    """
+    Changes that turn the snapshot into `resources`
+
+    Returns:
+        (upserts as (category, data), deleted resource ids)
+    """
+    upserts, seen = [], set()
+    for entry in flatten_resources(resources):
+        seen.add(entry['id'])
+        row = snapshot.rows.get(entry['id'])
+        if row is None or snapshot.entries[row]['data'] != entry['data']:
+            upserts.append((entry['category'], entry['data']))
+    deletes = [entry['id'] for entry in snapshot.entries if entry['id'] not in seen]
+    return upserts, deletes
+
+
+def write_resources(path: str, resources: Dict):
+    """Replace the resources file atomically so readers never see half a file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".wellness_resources.", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(resources, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+class ResourceWatcher:
+    """Poll the resources file and apply changes when its mtime moves"""
+
+    def __init__(self, engine, path: str, interval: float = 2.0):
+        self.engine = engine
+        self.path = path
+        self.interval = interval
+        self._mtime = self._current_mtime()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _current_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="resource-watcher", daemon=True)
+            self._thread.start()
+            logger.info(f"👀 Watching {self.path} for resource changes")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            mtime = self._current_mtime()
+            if mtime is None or mtime == self._mtime:
+                continue
+            self._mtime = mtime
+            try:
+                self.engine.reload_from_file(self.path)
+            except Exception as e:
+                logger.error(f"❌ Resource reload failed: {e}")
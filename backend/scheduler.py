@@ -0,0 +1,205 @@
+"""
+Priority scheduling in front of LLM generation
+
+Requests are scored with CrisisDetector's risk factors (falling back to the
+stress level alone) into three levels and queued in a heap ordered by level,
+then arrival. Regular workers always take the most urgent request waiting,
+and a dedicated crisis lane serves only crisis requests, so an urgent
+request never waits behind routine generations already running. Batched
+calls (run_batched) that reach the head of the queue take the requests
+queued right behind them at the same priority along, up to MAX_BATCH, and
+decode them in one pass. Worker threads start on first use, i.e. after
+the pre-fork server has forked.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, Any, List
+
+import numpy as np
+from telemetry import registry
+from ai_models.crisis_detector import CrisisDetector
+
+logger = logging.getLogger(__name__)
+
+CRISIS, ELEVATED, ROUTINE = 0, 1, 2
+PRIORITY_NAMES = {CRISIS: "crisis", ELEVATED: "elevated", ROUTINE: "routine"}
+
+WORKERS = int(os.environ.get("ENGCARE_LLM_WORKERS", "1"))
+# Requests decoded together by one batched call
+MAX_BATCH = int(os.environ.get("ENGCARE_LLM_MAX_BATCH", "4"))
+# Crisis requests get a shorter generation budget so they answer in under a second
+CRISIS_BUDGET_SECONDS = float(os.environ.get("ENGCARE_CRISIS_BUDGET_MS", "800")) / 1000
+
+PRIORITY_LATENCY = registry.histogram(
+    "engcare_priority_request_duration_seconds",
+    "End-to-end /wellness-advice latency by request priority",
+    ["priority"]
+)
+QUEUE_WAIT = registry.histogram(
+    "engcare_scheduler_wait_seconds",
+    "Time spent queued before generation, by request priority",
+    ["priority"]
+)
+BATCH_SIZE = registry.histogram(
+    "engcare_scheduler_batch_size",
+    "Requests served by each batched generation call",
+    buckets=(1, 2, 4, 8, 16, 32)
+)
+
+
+class PriorityClassifier:
+    """Cheap urgency score for an incoming request"""
+
+    def __init__(self):
+        self.detector = CrisisDetector()
+
+    def classify(self, stress_level: int, work_hours: int, breaks_taken: int, productivity: int) -> int:
+        if stress_level >= 9:
+            priority = CRISIS
+        elif stress_level >= 6:
+            priority = ELEVATED
+        else:
+            priority = ROUTINE
+
+        risk = self.detector.calculate_risk_factors(stress_level, work_hours, breaks_taken, productivity)
+        level = self.detector.determine_crisis_level(risk["current_risk_score"])
+        if level in ("immediate", "high_priority"):
+            priority = CRISIS
+        elif level == "medium_priority":
+            priority = min(priority, ELEVATED)
+
+        return priority
+
+
+class InferenceScheduler:
+    """Multi-level priority queue with worker threads and a crisis lane"""
+
+    def __init__(self, workers: int = WORKERS, crisis_lane: bool = True, max_batch: int = MAX_BATCH):
+        self.workers = max(1, workers)
+        self.crisis_lane = crisis_lane
+        self.max_batch = max(1, max_batch)
+        self._heap: List = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._latencies = {priority: deque(maxlen=500) for priority in PRIORITY_NAMES}
+
+    def start(self):
+        """Start the worker threads if they are not running yet"""
+        with self._cond:
+            if self._threads:
+                return
+            lanes = [ROUTINE] * self.workers + ([CRISIS] if self.crisis_lane else [])
+            for index, max_priority in enumerate(lanes):
+                thread = threading.Thread(target=self._worker, args=(max_priority,),
+                                          name=f"llm-{PRIORITY_NAMES[max_priority]}-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            logger.info(f"🚀 Inference scheduler started ({self.workers} workers, "
+                        f"crisis lane {'on' if self.crisis_lane else 'off'})")
+
+    def submit(self, priority: int, fn: Callable, *args, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs) at the given priority"""
+        return self._push(priority, fn, args, kwargs, batched=False)
+
+    def submit_batched(self, priority: int, batch_fn: Callable, item: Any, deadline: float = None) -> Future:
+        """
+        Queue one item for batch_fn(items, deadline=...), which returns one result per item
+
+        Items queued back to back at the same priority with the same batch_fn
+        are passed in one call; the batch stops at the earliest deadline.
+        """
+        return self._push(priority, batch_fn, (item,), {"deadline": deadline}, batched=True)
+
+    def _push(self, priority: int, fn: Callable, args: tuple, kwargs: dict, batched: bool) -> Future:
+        self.start()
+        future = Future()
+        with self._cond:
+            heapq.heappush(self._heap, (priority, next(self._seq), time.perf_counter(), future, fn, args, kwargs, batched))
+            self._cond.notify_all()
+        return future
+
+    async def run(self, priority: int, fn: Callable, *args, **kwargs):
+        """Await a queued call from async code"""
+        return await asyncio.wrap_future(self.submit(priority, fn, *args, **kwargs))
+
+    async def run_batched(self, priority: int, batch_fn: Callable, item: Any, deadline: float = None):
+        """Await a queued batchable call from async code"""
+        return await asyncio.wrap_future(self.submit_batched(priority, batch_fn, item, deadline))
+
+    def _take(self, max_priority: int) -> List:
+        """The most urgent entry, plus the batchable entries queued right behind it"""
+        with self._cond:
+            while not self._heap or self._heap[0][0] > max_priority:
+                self._cond.wait()
+            entries = [heapq.heappop(self._heap)]
+            priority, fn, batched = entries[0][0], entries[0][4], entries[0][7]
+            while (batched and len(entries) < self.max_batch and self._heap
+                   and self._heap[0][7] and self._heap[0][0] == priority and self._heap[0][4] == fn):
+                entries.append(heapq.heappop(self._heap))
+            return entries
+
+    def _worker(self, max_priority: int):
+        while True:
+            entries = self._take(max_priority)
+            now = time.perf_counter()
+            for entry in entries:
+                QUEUE_WAIT.observe(now - entry[2], priority=PRIORITY_NAMES[entry[0]])
+            entries = [entry for entry in entries if entry[3].set_running_or_notify_cancel()]
+            if not entries:
+                continue
+
+            _, _, _, future, fn, args, kwargs, batched = entries[0]
+            if not batched:
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+                continue
+
+            deadlines = [entry[6]["deadline"] for entry in entries if entry[6]["deadline"] is not None]
+            BATCH_SIZE.observe(len(entries))
+            try:
+                results = fn([entry[5][0] for entry in entries], deadline=min(deadlines) if deadlines else None)
+                for entry, result in zip(entries, results):
+                    entry[3].set_result(result)
+            except BaseException as e:
+                for entry in entries:
+                    entry[3].set_exception(e)
+
+    def observe(self, priority: int, latency: float):
+        """Record a request's end-to-end latency under its priority"""
+        PRIORITY_LATENCY.observe(latency, priority=PRIORITY_NAMES[priority])
+        self._latencies[priority].append(latency)
+
+    def queued(self) -> Dict[str, int]:
+        with self._cond:
+            counts = {name: 0 for name in PRIORITY_NAMES.values()}
+            for entry in self._heap:
+                counts[PRIORITY_NAMES[entry[0]]] += 1
+            return counts
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and recent latency percentiles per priority"""
+        latency = {}
+        for priority, samples in self._latencies.items():
+            values = list(samples)
+            latency[PRIORITY_NAMES[priority]] = {
+                "requests": len(values),
+                "p50_ms": float(np.percentile(values, 50)) * 1000 if values else None,
+                "p95_ms": float(np.percentile(values, 95)) * 1000 if values else None,
+            }
+        return {"workers": self.workers, "crisis_lane": self.crisis_lane,
+                "queued": self.queued(), "latency": latency}
+
+
+# Global instances
+priority_classifier = PriorityClassifier()
+inference_scheduler = InferenceScheduler()
@@ -0,0 +1,214 @@
+"""
+Pre-fork server for the EngCare API
+
+The master process imports main.py once, which loads DialoGPT-Medium and the
+MiniLM encoder, then forks the workers. Model weights are inherited
+copy-on-write, so every worker shares one physical copy instead of each
+loading its own. gc.freeze() moves everything allocated during the preload
+into the permanent generation, which stops the collector in the workers from
+touching (and so copying) those pages.
+
+With more than one worker the master also forks a state owner (see
+shared_state) holding what every worker must agree on: live-update
+readings, department totals and anomaly baselines. Profiling switches sit
+in shared memory and admin resource edits reach the other workers through
+the resources file. The SLO breaker, scheduler queues and metrics stay per
+worker.
+
+Usage:
+    python backend/serve.py --workers 4 --port 8000
+"""
+import argparse
+import gc
+import importlib
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+import uvicorn
+
+import shared_state
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the EngCare API with pre-forked workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("FASTAPI_PORT", 8000)))
+    parser.add_argument("--workers", type=int,
+                        default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="torch intra-op threads per worker (default: cores / workers)")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--app", default="main:app", help="ASGI app to preload, as module:attribute")
+    return parser.parse_args(argv)
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Bind the listening socket in the master so every worker accepts on it"""
+    # Pass IPPROTO_TCP explicitly: asyncio only enables TCP_NODELAY on
+    # accepted sockets whose proto says TCP, and small responses otherwise
+    # stall ~40 ms on delayed ACKs.
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def set_torch_threads(threads: int):
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def preload_app(target: str = "main:app"):
+    """Import the app (and its models) in the master, then freeze the heap"""
+    # Keep the master single-threaded while it runs model code: an OpenMP
+    # pool started before fork() can deadlock in the children.
+    set_torch_threads(1)
+
+    start = time.perf_counter()
+    module, _, attribute = target.partition(":")
+    app = getattr(importlib.import_module(module), attribute or "app")
+    logger.info(f"✅ Models preloaded in {time.perf_counter() - start:.1f}s")
+
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def run_worker(app, sock: socket.socket, threads: int, log_level: str):
+    """Serve requests in a forked worker until told to stop"""
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    set_torch_threads(threads)
+
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+def run_state_owner(sock: socket.socket):
+    """Serve the shared state in a forked owner until told to stop"""
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # Only workers accept connections
+    sock.close()
+    shared_state.serve()
+
+
+class PreforkMaster:
+    """Fork the state owner and a fixed number of workers, replacing any that exit"""
+
+    def __init__(self, app, sock: socket.socket, workers: int, threads: int, log_level: str):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.threads = threads
+        self.log_level = log_level
+        self.children: Dict[int, int] = {}
+        self.owner_pid = None
+        self.stopping = False
+
+    def _fork(self, target, *args) -> int:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                target(*args)
+            finally:
+                os._exit(0)
+        return pid
+
+    def spawn(self, index: int):
+        pid = self._fork(run_worker, self.app, self.sock, self.threads, self.log_level)
+        self.children[pid] = index
+        logger.info(f"🚀 Worker {index} started (pid {pid})")
+
+    def spawn_owner(self):
+        self.owner_pid = self._fork(run_state_owner, self.sock)
+        shared_state.wait_until_ready()
+        logger.info(f"🚀 State owner started (pid {self.owner_pid})")
+
+    @staticmethod
+    def _terminate(pid: int):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def stop(self, signum=None, frame=None):
+        # Workers first; the owner goes once they have finished their requests
+        self.stopping = True
+        for pid in list(self.children):
+            self._terminate(pid)
+        if not self.children and self.owner_pid is not None:
+            self._terminate(self.owner_pid)
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        # The owner first, so workers find it on their first request
+        if shared_state.enabled():
+            self.spawn_owner()
+        for index in range(self.workers):
+            self.spawn(index)
+
+        while self.children or self.owner_pid is not None:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+
+            if pid == self.owner_pid:
+                self.owner_pid = None
+                if not self.stopping:
+                    # Workers reconnect on their next call; department stats come back from the snapshot
+                    logger.error(f"❌ State owner (pid {pid}) exited with status {status}, restarting")
+                    self.spawn_owner()
+                continue
+
+            index = self.children.pop(pid, None)
+            if index is None:
+                continue
+            if not self.stopping:
+                logger.warning(f"⚠️ Worker {index} (pid {pid}) exited with status {status}, restarting")
+                self.spawn(index)
+            elif not self.children and self.owner_pid is not None:
+                self._terminate(self.owner_pid)
+
+        logger.info("🛑 All workers stopped")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper())
+
+    workers = max(1, args.workers)
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+
+    # Before the import, so the app wraps its shared objects for the owner
+    shared_state.configure(workers)
+    try:
+        sock = bind_socket(args.host, args.port)
+        app = preload_app(args.app)
+
+        logger.info(f"🌐 Serving on {args.host}:{args.port} with {workers} workers x {threads} threads")
+        PreforkMaster(app, sock, workers, threads, args.log_level).run()
+    finally:
+        shared_state.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+State shared by the pre-forked API workers
+
+With several workers, serve.py forks one state-owner process next to them.
+The owner holds the objects every worker must agree on (live-update
+readings, department totals, anomaly baselines), and workers call their
+methods through multiprocessing.managers proxies over a Unix socket. The
+socket and its auth key are chosen in the master before the fork, so the
+workers inherit them.
+
+Wrap an object with shared(name, obj) at import time. In a single process
+(tests, plain uvicorn, serve.py --workers 1) nothing is configured, and the
+handle simply calls the local object.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from multiprocessing.managers import BaseManager, RemoteError
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# How long the master waits for a freshly forked owner to accept connections
+OWNER_START_TIMEOUT = float(os.environ.get("ENGCARE_STATE_START_TIMEOUT", "30"))
+
+_config: Dict[str, Any] = {"workers": 1, "address": None, "authkey": None}
+_handles: Dict[str, "SharedHandle"] = {}
+_connection: Dict[str, Any] = {"pid": None, "manager": None}
+_connection_lock = threading.Lock()
+
+
+class StateManager(BaseManager):
+    """Serves the shared objects from the owner process"""
+
+
+def configure(workers: int):
+    """Pick the owner's socket and key for `workers` workers (call before importing the app)"""
+    _config["workers"] = max(1, workers)
+    if workers > 1 and _config["address"] is None:
+        _config["address"] = os.path.join(tempfile.mkdtemp(prefix="engcare-state-"), "state.sock")
+        _config["authkey"] = os.urandom(32)
+
+
+def enabled() -> bool:
+    """Whether shared objects live in an owner process"""
+    return _config["address"] is not None
+
+
+def worker_count() -> int:
+    return _config["workers"]
+
+
+def shared(name: str, local: Any, on_start: Optional[Callable[[Any], None]] = None) -> "SharedHandle":
+    """
+    Handle to `local` that the owner process serves when one is configured
+
+    Args:
+        on_start: Run on the owner's copy each time the owner starts, e.g.
+            to reload a snapshot after a restart
+    """
+    if name in _handles:
+        raise ValueError(f"Shared object '{name}' is already registered")
+    handle = SharedHandle(name, local, on_start)
+    _handles[name] = handle
+    StateManager.register(name, callable=lambda: local)
+    return handle
+
+
+def _manager(fresh: bool = False) -> StateManager:
+    """This process's connection to the owner, reconnected after a fork or when `fresh`"""
+    with _connection_lock:
+        if fresh or _connection["pid"] != os.getpid():
+            manager = StateManager(address=_config["address"], authkey=_config["authkey"])
+            manager.connect()
+            _connection.update(pid=os.getpid(), manager=manager)
+        return _connection["manager"]
+
+
+class SharedHandle:
+    """Calls methods on the owner's copy of an object, or on the local one"""
+
+    def __init__(self, name: str, local: Any, on_start: Optional[Callable[[Any], None]] = None):
+        self.name = name
+        self.local = local
+        self.on_start = on_start
+        self._proxy = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _remote(self, stale=None):
+        with self._lock:
+            if stale is not None or self._proxy is None or self._pid != os.getpid():
+                self._proxy = getattr(_manager(fresh=stale is not None), self.name)()
+                self._pid = os.getpid()
+            return self._proxy
+
+    def __getattr__(self, attr: str):
+        if not enabled():
+            return getattr(self.local, attr)
+
+        def call(*args, **kwargs):
+            proxy = self._remote()
+            try:
+                return getattr(proxy, attr)(*args, **kwargs)
+            except (EOFError, ConnectionError, RemoteError):
+                # The owner was restarted (a new one does not know this
+                # proxy's object id); connect to it and retry once
+                logger.warning(f"⚠️ Lost the state owner during {self.name}.{attr}, reconnecting")
+                return getattr(self._remote(stale=proxy), attr)(*args, **kwargs)
+
+        return call
+
+
+def serve():
+    """Run the owner: prepare every shared object, then serve them until killed"""
+    for handle in _handles.values():
+        if handle.on_start is not None:
+            handle.on_start(handle.local)
+    # A restarted owner finds its predecessor's socket file
+    if os.path.exists(_config["address"]):
+        os.unlink(_config["address"])
+    manager = StateManager(address=_config["address"], authkey=_config["authkey"])
+    server = manager.get_server()
+    logger.info(f"🚀 State owner serving {', '.join(_handles)} on {_config['address']}")
+    server.serve_forever()
+
+
+def wait_until_ready(timeout: float = OWNER_START_TIMEOUT):
+    """Block until the owner accepts connections"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            StateManager(address=_config["address"], authkey=_config["authkey"]).connect()
+            return
+        except (FileNotFoundError, ConnectionError):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"State owner did not start within {timeout:.0f}s")
+            time.sleep(0.05)
+
+
+def close():
+    """Remove the owner's socket directory (master, on shutdown)"""
+    if _config["address"] is not None:
+        shutil.rmtree(os.path.dirname(_config["address"]), ignore_errors=True)
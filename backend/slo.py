@@ -0,0 +1,195 @@
+"""
+Latency SLO controller for /wellness-advice
+
+Every admitted request gets a latency budget that the decoders stop at. A
+circuit breaker watches the rolling p95 of request latency: when it exceeds
+the target, new traffic gets the rule-based advice and keyword retrieval
+instead of queueing behind slow generations. After a cooldown the breaker
+lets single probe requests through and closes again once enough of them
+finish inside the target. Requests beyond the in-flight limit are shed the
+same way even while the breaker is closed, except for critical (crisis)
+requests, which are only diverted by the breaker.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+
+import numpy as np
+from telemetry import registry
+
+logger = logging.getLogger(__name__)
+
+TARGET_P95_SECONDS = float(os.environ.get("ENGCARE_SLO_P95_MS", "2500")) / 1000
+LATENCY_BUDGET_SECONDS = float(os.environ.get("ENGCARE_LATENCY_BUDGET_MS", "2000")) / 1000
+MAX_INFLIGHT = int(os.environ.get("ENGCARE_LLM_MAX_INFLIGHT", "4"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+ADVICE_OUTCOMES = registry.counter(
+    "engcare_advice_outcomes_total",
+    "Wellness advice responses by how they were produced",
+    ["outcome"]
+)
+CIRCUIT_OPEN = registry.gauge(
+    "engcare_slo_circuit_open",
+    "1 while new traffic is routed to fallback advice"
+)
+ROLLING_P95 = registry.gauge(
+    "engcare_slo_rolling_p95_seconds",
+    "p95 of recent /wellness-advice latencies seen by the SLO controller"
+)
+
+
+@dataclass
+class Admission:
+    """Routing decision for one request"""
+    use_llm: bool
+    deadline: Optional[float]
+    outcome: str
+    probe: bool = False
+
+    def deadline_exceeded(self) -> bool:
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+
+class SLOController:
+    """Latency budgets, load shedding and a p95 circuit breaker"""
+
+    def __init__(self, target_p95: float = TARGET_P95_SECONDS, budget: float = LATENCY_BUDGET_SECONDS,
+                 max_inflight: int = MAX_INFLIGHT, window: int = 100, min_samples: int = 20,
+                 cooldown: float = 15.0, recovery_probes: int = 3, clock=time.monotonic):
+        self.target_p95 = target_p95
+        self.budget = budget
+        self.max_inflight = max_inflight
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.recovery_probes = recovery_probes
+        self.clock = clock
+
+        self.state = CLOSED
+        self.trips = 0
+        self._latencies = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_successes = 0
+        self._inflight = 0
+        self._outcomes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def admit(self, budget: Optional[float] = None, critical: bool = False) -> Admission:
+        """
+        Decide whether this request may use the LLM
+
+        Args:
+            budget: Latency budget in seconds (default: the controller's)
+            critical: Exempt from in-flight shedding
+        """
+        with self._lock:
+            if self.state == OPEN and self.clock() - self._opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probe_successes = 0
+                logger.info("🔁 SLO breaker half-open, probing the LLM")
+
+            probe = False
+            if self.state == OPEN:
+                return Admission(False, None, "circuit_open")
+            if self.state == HALF_OPEN:
+                if self._probe_in_flight:
+                    return Admission(False, None, "circuit_open")
+                self._probe_in_flight = probe = True
+            elif self._inflight >= self.max_inflight and not critical:
+                return Admission(False, None, "overload")
+
+            self._inflight += 1
+            deadline = time.perf_counter() + (budget if budget is not None else self.budget)
+            return Admission(True, deadline, "llm", probe=probe)
+
+    def release(self, admission: Admission, latency: float):
+        """Record a finished request and update the breaker"""
+        with self._lock:
+            self._outcomes[admission.outcome] = self._outcomes.get(admission.outcome, 0) + 1
+            if admission.use_llm:
+                self._inflight -= 1
+                self._latencies.append(latency)
+                if admission.probe:
+                    self._finish_probe(latency)
+                elif self.state == CLOSED:
+                    self._maybe_trip()
+            ROLLING_P95.set(self._p95())
+        ADVICE_OUTCOMES.inc(outcome=admission.outcome)
+
+    @contextmanager
+    def request(self, budget: Optional[float] = None, critical: bool = False):
+        """
+        Admit a request and record its latency and outcome when it ends
+
+        Set `admission.outcome` inside the block to report e.g. "truncated".
+        """
+        admission = self.admit(budget, critical)
+        start = time.perf_counter()
+        try:
+            yield admission
+        except Exception:
+            admission.outcome = "error"
+            raise
+        finally:
+            self.release(admission, time.perf_counter() - start)
+
+    def _p95(self) -> float:
+        return float(np.percentile(self._latencies, 95)) if self._latencies else 0.0
+
+    def _maybe_trip(self):
+        if len(self._latencies) < self.min_samples:
+            return
+        p95 = self._p95()
+        if p95 > self.target_p95:
+            self._open()
+            self.trips += 1
+            logger.warning(f"⚠️ SLO breaker open: p95 {p95 * 1000:.0f}ms > {self.target_p95 * 1000:.0f}ms, "
+                           f"serving fallback advice")
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = self.clock()
+        CIRCUIT_OPEN.set(1)
+
+    def _finish_probe(self, latency: float):
+        self._probe_in_flight = False
+        if self.state != HALF_OPEN:
+            return
+        if latency > self.target_p95:
+            self._open()
+            return
+        self._probe_successes += 1
+        if self._probe_successes >= self.recovery_probes:
+            self.state = CLOSED
+            # Judge the next trip on post-recovery traffic only
+            self._latencies.clear()
+            CIRCUIT_OPEN.set(0)
+            logger.info("✅ SLO breaker closed, LLM traffic restored")
+
+    def stats(self) -> Dict[str, Any]:
+        """Breaker state and how often responses were degraded"""
+        with self._lock:
+            outcomes = dict(self._outcomes)
+            total = sum(outcomes.values())
+            degraded = total - outcomes.get("llm", 0)
+            return {
+                "state": self.state,
+                "target_p95_ms": self.target_p95 * 1000,
+                "budget_ms": self.budget * 1000,
+                "rolling_p95_ms": self._p95() * 1000,
+                "in_flight": self._inflight,
+                "trips": self.trips,
+                "outcomes": outcomes,
+                "degraded_ratio": degraded / total if total else 0.0,
+            }
+
+
+# Global instance
+slo_controller = SLOController()
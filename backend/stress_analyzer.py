@@ -27,5 +27,14 @@ class StressAnalyzer:
             "confidence": float(probability),
             "needs_intervention": probability > 0.7
         }
+    
+    def predict_stress_risk_batch(self, features: np.ndarray) -> np.ndarray:
+        """
+        High-stress probability for many employees in one call
+        
+        Args:
+            features: [n, 4] rows of work_hours, meetings, breaks, current_stress
+        """
+        return self.model.predict_proba(np.asarray(features, dtype=float))[:, 1]
 
 stress_analyzer = StressAnalyzer()
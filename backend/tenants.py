@@ -0,0 +1,265 @@
+"""
+Per-tenant resource indexes layered over the shared base corpus
+
+Each client company keeps its own helplines, tools and wellness policies in
+data/tenants/<tenant_id>/resources.json (same sections as
+wellness_resources.json, plus optional "wellness_policies" and
+"department_specific_advice" for CompanyAdvisor). A tenant's index is built
+on first request and its vectors are cached next to it in index.npz, so later
+loads only re-encode resources whose text changed.
+
+Queries search the tenant index and the base RAGEngine snapshot with one
+query vector and merge the results; a tenant resource with the same id as a
+base resource replaces it. The base corpus is referenced, never copied, so
+only tenant-specific data counts against the residency budget. Loaded
+tenants are kept in an LRU bounded by ENGCARE_TENANT_CACHE_MB.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from resource_index import IndexSnapshot, flatten_resources
+from telemetry import registry, record_cache, stage
+from vector_store import VectorIndex
+
+try:
+    from ai_models.company_advisor import CompanyAdvisor
+    HAS_COMPANY_ADVISOR = True
+except ImportError:
+    HAS_COMPANY_ADVISOR = False
+
+logger = logging.getLogger(__name__)
+
+TENANTS_DIR = os.environ.get("ENGCARE_TENANTS_DIR", "data/tenants")
+TENANT_CACHE_MB = float(os.environ.get("ENGCARE_TENANT_CACHE_MB", "256"))
+# Tenant corpora are small, so they are never PCA-projected
+VECTOR_MODE = os.environ.get("ENGCARE_VECTOR_MODE", "float32")
+TENANT_ID_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+TENANT_RESIDENT_BYTES = registry.gauge(
+    "engcare_tenant_index_resident_bytes",
+    "Memory held by loaded tenant indexes"
+)
+TENANT_EVICTIONS = registry.counter(
+    "engcare_tenant_index_evictions_total",
+    "Tenant indexes evicted to stay within the memory budget"
+)
+
+
+class UnknownTenantError(LookupError):
+    pass
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class TenantIndex:
+    """One tenant's resources, vectors and advisor"""
+
+    def __init__(self, tenant_id: str, resources: Dict, snapshot: IndexSnapshot, advisor=None):
+        self.tenant_id = tenant_id
+        self.resources = resources
+        self.snapshot = snapshot
+        self.advisor = advisor
+        self.ids = set(snapshot.rows)
+        self.size_bytes = (
+            len(json.dumps(resources))
+            + (snapshot.embeddings.nbytes if snapshot.embeddings is not None else 0)
+            + (snapshot.index.memory_bytes()["resident"] if snapshot.index is not None else 0)
+        )
+
+
+class TenantIndexManager:
+    """Lazily loaded tenant indexes under an LRU memory budget"""
+
+    def __init__(self, base_engine, root: str = TENANTS_DIR, budget_mb: float = TENANT_CACHE_MB):
+        self.base = base_engine
+        self.root = root
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self._loaded: "OrderedDict[str, TenantIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def _tenant_dir(self, tenant_id: str) -> str:
+        if not TENANT_ID_PATTERN.match(tenant_id):
+            raise UnknownTenantError(f"Invalid tenant id '{tenant_id}'")
+        return os.path.join(self.root, tenant_id)
+
+    def check(self, tenant_id: str) -> str:
+        """The tenant's directory; UnknownTenantError for a bad id or a tenant with no resources"""
+        directory = self._tenant_dir(tenant_id)
+        if not os.path.exists(os.path.join(directory, "resources.json")):
+            raise UnknownTenantError(f"Unknown tenant '{tenant_id}'")
+        return directory
+
+    def get(self, tenant_id: str) -> TenantIndex:
+        """Loaded index for the tenant, loading (and evicting others) if needed"""
+        with self._lock:
+            tenant = self._loaded.get(tenant_id)
+            if tenant is not None:
+                self._loaded.move_to_end(tenant_id)
+                self.hits += 1
+        if tenant is not None:
+            record_cache("tenant_index", True)
+            return tenant
+
+        # Only existing tenants get a load lock, so unknown ids can't grow the map
+        directory = self.check(tenant_id)
+        with self._lock:
+            load_lock = self._load_locks.setdefault(tenant_id, threading.Lock())
+
+        # One loader per tenant; other tenants keep being served meanwhile
+        with load_lock:
+            with self._lock:
+                tenant = self._loaded.get(tenant_id)
+            if tenant is not None:
+                record_cache("tenant_index", True)
+                return tenant
+
+            record_cache("tenant_index", False)
+            try:
+                tenant = self._load(tenant_id, directory)
+            except Exception:
+                # e.g. the tenant was removed since the check
+                with self._lock:
+                    self._load_locks.pop(tenant_id, None)
+                raise
+            with self._lock:
+                self._loaded[tenant_id] = tenant
+                self.loads += 1
+                self._evict(keep=tenant_id)
+            return tenant
+
+    def _evict(self, keep: str):
+        resident = sum(t.size_bytes for t in self._loaded.values())
+        while resident > self.budget_bytes and len(self._loaded) > 1:
+            tenant_id, tenant = next(iter(self._loaded.items()))
+            if tenant_id == keep:
+                self._loaded.move_to_end(tenant_id)
+                continue
+            del self._loaded[tenant_id]
+            resident -= tenant.size_bytes
+            self.evictions += 1
+            TENANT_EVICTIONS.inc()
+            logger.info(f"♻️ Evicted tenant index '{tenant_id}' ({tenant.size_bytes / 1e6:.1f} MB)")
+        TENANT_RESIDENT_BYTES.set(resident)
+
+    def _load(self, tenant_id: str, directory: str) -> TenantIndex:
+        path = os.path.join(directory, "resources.json")
+        if not os.path.exists(path):
+            raise UnknownTenantError(f"Unknown tenant '{tenant_id}'")
+
+        start = time.perf_counter()
+        with open(path, "r") as f:
+            resources = json.load(f)
+        entries = flatten_resources(resources)
+
+        embeddings = index = None
+        if entries and self.base.embedding_model is not None:
+            embeddings = self._load_vectors(directory, entries)
+            # Binary mode maps its rescoring vectors from the tenant directory
+            rescore_path = os.path.join(directory, "rescore.npy") if VECTOR_MODE == "binary" else None
+            index = VectorIndex(mode=VECTOR_MODE, rescore_path=rescore_path).fit(embeddings)
+
+        tenant = TenantIndex(tenant_id, resources, IndexSnapshot(version=1, entries=entries,
+                                                                 embeddings=embeddings, index=index),
+                             advisor=self._build_advisor(resources))
+        logger.info(f"✅ Loaded tenant '{tenant_id}': {len(entries)} resources, "
+                    f"{tenant.size_bytes / 1e6:.2f} MB in {time.perf_counter() - start:.2f}s")
+        return tenant
+
+    def _load_vectors(self, directory: str, entries: List[Dict]) -> np.ndarray:
+        """Vectors from index.npz where the text is unchanged; encode and save the rest"""
+        cache_path = os.path.join(directory, "index.npz")
+        cached: Dict[Tuple[str, str], np.ndarray] = {}
+        if os.path.exists(cache_path):
+            try:
+                with np.load(cache_path) as data:
+                    cached = {(i, h): v for i, h, v in zip(data["ids"], data["text_hashes"], data["vectors"])}
+            except Exception as e:
+                logger.warning(f"⚠️ Ignoring unreadable tenant vector cache {cache_path}: {e}")
+
+        keys = [(e['id'], _text_hash(e['text'])) for e in entries]
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if missing:
+            with stage("tenant_index_encode"):
+                encoded = self.base.embedding_model.encode([entries[i]['text'] for i in missing],
+                                                           convert_to_numpy=True)
+            cached.update({keys[i]: vector for i, vector in zip(missing, encoded)})
+
+        vectors = np.stack([cached[key] for key in keys]).astype(np.float32)
+        if missing or len(cached) != len(keys):
+            np.savez(cache_path, ids=np.array([k[0] for k in keys]),
+                     text_hashes=np.array([k[1] for k in keys]), vectors=vectors)
+        return vectors
+
+    def _build_advisor(self, resources: Dict):
+        """CompanyAdvisor with tenant policies layered over the defaults"""
+        if not HAS_COMPANY_ADVISOR:
+            return None
+        base = CompanyAdvisor()
+        own_policies = resources.get("wellness_policies", [])
+        own_names = {p.get("name") for p in own_policies}
+        policies = own_policies + [p for p in base.wellness_policies if p.get("name") not in own_names]
+        advice = {**base.department_specific_advice, **resources.get("department_specific_advice", {})}
+        return CompanyAdvisor(wellness_policies=policies, department_specific_advice=advice)
+
+    def retrieve(self, tenant_id: str, query: str, top_k: int = 3, use_embeddings: bool = True) -> List[Dict]:
+        """
+        Top-k resources from the tenant corpus merged with the base corpus
+
+        Args:
+            use_embeddings: False uses keyword matching on both corpora (load shedding)
+        """
+        tenant = self.get(tenant_id)
+        base = self.base._snapshot
+        shadowed = len(tenant.ids & base.rows.keys())
+        candidates: List[Tuple[float, Dict, str]] = []
+
+        if use_embeddings and base.index is not None and self.base.embedding_model is not None:
+            vector = self.base.encode_queries([query])
+            for source, snapshot, k in (("tenant", tenant.snapshot, top_k), ("base", base, top_k + shadowed)):
+                if snapshot.index is None:
+                    continue
+                rows, scores = snapshot.index.search(vector, k)
+                candidates.extend((float(s), snapshot.entries[r], source)
+                                  for r, s in zip(rows[0], scores[0]) if s > 0.3)
+        else:
+            for source, snapshot, k in (("tenant", tenant.snapshot, top_k), ("base", base, top_k + shadowed)):
+                candidates.extend((s, snapshot.entries[r], source)
+                                  for s, r in snapshot.lexical.search(query, k) if s > 0.1)
+
+        candidates = [c for c in candidates if c[2] == "tenant" or c[1]['id'] not in tenant.ids]
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        return [{'resource': entry['data'], 'type': entry['type'], 'relevance_score': score, 'source': source}
+                for score, entry, source in candidates[:top_k]]
+
+    def company_recommendations(self, tenant_id: str, department_data: Dict[str, Any]) -> Dict[str, Any]:
+        advisor = self.get(tenant_id).advisor
+        if advisor is None:
+            raise RuntimeError("CompanyAdvisor is not available")
+        return advisor.get_company_recommendations(department_data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            resident = sum(t.size_bytes for t in self._loaded.values())
+            return {
+                "loaded": list(self._loaded),
+                "resident_mb": resident / 1024 / 1024,
+                "budget_mb": self.budget_bytes / 1024 / 1024,
+                "pid": os.getpid(),
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,220 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.environ.get("ENGCARE_DB_PATH", "data/engcare.db")
+
+DEFAULT_USER_DATA = {
+    'stress_level': 0.3,
+    'wellness_points': 450,
+    'level': 2,
+    'achievements': ['First Step', 'Meditation Guru'],
+    'streak': 5,
+    'burnout_risk': 0.25,
+    'mood': 'calm'
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    stress_level REAL NOT NULL,
+    wellness_points INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    achievements TEXT NOT NULL,
+    streak INTEGER NOT NULL,
+    burnout_risk REAL NOT NULL,
+    mood TEXT NOT NULL,
+    problems_solved INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS problem_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    problem TEXT NOT NULL,
+    solution TEXT NOT NULL,
+    context TEXT,
+    stress_before REAL,
+    created_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_problem_log_user_seq ON problem_log (user_id, seq DESC);
+"""
+
+USER_FIELDS = ('stress_level', 'wellness_points', 'level', 'achievements',
+               'streak', 'burnout_risk', 'mood')
+
+
+class UserStore:
+    """
+    Persistent per-user state backed by an embedded SQLite database
+
+    The database runs in WAL mode so the Streamlit script threads can read
+    while a flush is in progress. Problem resolutions are append-only and
+    read back newest-first through the (user_id, seq) index, so loading the
+    "Recent Solutions" panel costs the same no matter how long the history is.
+    Point and streak updates are buffered with update_user() and written in a
+    single transaction by flush().
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+
+        with self._lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+            self.conn.commit()
+        logger.info(f"✅ User store ready at {db_path}")
+
+    @contextmanager
+    def transaction(self):
+        """Run statements on the shared connection inside one transaction"""
+        with self._lock:
+            try:
+                yield self.conn
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    def ensure_schema(self, schema: str):
+        """Create tables owned by other subsystems on the same database"""
+        with self._lock:
+            self.conn.executescript(schema)
+            self.conn.commit()
+
+    def query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        """Run a read-only query and return all rows"""
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def load_user(self, user_id: str) -> Dict[str, Any]:
+        """Load a user's dashboard data, creating the row on first visit"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+
+            if row is None:
+                data = json.loads(json.dumps(DEFAULT_USER_DATA))
+                self.conn.execute(
+                    "INSERT INTO users (user_id, stress_level, wellness_points, level, achievements, "
+                    "streak, burnout_risk, mood, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (user_id, data['stress_level'], data['wellness_points'], data['level'],
+                     json.dumps(data['achievements']), data['streak'], data['burnout_risk'],
+                     data['mood'], datetime.now().isoformat())
+                )
+                self.conn.commit()
+                data['problems_solved'] = 0
+                return data
+
+        data = {field: row[field] for field in USER_FIELDS}
+        data['achievements'] = json.loads(row['achievements'])
+        data['problems_solved'] = row['problems_solved']
+
+        # Buffered changes not yet flushed still win over the stored row
+        data.update(self._pending.get(user_id, {}))
+        return data
+
+    def update_user(self, user_id: str, **changes):
+        """Buffer field changes for a user; they are written on flush()"""
+        unknown = set(changes) - set(USER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown user fields: {sorted(unknown)}")
+
+        with self._lock:
+            self._pending.setdefault(user_id, {}).update(changes)
+
+    def flush(self) -> int:
+        """Write all buffered user changes in a single transaction"""
+        with self._lock:
+            if not self._pending:
+                return 0
+
+            pending, self._pending = self._pending, {}
+            now = datetime.now().isoformat()
+            try:
+                for user_id, changes in pending.items():
+                    if 'achievements' in changes:
+                        changes = dict(changes, achievements=json.dumps(changes['achievements']))
+                    columns = ", ".join(f"{field} = ?" for field in changes)
+                    self.conn.execute(
+                        f"UPDATE users SET {columns}, updated_at = ? WHERE user_id = ?",
+                        (*changes.values(), now, user_id)
+                    )
+                self.conn.commit()
+            except Exception as e:
+                self.conn.rollback()
+                # Put the batch back so the next flush retries it
+                for user_id, changes in pending.items():
+                    self._pending[user_id] = {**changes, **self._pending.get(user_id, {})}
+                logger.error(f"❌ User store flush failed: {e}")
+                raise
+
+            return len(pending)
+
+    def log_problem(self, user_id: str, problem: str, solution: str,
+                    context: Optional[str] = None, stress_before: Optional[float] = None,
+                    timestamp: Optional[datetime] = None) -> Dict[str, Any]:
+        """Append a problem resolution to the user's log"""
+        timestamp = timestamp or datetime.now()
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO problem_log (user_id, problem, solution, context, stress_before, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, problem, solution, context, stress_before, timestamp.isoformat())
+            )
+            conn.execute(
+                "UPDATE users SET problems_solved = problems_solved + 1 WHERE user_id = ?",
+                (user_id,)
+            )
+
+        return {
+            'problem': problem,
+            'solution': solution,
+            'timestamp': timestamp,
+            'stress_before': stress_before,
+            'context': context
+        }
+
+    def recent_solutions(self, user_id: str, limit: int = 3) -> List[Dict[str, Any]]:
+        """Return the newest `limit` problem resolutions, newest first"""
+        rows = self.query(
+            "SELECT problem, solution, context, stress_before, created_at FROM problem_log "
+            "WHERE user_id = ? ORDER BY seq DESC LIMIT ?",
+            (user_id, limit)
+        )
+        return [{
+            'problem': row['problem'],
+            'solution': row['solution'],
+            'timestamp': datetime.fromisoformat(row['created_at']),
+            'stress_before': row['stress_before'],
+            'context': row['context']
+        } for row in rows]
+
+    def problem_count(self, user_id: str) -> int:
+        """Number of problems the user has solved"""
+        rows = self.query("SELECT problems_solved FROM users WHERE user_id = ?", (user_id,))
+        return rows[0]['problems_solved'] if rows else 0
+
+    def close(self):
+        """Flush pending writes and close the connection"""
+        self.flush()
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,238 @@
+"""
+Compressed vector storage for the RAG index
+
+Modes, all scoring cosine similarity on L2-normalised vectors:
+  * float32 - exact scores, 4 bytes per dimension
+  * int8    - per-vector symmetric scalar quantisation, 1 byte per dimension;
+              queries stay float, so only the corpus side is approximated
+  * binary  - sign bits (1 bit per dimension, packed into uint64 words)
+              scanned by Hamming distance to
+              pick `rescore_factor * k` candidates, which are then rescored
+              against float32 vectors. The float copy can live in a
+              memory-mapped file (`rescore_path`) so only candidate rows are
+              paged in; updated indexes keep it mapped.
+
+Any mode can first project to `dims` principal components (PCA fitted on the
+corpus), which shrinks every representation proportionally.
+"""
+import itertools
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODES = ("float32", "int8", "binary")
+
+# SWAR popcount masks (numpy < 2.0 has no bitwise_count)
+_M1, _M2, _M4, _H01 = (np.uint64(0x5555555555555555), np.uint64(0x3333333333333333),
+                       np.uint64(0x0F0F0F0F0F0F0F0F), np.uint64(0x0101010101010101))
+
+# Rows dequantised per step when scoring int8 codes
+SCORE_CHUNK = 65536
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def popcount64(words: np.ndarray) -> np.ndarray:
+    """Set bits in each uint64 element"""
+    words = words - ((words >> np.uint64(1)) & _M1)
+    words = (words & _M2) + ((words >> np.uint64(2)) & _M2)
+    words = (words + (words >> np.uint64(4))) & _M4
+    return (words * _H01) >> np.uint64(56)
+
+
+def sign_codes(vectors: np.ndarray) -> np.ndarray:
+    """Pack sign bits into uint64 words, zero-padding the last word"""
+    packed = np.packbits(vectors > 0, axis=1)
+    padding = -packed.shape[1] % 8
+    if padding:
+        packed = np.pad(packed, ((0, 0), (0, padding)))
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Indices and values of the k highest scores per row, best first"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.int64), empty
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-values, axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+class VectorIndex:
+    """Cosine-similarity index over float32, int8 or binary codes"""
+
+    def __init__(self, mode: str = "float32", dims: Optional[int] = None, rescore_factor: int = 10,
+                 rescore_path: Optional[str] = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown vector mode '{mode}', expected one of {MODES}")
+        self.mode = mode
+        self.dims = dims
+        self.rescore_factor = rescore_factor
+        self.rescore_path = rescore_path
+
+        self.mean: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None
+        self.vectors: Optional[np.ndarray] = None   # float32 (float32 mode, binary rescoring)
+        self.codes: Optional[np.ndarray] = None     # int8 codes or packed sign bits
+        self.scales: Optional[np.ndarray] = None    # int8 dequantisation scale per row
+
+    def __len__(self) -> int:
+        if self.codes is not None:
+            return self.codes.shape[0]
+        return 0 if self.vectors is None else self.vectors.shape[0]
+
+    def fit(self, vectors: np.ndarray, rescore_path: Optional[str] = None) -> "VectorIndex":
+        """
+        Build the index from raw embeddings
+
+        Args:
+            rescore_path: Binary mode only - keep the float rescoring vectors
+                in this .npy file, memory-mapped, instead of in RAM (defaults
+                to the path given to the constructor)
+        """
+        self.rescore_path = rescore_path or self.rescore_path
+        vectors = normalize(vectors)
+        if self.dims and self.dims < vectors.shape[1]:
+            if vectors.shape[0] < self.dims:
+                raise ValueError(f"PCA to {self.dims} dims needs at least {self.dims} vectors, got {vectors.shape[0]}")
+            self.mean = vectors.mean(axis=0)
+            _, _, vt = np.linalg.svd(vectors - self.mean, full_matrices=False)
+            self.components = vt[:self.dims].astype(np.float32)
+        vectors = self.project(vectors)
+
+        if self.mode == "float32":
+            self.vectors = vectors
+        elif self.mode == "int8":
+            self.codes, self.scales = self._quantize(vectors)
+        else:
+            self.codes = sign_codes(vectors)
+            self.vectors = self._store_rescore([vectors], vectors.shape) if self.rescore_path else vectors
+
+        logger.info(f"✅ Built {self.mode} vector index: {len(self)} x {vectors.shape[1]} "
+                    f"({self.memory_bytes()['resident'] / 1e6:.1f} MB resident)")
+        return self
+
+    def updated(self, keep: np.ndarray, new_vectors: np.ndarray) -> "VectorIndex":
+        """
+        New index with rows `keep` retained and `new_vectors` appended
+
+        Kept rows are copied as stored; only the new vectors are projected and
+        encoded, with the existing PCA basis. This index is left untouched.
+        """
+        index = VectorIndex(mode=self.mode, dims=self.dims, rescore_factor=self.rescore_factor,
+                            rescore_path=self.rescore_path)
+        index.mean, index.components = self.mean, self.components
+        new = self.project(new_vectors)
+
+        if self.mode == "float32":
+            index.vectors = np.concatenate([self.vectors[keep], new])
+        elif self.mode == "int8":
+            codes, scales = self._quantize(new)
+            index.codes = np.concatenate([self.codes[keep], codes])
+            index.scales = np.concatenate([self.scales[keep], scales])
+        else:
+            index.codes = np.concatenate([self.codes[keep], sign_codes(new)])
+            if self.rescore_path:
+                # Kept rows are copied a chunk at a time, never all in RAM
+                kept = (self.vectors[keep[start:start + SCORE_CHUNK]] for start in range(0, len(keep), SCORE_CHUNK))
+                index.vectors = index._store_rescore(itertools.chain(kept, [new]),
+                                                     (len(keep) + len(new), new.shape[1]))
+            else:
+                index.vectors = np.concatenate([self.vectors[keep], new])
+        return index
+
+    def _store_rescore(self, blocks, shape: Tuple[int, int]) -> np.memmap:
+        """
+        Write row blocks to rescore_path and memory-map it
+
+        The file is written beside the old one and renamed over it, so an
+        index still mapping the old file keeps reading its own rows.
+        """
+        tmp_path = f"{self.rescore_path}.{os.getpid()}.tmp"
+        out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=shape)
+        start = 0
+        for block in blocks:
+            out[start:start + len(block)] = block
+            start += len(block)
+        out.flush()
+        del out
+        os.replace(tmp_path, self.rescore_path)
+        return np.load(self.rescore_path, mmap_mode="r")
+
+    def project(self, vectors: np.ndarray) -> np.ndarray:
+        """Normalise and apply the PCA projection, if any"""
+        vectors = normalize(vectors)
+        if self.components is None:
+            return vectors
+        return normalize((vectors - self.mean) @ self.components.T)
+
+    @staticmethod
+    def _quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _int8_scores(self, queries: np.ndarray) -> np.ndarray:
+        scores = np.empty((queries.shape[0], len(self)), dtype=np.float32)
+        for start in range(0, len(self), SCORE_CHUNK):
+            block = self.codes[start:start + SCORE_CHUNK].astype(np.float32)
+            scores[:, start:start + SCORE_CHUNK] = (queries @ block.T) * self.scales[start:start + SCORE_CHUNK]
+        return scores
+
+    def _binary_search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        query_codes = sign_codes(queries)
+        n_candidates = min(len(self), max(k, k * self.rescore_factor))
+        indices = np.empty((queries.shape[0], min(k, len(self))), dtype=np.int64)
+        scores = np.empty(indices.shape, dtype=np.float32)
+
+        for row, (query, code) in enumerate(zip(queries, query_codes)):
+            distances = popcount64(np.bitwise_xor(self.codes, code)).sum(axis=1)
+            candidates = np.argpartition(distances, n_candidates - 1)[:n_candidates]
+            candidates.sort()  # sequential reads from a memory-mapped rescoring file
+            exact = np.asarray(self.vectors[candidates]) @ query
+            best, best_scores = top_k(exact[None, :], k)
+            indices[row] = candidates[best[0]]
+            scores[row] = best_scores[0]
+        return indices, scores
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k cosine neighbours for each query row
+
+        Returns:
+            (indices, scores), each [n_queries, min(k, len(index))], best first
+        """
+        queries = self.project(np.atleast_2d(queries))
+        if len(self) == 0:
+            empty = np.empty((queries.shape[0], 0))
+            return empty.astype(np.int64), empty
+
+        if self.mode == "float32":
+            return top_k(queries @ self.vectors.T, k)
+        if self.mode == "int8":
+            return top_k(self._int8_scores(queries), k)
+        return self._binary_search(queries, k)
+
+    def memory_bytes(self) -> Dict[str, int]:
+        """Bytes scanned per query (codes) and held in RAM (resident)"""
+        projection = 0 if self.components is None else self.components.nbytes + self.mean.nbytes
+        codes = 0 if self.codes is None else self.codes.nbytes
+        scales = 0 if self.scales is None else self.scales.nbytes
+        floats = 0 if self.vectors is None else self.vectors.nbytes
+        mapped = isinstance(self.vectors, np.memmap)
+        return {
+            "codes": codes + scales if self.mode != "float32" else floats,
+            "rescore": floats if self.mode == "binary" else 0,
+            "resident": codes + scales + projection + (0 if mapped else floats),
+        }
@@ -0,0 +1,121 @@
+"""
+Bulk check-in ingestion throughput vs. one JSON object per request
+
+Drives the FastAPI app in-process (httpx ASGI transport, no sockets) and
+reports rows/sec for:
+  * single_advice   - POST /wellness-advice, one check-in per request (the
+                      existing path; models are skipped so the LLM falls
+                      back to rule-based advice)
+  * single_bulk     - POST /checkins/bulk with a one-line NDJSON body, the
+                      same pipeline as bulk but paying per-request overhead;
+                      StressAnalyzer's random forest alone costs ~17 ms per
+                      call whatever the batch size, which bulk bodies amortize
+  * ndjson / arrow / parquet - POST /checkins/bulk with `--rows` check-ins
+                      in one body
+
+Usage:
+    python benchmarks/bulk_ingest.py --rows 100000 --single 2000
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "backend")]
+os.chdir(ROOT)
+# Keep the app offline and light: no model downloads, no file watcher
+os.environ.setdefault("ENGCARE_SKIP_MODEL_LOAD", "1")
+os.environ.setdefault("ENGCARE_WATCH_RESOURCES", "0")
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+import httpx
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def synthetic_checkins(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "user_id": [f"E{i:06d}" for i in rng.integers(0, max(1, rows // 20), rows)],
+        "department": rng.choice(["Engineering", "Design", "Marketing", "Sales", "Product", "Support"], rows),
+        "stress_level": rng.integers(0, 11, rows),
+        "work_hours": rng.integers(4, 15, rows),
+        "breaks_taken": rng.integers(0, 5, rows),
+        "productivity": rng.integers(1, 11, rows),
+    })
+
+
+def encode(frame: pd.DataFrame, fmt: str) -> bytes:
+    if fmt == "ndjson":
+        return frame.to_json(orient="records", lines=True).encode()
+    if fmt == "parquet":
+        buffer = io.BytesIO()
+        frame.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+async def run(args):
+    from main import app
+
+    frame = synthetic_checkins(args.rows)
+    results = {"rows": args.rows}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        records = frame.head(args.single).to_dict(orient="records")
+
+        start = time.perf_counter()
+        for record in records:
+            response = await client.post("/wellness-advice", json=record)
+            response.raise_for_status()
+        results["single_advice_rows_per_sec"] = len(records) / (time.perf_counter() - start)
+
+        lines = [json.dumps(record).encode() for record in records]
+        start = time.perf_counter()
+        for line in lines:
+            response = await client.post("/checkins/bulk", content=line,
+                                         headers={"content-type": CONTENT_TYPES["ndjson"]})
+            response.raise_for_status()
+        results["single_bulk_rows_per_sec"] = len(lines) / (time.perf_counter() - start)
+
+        for fmt in args.formats:
+            body = encode(frame, fmt)
+            start = time.perf_counter()
+            response = await client.post("/checkins/bulk", content=body, headers={"content-type": CONTENT_TYPES[fmt]})
+            response.raise_for_status()
+            elapsed = time.perf_counter() - start
+            report = response.json()
+            results[f"{fmt}_rows_per_sec"] = report["accepted"] / elapsed
+            results[f"{fmt}_body_mb"] = len(body) / 1e6
+
+    best = max(results[f"{fmt}_rows_per_sec"] for fmt in args.formats)
+    results["bulk_speedup_vs_single_advice"] = best / results["single_advice_rows_per_sec"]
+    print(json.dumps(results, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="check-ins per bulk body")
+    parser.add_argument("--single", type=int, default=1000, help="check-ins posted one per request")
+    parser.add_argument("--formats", nargs="+", choices=sorted(CONTENT_TYPES), default=["ndjson", "arrow", "parquet"])
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Prefill time and tokens/sec with and without the prompt-prefix KV cache
+
+Compares, over the standard prompt set:
+  * prefill: full-prompt forward pass vs. suffix-only pass on the cached prefix
+  * decode: model.generate() on the full prompt vs. PrefixCachedDecoder,
+    one request at a time and as a single batch
+
+Usage:
+    python benchmarks/llm_prefix_cache.py --model microsoft/DialoGPT-medium
+    python benchmarks/llm_prefix_cache.py --model tiny   # offline stand-in
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "backend"), os.path.dirname(os.path.abspath(__file__))]
+os.environ.setdefault("ENGCARE_SKIP_MODEL_LOAD", "1")
+
+import torch
+
+from decoding import PrefixCachedDecoder
+from llm_engine import PROMPT_PREFIX, PROMPT_SUFFIX
+from prompt_set import STANDARD_REQUESTS
+from tiny_models import load_causal_lm
+
+
+def timed(fn, repeats):
+    samples = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="microsoft/DialoGPT-medium", help="hub id, local path, or 'tiny'")
+    parser.add_argument("--max-length", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    model, tokenizer = load_causal_lm(args.model)
+    decoder = PrefixCachedDecoder(model, tokenizer, PROMPT_PREFIX)
+    suffixes = [PROMPT_SUFFIX.format(**r) for r in STANDARD_REQUESTS]
+
+    prefill_full, prefill_cached = [], []
+    for suffix in suffixes:
+        ids = tokenizer(PROMPT_PREFIX + suffix, return_tensors="pt").input_ids
+        with torch.no_grad():
+            t_full, _ = timed(lambda: model(input_ids=ids, use_cache=True), args.repeats)
+        t_cached, _ = timed(lambda: decoder.prefill([suffix]), args.repeats)
+        prefill_full.append(t_full)
+        prefill_cached.append(t_cached)
+
+    def baseline_generate():
+        tokens = 0
+        for suffix in suffixes:
+            ids = tokenizer(PROMPT_PREFIX + suffix, return_tensors="pt").input_ids
+            out = model.generate(ids, attention_mask=torch.ones_like(ids), max_length=args.max_length,
+                                 do_sample=True, temperature=0.7, top_k=50,
+                                 pad_token_id=tokenizer.eos_token_id)
+            tokens += out.shape[1] - ids.shape[1]
+        return tokens
+
+    def cached_generate():
+        return sum(len(tokenizer(decoder.generate([s], max_length=args.max_length)[0]).input_ids)
+                   for s in suffixes)
+
+    def cached_batch_generate():
+        return sum(len(tokenizer(t).input_ids)
+                   for t in decoder.generate(suffixes, max_length=args.max_length))
+
+    results = {
+        "model": args.model,
+        "prefix_tokens": decoder.prefix_length,
+        "prefill_ms_full": statistics.mean(prefill_full) * 1000,
+        "prefill_ms_cached": statistics.mean(prefill_cached) * 1000,
+    }
+    for name, fn in [("baseline", baseline_generate), ("prefix_cache", cached_generate),
+                     ("prefix_cache_batch", cached_batch_generate)]:
+        seconds, tokens = timed(fn, max(1, args.repeats // 2))
+        results[f"{name}_seconds"] = seconds
+        results[f"{name}_tokens_per_sec"] = tokens / seconds if seconds else 0.0
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
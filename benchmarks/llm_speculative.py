@@ -0,0 +1,113 @@
+"""
+End-to-end latency of speculative decoding vs. plain sampling
+
+Runs every request in the standard prompt set through PrefixCachedDecoder
+(the current serving path) and through SpeculativeDecoder with each
+lookahead, and reports per-request latency, tokens/sec and the draft
+acceptance rate. Both paths start from the cached prompt prefix, so the
+difference is the decoding loop alone.
+
+The tiny stand-ins are random, so their draft acceptance says nothing about
+the real pair; `--draft same` uses the target as its own draft to check the
+upper bound (every token accepted).
+
+Usage:
+    python benchmarks/llm_speculative.py --model microsoft/DialoGPT-medium --draft microsoft/DialoGPT-small
+    python benchmarks/llm_speculative.py --model tiny --draft tiny   # offline stand-ins
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "backend"), os.path.dirname(os.path.abspath(__file__))]
+os.environ.setdefault("ENGCARE_SKIP_MODEL_LOAD", "1")
+
+import torch
+
+from decoding import PrefixCachedDecoder, SpeculativeDecoder
+from llm_engine import PROMPT_PREFIX, PROMPT_SUFFIX
+from prompt_set import STANDARD_REQUESTS
+from tiny_models import load_causal_lm, build_causal_lm
+
+
+def load_models(args):
+    if args.model == "tiny":
+        # Target and draft must share a tokenizer, so build both on one
+        model, tokenizer = load_causal_lm("tiny", tiny_layers=8, tiny_embd=256)
+        draft = model if args.draft == "same" else build_causal_lm(tokenizer, n_layer=2, n_embd=128, seed=1)
+        return model, draft, tokenizer
+
+    model, tokenizer = load_causal_lm(args.model)
+    if args.draft == "same":
+        return model, model, tokenizer
+    draft, _ = load_causal_lm(args.draft)
+    return model, draft, tokenizer
+
+
+def run(generate, suffixes, tokenizer, repeats):
+    """Median per-request latency and overall tokens/sec"""
+    latencies, tokens, elapsed = [], 0, 0.0
+    for suffix in suffixes:
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            text = generate(suffix)
+            samples.append(time.perf_counter() - start)
+        latencies.append(statistics.median(samples))
+        tokens += len(tokenizer(text, add_special_tokens=False).input_ids)
+        elapsed += latencies[-1]
+    latencies.sort()
+    return {
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "tokens_per_sec": tokens / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="microsoft/DialoGPT-medium", help="hub id, local path, or 'tiny'")
+    parser.add_argument("--draft", default="microsoft/DialoGPT-small", help="hub id, 'tiny', or 'same'")
+    parser.add_argument("--lookahead", type=int, nargs="+", default=[2, 4, 6])
+    parser.add_argument("--max-length", type=int, default=200)
+    parser.add_argument("--greedy", action="store_true", help="greedy decoding instead of sampling")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    model, draft, tokenizer = load_models(args)
+    suffixes = [PROMPT_SUFFIX.format(**r) for r in STANDARD_REQUESTS]
+    do_sample = not args.greedy
+
+    baseline = PrefixCachedDecoder(model, tokenizer, PROMPT_PREFIX)
+    results = {
+        "model": args.model,
+        "draft": args.draft,
+        "do_sample": do_sample,
+        "baseline": run(lambda s: baseline.generate([s], max_length=args.max_length, do_sample=do_sample)[0],
+                        suffixes, tokenizer, args.repeats),
+        "speculative": {},
+    }
+
+    for lookahead in args.lookahead:
+        decoder = SpeculativeDecoder(model, draft, tokenizer, PROMPT_PREFIX, lookahead=lookahead)
+        timing = run(lambda s: decoder.generate(s, max_length=args.max_length, do_sample=do_sample),
+                     suffixes, tokenizer, args.repeats)
+        stats = decoder.stats()
+        timing["acceptance_rate"] = stats["acceptance_rate"]
+        timing["speedup_p50"] = results["baseline"]["p50_ms"] / timing["p50_ms"]
+        results["speculative"][lookahead] = timing
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
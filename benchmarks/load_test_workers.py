@@ -0,0 +1,188 @@
+"""
+Load test for the pre-fork server: memory per worker and req/s vs. workers
+
+For each worker count the script starts backend/serve.py, waits for /health,
+drives /wellness-advice from concurrent keep-alive clients for a fixed time,
+and reads RSS and PSS for the master and every worker from /proc. PSS splits
+shared pages across the processes mapping them, so flat PSS per worker while
+RSS stays at full model size shows the weights are shared, not copied.
+
+With more than one worker serve.py also forks a state owner before the
+workers; it is reported on its own rather than as a worker.
+
+Usage:
+    python benchmarks/load_test_workers.py --workers 1 2 4 --duration 20
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAYLOAD = json.dumps({
+    "stress_level": 7,
+    "work_hours": 10,
+    "breaks_taken": 1,
+    "productivity": 5
+})
+
+
+def read_memory_kb(pid: int) -> Dict[str, int]:
+    """RSS and PSS in kB from smaps_rollup (Linux only)"""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    values[key.lower()] = int(rest.split()[0])
+    except FileNotFoundError:
+        pass
+    return values
+
+
+def child_pids(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def connect(port: int) -> http.client.HTTPConnection:
+    """Keep-alive connection with Nagle disabled so small POSTs are not delayed"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    conn.connect()
+    conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return conn
+
+
+def wait_until_ready(port: int, timeout: float) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def drive_load(port: int, clients: int, duration: float) -> Dict[str, float]:
+    """Hammer /wellness-advice from `clients` threads for `duration` seconds"""
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client():
+        conn = connect(port)
+        local = []
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                conn.request("POST", "/wellness-advice", body=PAYLOAD,
+                             headers={"Content-Type": "application/json"})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    raise OSError(response.status)
+                local.append(time.perf_counter() - start)
+            except OSError:
+                with lock:
+                    errors[0] += 1
+                conn.close()
+                conn = connect(port)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "req_per_sec": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else None,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else None,
+    }
+
+
+def run_one(workers: int, args) -> Dict:
+    env = dict(os.environ)
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "backend", "serve.py"),
+         "--workers", str(workers), "--port", str(args.port), "--log-level", "warning"],
+        cwd=ROOT, env=env
+    )
+    try:
+        if not wait_until_ready(args.port, args.startup_timeout):
+            raise RuntimeError(f"server with {workers} workers did not become ready")
+
+        load = drive_load(args.port, args.clients or workers * 2, args.duration)
+        children = child_pids(proc.pid)
+        # The owner is forked first, so it has the lowest pid
+        owner = children.pop(0) if workers > 1 and children else None
+        worker_memory = [read_memory_kb(pid) for pid in children]
+
+        return {
+            "workers": workers,
+            "master": read_memory_kb(proc.pid),
+            "state_owner": read_memory_kb(owner) if owner else None,
+            "worker_memory": worker_memory,
+            "avg_worker_rss_mb": sum(m.get("rss", 0) for m in worker_memory) / max(len(worker_memory), 1) / 1024,
+            "avg_worker_pss_mb": sum(m.get("pss", 0) for m in worker_memory) / max(len(worker_memory), 1) / 1024,
+            **load,
+        }
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=None, help="concurrent clients (default: 2 x workers)")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--output", default=None, help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = [run_one(workers, args) for workers in args.workers]
+
+    print(f"{'workers':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'RSS/worker MB':>14} {'PSS/worker MB':>14}")
+    for r in results:
+        print(f"{r['workers']:>7} {r['req_per_sec']:>8.2f} {r['p50_ms'] or 0:>8.1f} {r['p95_ms'] or 0:>8.1f} "
+              f"{r['avg_worker_rss_mb']:>14.1f} {r['avg_worker_pss_mb']:>14.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
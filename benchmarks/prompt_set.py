@@ -0,0 +1,12 @@
+"""Standard /wellness-advice inputs shared by the LLM benchmarks"""
+
+STANDARD_REQUESTS = [
+    {"stress_level": 2, "work_hours": 7, "breaks_taken": 3, "productivity": 8},
+    {"stress_level": 4, "work_hours": 8, "breaks_taken": 2, "productivity": 7},
+    {"stress_level": 5, "work_hours": 9, "breaks_taken": 2, "productivity": 6},
+    {"stress_level": 6, "work_hours": 10, "breaks_taken": 1, "productivity": 6},
+    {"stress_level": 7, "work_hours": 10, "breaks_taken": 1, "productivity": 5},
+    {"stress_level": 8, "work_hours": 11, "breaks_taken": 1, "productivity": 4},
+    {"stress_level": 9, "work_hours": 12, "breaks_taken": 0, "productivity": 3},
+    {"stress_level": 10, "work_hours": 14, "breaks_taken": 0, "productivity": 2},
+]
@@ -0,0 +1,141 @@
+"""
+RAG retrieval throughput: one encode per request vs. micro-batched encoding
+
+At each concurrency level, N concurrent clients issue unique (uncached)
+queries for a fixed time, either through retrieve_resources on the thread
+pool (one encode call per query) or through retrieve_resources_async, which
+coalesces concurrent queries into one encode and one similarity product.
+
+Usage:
+    python benchmarks/rag_microbatch.py --concurrency 1 4 16 64
+    python benchmarks/rag_microbatch.py --model tiny --corpus 5000   # offline stand-in
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "backend"), os.path.dirname(os.path.abspath(__file__))]
+os.chdir(ROOT)
+
+from rag_engine import RAGEngine
+from telemetry import registry
+
+SITUATIONS = [
+    "I can't stop thinking about the release deadline",
+    "pager duty kept me up all night",
+    "too many meetings and no time to code",
+    "my manager keeps changing priorities",
+    "I feel isolated working remotely",
+]
+
+
+def load_engine(args) -> RAGEngine:
+    encoder = None
+    if args.model == "tiny":
+        from tiny_models import TinySentenceEncoder
+        encoder = TinySentenceEncoder()
+    elif args.model != "all-MiniLM-L6-v2":
+        from sentence_transformers import SentenceTransformer
+        encoder = SentenceTransformer(args.model)
+    engine = RAGEngine(embedding_model=encoder)
+
+    if args.corpus > len(engine.resource_texts):
+        # Pad the index with synthetic chunks to a realistic size
+        base = [r["data"] for r in engine.resource_texts if r["category"] == "self_help_tools"]
+        padding = [
+            ("self_help_tools", dict(base[i % len(base)], tool_id=f"SYN-{i}",
+                                     benefit=f"{base[i % len(base)].get('benefit', '')} (note {i})"))
+            for i in range(args.corpus - len(engine.resource_texts))
+        ]
+        engine.upsert_resources(padding, persist=False)
+    return engine
+
+
+async def drive(fetch, concurrency: int, duration: float):
+    counter = itertools.count()
+    latencies = []
+    stop_at = time.perf_counter() + duration
+
+    async def client():
+        while time.perf_counter() < stop_at:
+            n = next(counter)
+            query = f"{SITUATIONS[n % len(SITUATIONS)]} #{n}"
+            start = time.perf_counter()
+            await fetch(query)
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "queries_per_sec": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+def batch_totals():
+    """(sum, count) of the rag micro-batch size histogram so far"""
+    total = count = 0.0
+    for line in registry.render().splitlines():
+        if line.startswith('engcare_micro_batch_size_sum{batcher="rag"}'):
+            total = float(line.split()[-1])
+        elif line.startswith('engcare_micro_batch_size_count{batcher="rag"}'):
+            count = float(line.split()[-1])
+    return total, count
+
+
+async def run(engine: RAGEngine, args):
+    pool = ThreadPoolExecutor(max_workers=max(args.concurrency))
+    loop = asyncio.get_running_loop()
+
+    async def per_request(query):
+        return await loop.run_in_executor(pool, engine.retrieve_resources, query)
+
+    results = []
+    for concurrency in args.concurrency:
+        single = await drive(per_request, concurrency, args.duration)
+        before = batch_totals()
+        batched = await drive(engine.retrieve_resources_async, concurrency, args.duration)
+        after = batch_totals()
+        batches = after[1] - before[1]
+        results.append({
+            "concurrency": concurrency,
+            "per_request": single,
+            "micro_batched": batched,
+            "mean_batch_size": (after[0] - before[0]) / batches if batches else 0.0,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="sentence-transformers id or 'tiny'")
+    parser.add_argument("--corpus", type=int, default=0, help="pad the index to this many chunks")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(load_engine(args), args))
+
+    print(f"{'clients':>7} {'per-req q/s':>12} {'batched q/s':>12} {'p95 ms':>8} {'batched p95':>12} {'avg batch':>10}")
+    for r in results:
+        print(f"{r['concurrency']:>7} {r['per_request']['queries_per_sec']:>12.1f} "
+              f"{r['micro_batched']['queries_per_sec']:>12.1f} {r['per_request']['p95_ms']:>8.1f} "
+              f"{r['micro_batched']['p95_ms']:>12.1f} {r['mean_batch_size']:>10.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Backend benchmark suite: component microbenchmarks plus an in-process load test
+
+Microbenchmarks (mean / p50 / p95 latency and calls/sec):
+  * llm_generate      - LLMEngine.generate_wellness_advice over the standard
+                        prompt set
+  * rag_retrieve      - RAGEngine.retrieve_resources, a new query each call
+  * rag_retrieve_cached - the same query repeatedly (query cache hit)
+  * stress_risk       - StressAnalyzer.predict_stress_risk (random forest)
+  * text_stress       - TextStressClassifier.analyze on check-in notes
+  * crisis_detect     - CrisisDetector.detect_crisis_patterns
+  * employee_coach    - EmployeeCoach.get_personalized_tips
+  * company_advisor   - CompanyAdvisor.get_company_recommendations
+
+Load test: `--concurrency` async clients post /wellness-advice to the
+FastAPI app through the httpx ASGI transport (no sockets) for `--duration`
+seconds per level, reporting req/s, p50/p95/p99 latency and errors.
+
+`--models tiny` (the default) swaps the LLM and the RAG encoder for the
+randomly initialised stand-ins from tiny_models.py, so the suite runs
+offline; numbers are only comparable between runs with the same --models.
+Results are written to benchmarks/results/<commit>-<models>.json.
+`--compare` checks the run against an earlier file and exits 1 when any
+benchmark is slower by more than `--tolerance`.
+
+Usage:
+    python benchmarks/suite.py                                   # tiny models, everything
+    python benchmarks/suite.py --only rag_retrieve crisis_detect --no-load
+    python benchmarks/suite.py --compare benchmarks/results/1a2b3c4-tiny.json
+    python benchmarks/suite.py --models real                     # DialoGPT + MiniLM from the hub
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+sys.path[:0] = [ROOT, os.path.join(ROOT, "backend"), BENCH_DIR]
+
+NOTES = [
+    "Deadline tomorrow and the build is still red, I have not slept properly in days",
+    "Quiet week, finished the refactor early and went for a run at lunch",
+    "Too many meetings again, no time to actually write code",
+    "Feeling okay, a bit tired after the release but the team is great",
+]
+EMPLOYEE_PROFILES = [
+    {"stress_level": 8, "work_hours": 11, "breaks_taken": 1, "productivity": 4, "meeting_count": 7},
+    {"stress_level": 3, "work_hours": 8, "breaks_taken": 3, "productivity": 8, "meeting_count": 2},
+    {"stress_level": 6, "work_hours": 10, "breaks_taken": 1, "productivity": 6, "meeting_count": 5},
+]
+DEPARTMENTS = [
+    {"department": "Engineering", "avg_stress": 7.5, "attrition_rate": 18.0, "team_size": 120},
+    {"department": "Design", "avg_stress": 4.0, "attrition_rate": 6.0, "team_size": 25},
+    {"department": "Sales", "avg_stress": 6.2, "attrition_rate": 12.0, "team_size": 60},
+]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency statistics in milliseconds from per-call seconds"""
+    ordered = sorted(samples)
+    percentile = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    mean = statistics.fmean(ordered)
+    return {
+        "runs": len(ordered),
+        "mean_ms": mean * 1000,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "ops_per_sec": 1.0 / mean if mean > 0 else None,
+    }
+
+
+def measure(fn: Callable[[int], object], min_time: float, min_runs: int = 5, max_runs: int = 100_000) -> Dict[str, float]:
+    """
+    Time `fn(i)` until both `min_time` seconds and `min_runs` calls are reached
+
+    One untimed warm-up call runs first (lazy imports, caches, allocator).
+    """
+    fn(0)
+    samples = []
+    deadline = time.perf_counter() + min_time
+    i = 1
+    while (len(samples) < min_runs or time.perf_counter() < deadline) and len(samples) < max_runs:
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+        i += 1
+    return summarize(samples)
+
+
+def use_tiny_models(llm_engine, rag_engine):
+    """Swap the global engines onto the offline stand-ins"""
+    from tiny_models import TinySentenceEncoder, load_causal_lm
+
+    model, tokenizer = load_causal_lm("tiny")
+    llm_engine.use_model(model, tokenizer)
+    rag_engine.use_encoder(TinySentenceEncoder())
+
+
+def component_benchmarks(main) -> Dict[str, Callable[[int], object]]:
+    from ai_models.company_advisor import company_advisor
+    from ai_models.crisis_detector import crisis_detector
+    from ai_models.employee_coach import employee_coach
+    from prompt_set import STANDARD_REQUESTS
+
+    llm_engine, rag_engine = main.llm_engine, main.rag_engine
+    benchmarks = {
+        "llm_generate": lambda i: llm_engine.generate_wellness_advice(**STANDARD_REQUESTS[i % len(STANDARD_REQUESTS)]),
+        # A new query string each call so the query cache never hits
+        "rag_retrieve": lambda i: rag_engine.retrieve_resources(f"{NOTES[i % len(NOTES)]} (check-in {i})"),
+        "rag_retrieve_cached": lambda i: rag_engine.retrieve_resources(NOTES[0]),
+        "stress_risk": lambda i: main.stress_analyzer.predict_stress_risk(8 + i % 5, 3 + i % 4, i % 3, 4 + i % 6),
+        "crisis_detect": lambda i: crisis_detector.detect_crisis_patterns(EMPLOYEE_PROFILES[i % len(EMPLOYEE_PROFILES)]),
+        "employee_coach": lambda i: employee_coach.get_personalized_tips(EMPLOYEE_PROFILES[i % len(EMPLOYEE_PROFILES)]),
+        "company_advisor": lambda i: company_advisor.get_company_recommendations(DEPARTMENTS[i % len(DEPARTMENTS)]),
+    }
+    if main.text_stress_classifier is not None:
+        benchmarks["text_stress"] = lambda i: main.text_stress_classifier.analyze(NOTES[i % len(NOTES)])
+    return benchmarks
+
+
+async def load_level(app, concurrency: int, duration: float) -> Dict[str, float]:
+    """Closed-loop load: each client posts its next request as soon as the last returns"""
+    import httpx
+    from prompt_set import STANDARD_REQUESTS
+
+    latencies, errors = [], 0
+    stop = time.perf_counter() + duration
+
+    async def client_loop(client, worker: int):
+        nonlocal errors
+        i = worker
+        while time.perf_counter() < stop:
+            payload = STANDARD_REQUESTS[i % len(STANDARD_REQUESTS)]
+            start = time.perf_counter()
+            try:
+                response = await client.post("/wellness-advice", json=payload)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+            i += concurrency
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client, worker) for worker in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = {"concurrency": concurrency, "requests": len(latencies), "errors": errors,
+              "requests_per_sec": len(latencies) / elapsed}
+    if latencies:
+        stats = summarize(latencies)
+        result.update({key: stats[key] for key in ("mean_ms", "p50_ms", "p95_ms", "p99_ms")})
+    return result
+
+
+def git_revision() -> Dict[str, object]:
+    def git(*args) -> Optional[str]:
+        try:
+            return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {"commit": git("rev-parse", "--short", "HEAD"),
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def compare(baseline: Dict, current: Dict, tolerance: float) -> List[Dict[str, object]]:
+    """
+    Per-benchmark ratios of current to baseline
+
+    Microbenchmarks compare mean latency, load levels compare req/s at the
+    same concurrency; a ratio above 1 + tolerance is slower and counts as a
+    regression. Benchmarks missing from either run are skipped.
+    """
+    rows = []
+    for name, stats in current.get("benchmarks", {}).items():
+        old = baseline.get("benchmarks", {}).get(name)
+        if old and old.get("mean_ms"):
+            ratio = stats["mean_ms"] / old["mean_ms"]
+            rows.append({"name": name, "metric": "mean_ms", "baseline": old["mean_ms"],
+                         "current": stats["mean_ms"], "ratio": ratio, "regression": ratio > 1 + tolerance})
+
+    old_load = {level["concurrency"]: level for level in baseline.get("load", [])}
+    for level in current.get("load", []):
+        old = old_load.get(level["concurrency"])
+        if old and level["requests_per_sec"]:
+            ratio = old["requests_per_sec"] / level["requests_per_sec"]
+            rows.append({"name": f"load_c{level['concurrency']}", "metric": "requests_per_sec",
+                         "baseline": old["requests_per_sec"], "current": level["requests_per_sec"],
+                         "ratio": ratio, "regression": ratio > 1 + tolerance})
+    return rows
+
+
+def run(args) -> Dict:
+    # Keep the app offline and light; with real models the engines load as usual
+    os.chdir(ROOT)
+    os.environ.setdefault("ENGCARE_WATCH_RESOURCES", "0")
+    if args.models == "tiny":
+        os.environ.setdefault("ENGCARE_SKIP_MODEL_LOAD", "1")
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+    start = time.perf_counter()
+    import main
+    startup = time.perf_counter() - start
+    if args.models == "tiny":
+        use_tiny_models(main.llm_engine, main.rag_engine)
+
+    import torch
+    results = {
+        "meta": {
+            **git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "models": args.models,
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "torch_threads": torch.get_num_threads(),
+            "app_import_seconds": startup,
+        },
+        "benchmarks": {},
+        "load": [],
+    }
+
+    for name, fn in component_benchmarks(main).items():
+        if args.only and name not in args.only:
+            continue
+        stats = measure(fn, args.min_time, args.min_runs)
+        results["benchmarks"][name] = stats
+        print(f"{name:<20} {stats['mean_ms']:9.3f} ms mean  {stats['p95_ms']:9.3f} ms p95  "
+              f"{stats['ops_per_sec']:10.1f}/s  ({stats['runs']} runs)")
+
+    if not args.no_load:
+        for concurrency in args.concurrency:
+            level = asyncio.run(load_level(main.app, concurrency, args.duration))
+            results["load"].append(level)
+            print(f"load c={concurrency:<4} {level['requests_per_sec']:9.1f} req/s  "
+                  f"p50 {level.get('p50_ms', 0):8.1f} ms  p99 {level.get('p99_ms', 0):8.1f} ms  "
+                  f"{level['errors']} errors")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", choices=["tiny", "real"], default="tiny")
+    parser.add_argument("--only", nargs="+", help="microbenchmarks to run (default: all)")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds per microbenchmark")
+    parser.add_argument("--min-runs", type=int, default=5)
+    parser.add_argument("--no-load", action="store_true", help="skip the load test")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per load level")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before failing --compare")
+    args = parser.parse_args()
+
+    results = run(args)
+    meta = results["meta"]
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{meta['commit'] or 'unknown'}{'-dirty' if meta['dirty'] else ''}-{args.models}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("models") != args.models:
+            print(f"⚠️ Baseline used --models {baseline['meta'].get('models')}, this run {args.models}")
+        rows = compare(baseline, results, args.tolerance)
+        for row in rows:
+            flag = "REGRESSION" if row["regression"] else ""
+            print(f"{row['name']:<20} {row['metric']:<17} {row['baseline']:10.3f} -> {row['current']:10.3f}  "
+                  f"x{row['ratio']:.2f} {flag}")
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
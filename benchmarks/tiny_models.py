@@ -0,0 +1,93 @@
+"""
+Tiny offline stand-ins for the Hugging Face models
+
+The benchmarks exercise the real decoding and retrieval code paths, so they
+need a causal LM and tokenizer with the DialoGPT interfaces. When the real
+checkpoints cannot be downloaded these build small randomly initialised GPT-2
+models and a byte-level BPE tokenizer trained on the prompt vocabulary, so the
+benchmarks run without network access. Timings from them only compare code
+paths against each other; they say nothing about real model latency.
+"""
+from typing import Tuple
+
+PROMPT_CORPUS = [
+    "You are a wellness coach for engineers.",
+    "Stress Level: 7/10 Work Hours: 10 Breaks: 1 Productivity: 5/10",
+    "Give 2-3 wellness tips: take a short walk, drink water, breathe slowly.",
+    "Try the 4-7-8 breathing technique and step away from the screen.",
+]
+
+
+def build_tokenizer(vocab_size: int = 512):
+    from tokenizers import ByteLevelBPETokenizer
+    from transformers import PreTrainedTokenizerFast
+
+    bpe = ByteLevelBPETokenizer()
+    bpe.train_from_iterator(PROMPT_CORPUS * 50, vocab_size=vocab_size, min_frequency=1,
+                            special_tokens=["<|endoftext|>"])
+    return PreTrainedTokenizerFast(tokenizer_object=bpe._tokenizer, eos_token="<|endoftext|>")
+
+
+def build_causal_lm(tokenizer, n_layer: int = 4, n_embd: int = 128, n_head: int = 4, seed: int = 0):
+    import torch
+    from transformers import GPT2Config, GPT2LMHeadModel
+
+    torch.manual_seed(seed)
+    config = GPT2Config(
+        vocab_size=len(tokenizer),
+        n_positions=512,
+        n_layer=n_layer,
+        n_embd=n_embd,
+        n_head=n_head,
+        bos_token_id=tokenizer.eos_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+    )
+    return GPT2LMHeadModel(config).eval()
+
+
+def load_causal_lm(name: str, tiny_layers: int = 4, tiny_embd: int = 128) -> Tuple[object, object]:
+    """Load `name` from the hub, or build a tiny stand-in when name == 'tiny'"""
+    if name == "tiny":
+        tokenizer = build_tokenizer()
+        return build_causal_lm(tokenizer, n_layer=tiny_layers, n_embd=tiny_embd), tokenizer
+
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(name)
+    return AutoModelForCausalLM.from_pretrained(name).eval(), tokenizer
+
+
+class TinySentenceEncoder:
+    """
+    Random mean-pooled transformer with the SentenceTransformer.encode interface
+
+    Batch cost grows sub-linearly with batch size like the real encoder, which
+    is what the retrieval benchmarks measure.
+    """
+
+    def __init__(self, dim: int = 384, n_layer: int = 2, n_head: int = 6, seed: int = 0):
+        import torch
+        from transformers import GPT2Config, GPT2Model
+
+        torch.manual_seed(seed)
+        self.tokenizer = build_tokenizer()
+        self.tokenizer.pad_token = self.tokenizer.eos_token
+        config = GPT2Config(vocab_size=len(self.tokenizer), n_positions=128, n_layer=n_layer,
+                            n_embd=dim, n_head=n_head, bos_token_id=self.tokenizer.eos_token_id,
+                            eos_token_id=self.tokenizer.eos_token_id)
+        self.model = GPT2Model(config).eval()
+
+    def encode(self, sentences, convert_to_numpy: bool = True, batch_size: int = 32):
+        import torch
+
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        outputs = []
+        with torch.no_grad():
+            for start in range(0, len(texts), batch_size):
+                batch = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                       max_length=128, return_tensors="pt")
+                hidden = self.model(**batch).last_hidden_state
+                mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                outputs.append((hidden * mask).sum(1) / mask.sum(1))
+        vectors = torch.cat(outputs).numpy()
+        return vectors[0] if single else vectors
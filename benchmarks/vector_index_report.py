@@ -0,0 +1,95 @@
+"""
+Memory and recall@k of the compressed RAG index modes against exact float32
+
+Builds every configuration over the same corpus, runs the same queries, and
+reports bytes per vector, resident memory, recall@k relative to exact float32
+search, and query latency. By default the corpus is synthetic (clustered,
+with a decaying spectrum like sentence embeddings); pass --embeddings with a
+saved [n, dim] .npy of real MiniLM vectors for representative numbers.
+
+Usage:
+    python benchmarks/vector_index_report.py --n 200000 --k 10
+    python benchmarks/vector_index_report.py --embeddings kb_vectors.npy --configs int8 binary int8:128
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+import numpy as np
+
+from vector_store import VectorIndex
+
+DEFAULT_CONFIGS = ["float32", "int8", "binary", "binary-mmap", "float32:128", "int8:128", "int8:64"]
+
+
+def synthetic_corpus(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(n // 500, 10), dim))
+    points = centers[rng.integers(0, len(centers), n)] + 0.4 * rng.normal(size=(n, dim))
+    return (points * np.geomspace(1.0, 0.05, dim)).astype(np.float32)
+
+
+def parse_config(config: str):
+    """'int8:128' -> ('int8', 128, False); 'binary-mmap' keeps rescoring vectors on disk"""
+    name, _, dims = config.partition(":")
+    mmap = name.endswith("-mmap")
+    return name.replace("-mmap", ""), int(dims) if dims else None, mmap
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--embeddings", default=None, help=".npy file of corpus vectors")
+    parser.add_argument("--n", type=int, default=100000, help="synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--configs", nargs="+", default=DEFAULT_CONFIGS, help="mode[:pca_dims], e.g. int8:128")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    corpus = np.load(args.embeddings).astype(np.float32) if args.embeddings else synthetic_corpus(args.n, args.dim)
+    rng = np.random.default_rng(1)
+    picks = rng.choice(len(corpus), args.queries, replace=False)
+    queries = corpus[picks] + 0.1 * corpus.std() * rng.normal(size=(args.queries, corpus.shape[1]))
+
+    exact, _ = VectorIndex().fit(corpus).search(queries, args.k)
+    tmpdir = tempfile.mkdtemp(prefix="engcare-index-")
+
+    results = []
+    for config in args.configs:
+        mode, dims, mmap = parse_config(config)
+        index = VectorIndex(mode=mode, dims=dims)
+        index.fit(corpus, rescore_path=os.path.join(tmpdir, f"{config}.npy") if mmap else None)
+
+        start = time.perf_counter()
+        found, _ = index.search(queries, args.k)
+        ms_per_query = (time.perf_counter() - start) * 1000 / len(queries)
+
+        memory = index.memory_bytes()
+        results.append({
+            "config": config,
+            "bytes_per_vector": memory["codes"] / len(corpus),
+            "resident_mb": memory["resident"] / 1e6,
+            f"recall@{args.k}": float(np.mean([len(set(a) & set(b)) / args.k for a, b in zip(exact, found)])),
+            "ms_per_query": ms_per_query,
+        })
+
+    print(f"corpus: {len(corpus)} x {corpus.shape[1]} ({corpus.nbytes / 1e6:.1f} MB as float32)")
+    print(f"{'config':>14} {'B/vector':>9} {'resident MB':>12} {'recall@' + str(args.k):>10} {'ms/query':>9}")
+    for r in results:
+        print(f"{r['config']:>14} {r['bytes_per_vector']:>9.1f} {r['resident_mb']:>12.1f} "
+              f"{r[f'recall@{args.k}']:>10.3f} {r['ms_per_query']:>9.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
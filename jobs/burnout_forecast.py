@@ -0,0 +1,118 @@
+"""
+Population burnout forecast: fit every employee's trend and flag who is heading for a crisis
+
+Fits BurnoutForecaster (damped Holt smoothing, vectorized across employees)
+on the daily stress history in the EngCare database, or on synthetic stress
+and hours series, projects `--horizon` days ahead and runs CrisisDetector
+with the projection for employees whose projected risk crosses
+`--alert-risk`. Prints fit and incremental-update timings.
+
+Usage:
+    python jobs/burnout_forecast.py --db data/engcare.db --output forecasts.parquet
+    python jobs/burnout_forecast.py --synthetic 100000 --days 365        # scale check
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+from ai_models.burnout_forecaster import BurnoutForecaster
+from ai_models.crisis_detector import crisis_detector
+
+logger = logging.getLogger(__name__)
+
+
+def synthetic_history(employees: int, days: int, seed: int = 0) -> np.ndarray:
+    """[employees, days, 2] stress (0-10) and hours with drifting trends and missed days"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(days, dtype=np.float32)
+    base = rng.uniform(3, 7, (employees, 1, 2)).astype(np.float32) * np.array([1, 1.4], dtype=np.float32)
+    drift = rng.normal(0, 0.004, (employees, 1, 2)).astype(np.float32)
+    history = base + drift * t[None, :, None] + rng.normal(0, 0.8, (employees, days, 2)).astype(np.float32)
+    history[rng.random((employees, days)) < 0.3] = np.nan  # no check-in that day
+    return history
+
+
+def load_history(db_path: str, days: int):
+    # Imported here so synthetic runs need no database
+    sys.path.insert(0, os.path.join(ROOT, "backend"))
+    from analytics import WellnessAnalytics
+    from user_store import UserStore
+
+    users, stress = WellnessAnalytics(UserStore(db_path)).daily_stress_matrix(days)
+    return users, stress * 10  # analytics stores stress on a 0-1 scale
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=None, help="EngCare SQLite database")
+    parser.add_argument("--synthetic", type=int, default=None, metavar="EMPLOYEES")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--horizon", type=int, default=7)
+    parser.add_argument("--alert-risk", type=float, default=0.7)
+    parser.add_argument("--output", default=None, help=".parquet or .csv of flagged employees")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.synthetic:
+        history = synthetic_history(args.synthetic, args.days)
+        employee_ids = [f"E{i:07d}" for i in range(args.synthetic)]
+        forecaster = BurnoutForecaster()
+    else:
+        employee_ids, history = load_history(args.db or "data/engcare.db", args.days)
+        forecaster = BurnoutForecaster(series=("stress_level",))
+
+    # Fit on all but the last day, then fold that day in the way the nightly
+    # run does, so every day is applied exactly once
+    start = time.perf_counter()
+    forecaster.fit(employee_ids, history[:, :-1])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    forecaster.update(employee_ids, history[:, -1] if history.ndim == 3 else history[:, -1:])
+    update_seconds = time.perf_counter() - start
+
+    risk = forecaster.projected_risk(args.horizon)
+    flagged = np.flatnonzero(risk >= args.alert_risk)
+    level = forecaster.level[:len(forecaster)]
+
+    alerts = []
+    for row in flagged:
+        employee_id = employee_ids[row]
+        current = {name: float(level[row, i]) for i, name in enumerate(forecaster.series)}
+        result = crisis_detector.detect_crisis_patterns(
+            current, forecast=forecaster.employee_forecast(employee_id, args.horizon)
+        )
+        alerts.append({"employee_id": employee_id, "projected_risk": float(risk[row]),
+                       "crisis_level": result["crisis_level"], "risk_factors": ",".join(result["risk_factors"]),
+                       "alert_required": result["alert_required"]})
+
+    report = {
+        "employees": len(employee_ids),
+        "days": int(history.shape[1]),
+        "fit_seconds": fit_seconds,
+        "daily_update_seconds": update_seconds,
+        "horizon_days": args.horizon,
+        "flagged": len(alerts),
+        "alerts_required": sum(a["alert_required"] for a in alerts),
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        frame = pd.DataFrame(alerts)
+        if args.output.endswith(".parquet"):
+            frame.to_parquet(args.output, index=False)
+        else:
+            frame.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+Nightly organisation screening: score every check-in and advise every department
+
+Streams employee check-ins from CSV or Parquet in chunks and shards the chunks
+across a process pool. Each worker scores its chunk in one vectorized pass
+(StressAnalyzer risk probability, CrisisDetector risk score and level,
+EmployeeCoach focus; see ai_models/batch_scoring.py), writes the scored rows
+to parts/part-NNNNN.parquet and returns per-department partial sums. The
+partials are merged and fed to CompanyAdvisor once per department.
+
+Every finished chunk leaves a .json checkpoint next to its part file, so
+rerunning the same command after an interruption only scores the missing
+chunks. Use --restart to discard the checkpoints.
+
+Input columns: employee_id, department, stress_level, work_hours,
+breaks_taken, productivity; optional meeting_count and attrited (0/1).
+
+Usage:
+    python jobs/org_screening.py --generate 2000000 checkins.parquet   # synthetic input
+    python jobs/org_screening.py checkins.parquet --output screening/ --workers 8
+    python jobs/org_screening.py checkins.csv --output screening/ --scaling 1 2 4 8
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "backend")]
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+from ai_models.batch_scoring import score_checkins
+from ai_models.company_advisor import company_advisor
+from ai_models.crisis_detector import crisis_detector
+from stress_analyzer import stress_analyzer
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ["employee_id", "department", "stress_level", "work_hours", "breaks_taken", "productivity"]
+DEPARTMENTS = ["Engineering", "Design", "Marketing", "Sales", "Product", "Support"]
+
+
+def read_chunks(path: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    if path.endswith(".parquet"):
+        if not HAS_PYARROW:
+            raise RuntimeError("Reading Parquet needs pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+
+
+def _write_atomic(path: str, write):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def _dump_json(data: Dict[str, Any], path: str):
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def department_partials(scored: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Mergeable per-department sums for one chunk"""
+    partials = {}
+    for department, group in scored.groupby("department", sort=False):
+        employees = group["employee_id"].astype(str)
+        partials[str(department)] = {
+            "checkins": int(len(group)),
+            "stress_sum": float(group["stress_level"].sum()),
+            "needs_intervention": int(group["needs_intervention"].sum()),
+            "alerts": int(group["alert_required"].sum()),
+            "employees": employees.unique().tolist(),
+            "attrited": (employees[group["attrited"].astype(bool)].unique().tolist()
+                         if "attrited" in group else None),
+        }
+    return partials
+
+
+def score_chunk(index: int, frame: pd.DataFrame, parts_dir: str) -> Dict[str, Any]:
+    """Worker: score one chunk, write its part file and checkpoint"""
+    missing = [c for c in REQUIRED_COLUMNS if c not in frame]
+    if missing:
+        raise ValueError(f"Check-in data is missing columns {missing}")
+
+    result = score_checkins({c: frame[c].to_numpy() for c in frame.columns}, crisis_detector, stress_analyzer)
+    scored = frame.assign(**result)
+
+    stem = os.path.join(parts_dir, f"part-{index:05d}")
+    _write_atomic(stem + ".parquet", lambda tmp: scored.to_parquet(tmp, index=False))
+    checkpoint = {"chunk": index, "rows": len(frame), "departments": department_partials(scored)}
+    # Written last: a chunk counts as done only once its part file is complete
+    _write_atomic(stem + ".json", lambda tmp: _dump_json(checkpoint, tmp))
+    return checkpoint
+
+
+def merge_partials(totals: Dict[str, Dict[str, Any]], partials: Dict[str, Dict[str, Any]]):
+    for department, part in partials.items():
+        total = totals.setdefault(department, {"checkins": 0, "stress_sum": 0.0, "needs_intervention": 0,
+                                               "alerts": 0, "employees": set(), "attrited": None})
+        for key in ("checkins", "stress_sum", "needs_intervention", "alerts"):
+            total[key] += part[key]
+        total["employees"].update(part["employees"])
+        if part["attrited"] is not None:
+            total["attrited"] = (total["attrited"] or set()) | set(part["attrited"])
+
+
+def advise_departments(totals: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    """One CompanyAdvisor call per department, from the merged sums"""
+    rows = []
+    for department, total in sorted(totals.items()):
+        team_size = len(total["employees"])
+        department_data = {
+            "department": department,
+            "avg_stress": total["stress_sum"] / total["checkins"],
+            "team_size": team_size,
+        }
+        if total["attrited"] is not None:
+            department_data["attrition_rate"] = 100.0 * len(total["attrited"]) / max(team_size, 1)
+
+        advice = company_advisor.get_company_recommendations(department_data)
+        rows.append({
+            **department_data,
+            "attrition_rate": advice["key_metrics"]["attrition_rate"],
+            "checkins": total["checkins"],
+            "needs_intervention_ratio": total["needs_intervention"] / total["checkins"],
+            "crisis_alerts": total["alerts"],
+            "urgency_level": advice["urgency_level"],
+            "wellness_score": advice["wellness_score"],
+            "recommendations": advice["recommendations"],
+            "suggested_policies": [p["name"] for p in advice["suggested_policies"]],
+        })
+    return pd.DataFrame(rows)
+
+
+def _prepare_output(input_path: str, output: str, chunk_rows: int, restart: bool) -> str:
+    """Parts directory, cleared unless the checkpoints belong to this same input"""
+    parts_dir = os.path.join(output, "parts")
+    stat = os.stat(input_path)
+    manifest = {"input": os.path.abspath(input_path), "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns, "chunk_rows": chunk_rows}
+    manifest_path = os.path.join(output, "manifest.json")
+
+    if os.path.exists(manifest_path) and not restart:
+        with open(manifest_path) as f:
+            if json.load(f) != manifest:
+                raise RuntimeError(f"{output} holds checkpoints for a different input or chunk size; "
+                                   f"pass --restart to discard them")
+    elif os.path.exists(parts_dir):
+        shutil.rmtree(parts_dir)
+
+    os.makedirs(parts_dir, exist_ok=True)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return parts_dir
+
+
+def run_job(input_path: str, output: str, workers: int = os.cpu_count() or 1,
+            chunk_rows: int = 100_000, restart: bool = False) -> Dict[str, Any]:
+    """
+    Score the input, write departments.parquet and return the run report
+
+    Returns:
+        Dictionary with row counts, throughput and the output paths
+    """
+    parts_dir = _prepare_output(input_path, output, chunk_rows, restart)
+    totals: Dict[str, Dict[str, Any]] = {}
+    rows = resumed_rows = chunks = resumed_chunks = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for index, frame in enumerate(read_chunks(input_path, chunk_rows)):
+            checkpoint_path = os.path.join(parts_dir, f"part-{index:05d}.json")
+            if os.path.exists(checkpoint_path):
+                with open(checkpoint_path) as f:
+                    checkpoint = json.load(f)
+                merge_partials(totals, checkpoint["departments"])
+                resumed_rows += checkpoint["rows"]
+                resumed_chunks += 1
+                continue
+
+            # Keep at most two chunks per worker in memory
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    checkpoint = future.result()
+                    merge_partials(totals, checkpoint["departments"])
+                    rows += checkpoint["rows"]
+                    chunks += 1
+            pending.add(pool.submit(score_chunk, index, frame, parts_dir))
+
+        for future in pending:
+            checkpoint = future.result()
+            merge_partials(totals, checkpoint["departments"])
+            rows += checkpoint["rows"]
+            chunks += 1
+
+    departments_path = os.path.join(output, "departments.parquet")
+    if totals:
+        advise_departments(totals).to_parquet(departments_path, index=False)
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "input": input_path,
+        "workers": workers,
+        "chunk_rows": chunk_rows,
+        "rows_scored": rows,
+        "chunks_scored": chunks,
+        "rows_resumed": resumed_rows,
+        "chunks_resumed": resumed_chunks,
+        "departments": len(totals),
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed else 0.0,
+        "rows_per_sec_per_worker": rows / elapsed / workers if elapsed else 0.0,
+        "scored_rows": parts_dir,
+        "department_advice": departments_path,
+    }
+    with open(os.path.join(output, "report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"✅ Scored {rows:,} rows ({resumed_rows:,} resumed) in {elapsed:.1f}s: "
+                f"{report['rows_per_sec']:,.0f} rows/s on {workers} workers")
+    return report
+
+
+def scaling_report(input_path: str, worker_counts: List[int], chunk_rows: int) -> List[Dict[str, Any]]:
+    """Fresh runs at each worker count; efficiency = speedup / worker ratio vs the first count"""
+    results = []
+    with tempfile.TemporaryDirectory(prefix="org-screening-") as scratch:
+        for workers in worker_counts:
+            report = run_job(input_path, os.path.join(scratch, str(workers)), workers, chunk_rows, restart=True)
+            results.append({"workers": workers, "rows_per_sec": report["rows_per_sec"],
+                            "rows_per_sec_per_worker": report["rows_per_sec_per_worker"]})
+
+    baseline = results[0]
+    for result in results:
+        result["speedup"] = result["rows_per_sec"] / baseline["rows_per_sec"]
+        result["efficiency"] = result["speedup"] / (result["workers"] / baseline["workers"])
+    return results
+
+
+def generate_checkins(path: str, rows: int, seed: int = 0):
+    """Synthetic check-ins (about 20 per employee) for trying the job at scale"""
+    rng = np.random.default_rng(seed)
+    employees = max(rows // 20, 1)
+    employee = rng.integers(0, employees, rows)
+    frame = pd.DataFrame({
+        "employee_id": [f"E{e:07d}" for e in employee],
+        "department": np.array(DEPARTMENTS)[employee % len(DEPARTMENTS)],
+        "stress_level": np.clip(rng.normal(5.5, 2.0, rows).round(), 1, 10).astype(np.int8),
+        "work_hours": np.clip(rng.normal(9, 1.8, rows).round(), 4, 16).astype(np.int8),
+        "breaks_taken": rng.integers(0, 5, rows, dtype=np.int8),
+        "productivity": rng.integers(1, 11, rows, dtype=np.int8),
+        "meeting_count": rng.integers(0, 12, rows, dtype=np.int8),
+        "attrited": (rng.random(employees) < 0.12)[employee].astype(np.int8),
+    })
+    if path.endswith(".parquet"):
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="check-ins .csv or .parquet")
+    parser.add_argument("--output", default="screening", help="directory for parts, advice and report")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--restart", action="store_true", help="discard checkpoints from an earlier run")
+    parser.add_argument("--scaling", type=int, nargs="+", default=None, metavar="WORKERS",
+                        help="report rows/sec and efficiency at these worker counts instead")
+    parser.add_argument("--generate", type=int, default=None, metavar="ROWS",
+                        help="write synthetic check-ins to INPUT and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.generate:
+        generate_checkins(args.input, args.generate)
+        print(f"Wrote {args.generate:,} synthetic check-ins to {args.input}")
+        return
+
+    if args.scaling:
+        results = scaling_report(args.input, args.scaling, args.chunk_rows)
+        print(f"{'workers':>8} {'rows/s':>12} {'rows/s/core':>12} {'speedup':>8} {'efficiency':>10}")
+        for r in results:
+            print(f"{r['workers']:>8} {r['rows_per_sec']:>12,.0f} {r['rows_per_sec_per_worker']:>12,.0f} "
+                  f"{r['speedup']:>8.2f} {r['efficiency']:>10.0%}")
+        print(json.dumps(results, indent=2))
+        return
+
+    report = run_job(args.input, args.output, args.workers, args.chunk_rows, args.restart)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
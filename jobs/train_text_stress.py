@@ -0,0 +1,93 @@
+"""
+Train the free-text stress classifier and save it as an artifact
+
+Reads labelled JSONL ({"text": ..., "level": "low|moderate|high"} or
+{"text": ..., "stress_level": 0-1}), holds out `--holdout` of it for an
+accuracy check, fits the chosen head on the rest, then refits on everything
+and writes the .npz the app and API load (ENGCARE_TEXT_STRESS_MODEL).
+Prints accuracy and single-text / batch scoring latency.
+
+The embedding head encodes with the same MiniLM model the RAG engine uses;
+the API encodes with that model directly, outside the RAG query cache.
+
+Usage:
+    python jobs/train_text_stress.py --data data/stress_text_samples.jsonl --output data/text_stress_model.npz
+    python jobs/train_text_stress.py --head embedding
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from ai_models.text_stress_classifier import (MODEL_PATH, TRAINING_PATH, N_FEATURES, TextStressClassifier,
+                                              load_examples)
+
+logger = logging.getLogger(__name__)
+
+
+def minilm_encoder():
+    # Imported here so the hashing head needs no sentence-transformers
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer('all-MiniLM-L6-v2')
+    return lambda texts: model.encode(texts, convert_to_numpy=True)
+
+
+def latency(classifier: TextStressClassifier, texts, repeats: int = 1000):
+    """Mean seconds per text scored one at a time and in one batch"""
+    single = [texts[i % len(texts)] for i in range(repeats)]
+    start = time.perf_counter()
+    for text in single:
+        classifier.analyze(text)
+    single_seconds = (time.perf_counter() - start) / repeats
+
+    batch = single * 10
+    start = time.perf_counter()
+    classifier.analyze_batch(batch)
+    return single_seconds, (time.perf_counter() - start) / len(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=TRAINING_PATH)
+    parser.add_argument("--output", default=MODEL_PATH)
+    parser.add_argument("--head", choices=("hashing", "embedding"), default="hashing")
+    parser.add_argument("--n-features", type=int, default=N_FEATURES)
+    parser.add_argument("--C", type=float, default=10.0, help="inverse regularization strength")
+    parser.add_argument("--holdout", type=float, default=0.2)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    texts, labels = load_examples(args.data)
+    encoder = minilm_encoder() if args.head == "embedding" else None
+
+    rng = np.random.default_rng(0)
+    order = rng.permutation(len(texts))
+    n_test = int(len(texts) * args.holdout)
+    test, train = order[:n_test], order[n_test:]
+
+    report = {"examples": len(texts), "head": args.head}
+    if n_test:
+        held_out = TextStressClassifier(args.n_features, encoder=encoder).fit(
+            [texts[i] for i in train], labels[train], head=args.head, C=args.C)
+        predicted = held_out.predict_proba([texts[i] for i in test]).argmax(axis=1)
+        report["holdout_accuracy"] = float((predicted == labels[test]).mean())
+
+    classifier = TextStressClassifier(args.n_features, encoder=encoder).fit(texts, labels, head=args.head, C=args.C)
+    single_seconds, batch_seconds = latency(classifier, texts)
+    report.update({"single_ms_per_text": single_seconds * 1e3, "batch_ms_per_text": batch_seconds * 1e3})
+
+    classifier.save(args.output)
+    report["artifact"] = args.output
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The backend modules import each other by bare module name (see backend/main.py)
+for path in (ROOT, os.path.join(ROOT, "backend")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Engines imported by tests use injected stand-ins instead of downloading models
+os.environ.setdefault("ENGCARE_SKIP_MODEL_LOAD", "1")
@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta
+
+from backend.analytics import WellnessAnalytics
+from backend.user_store import UserStore
+
+
+def test_rollups_track_checkins(tmp_path):
+    analytics = WellnessAnalytics(UserStore(str(tmp_path / "engcare.db")))
+    monday = datetime(2024, 1, 1, 9)
+    analytics.record_checkin("alice", 0.8, 0.4, timestamp=monday)
+    analytics.record_checkin("alice", 0.4, 0.8, timestamp=monday + timedelta(days=2))
+    analytics.record_checkin("alice", 0.2, 0.9, timestamp=monday + timedelta(days=7))
+
+    weekly = analytics.weekly_trends("alice")
+    assert len(weekly) == 2
+    assert abs(weekly["stress"].iloc[0] - 0.6) < 1e-9
+
+    summary = analytics.progress_summary("alice")
+    assert summary["week_start"] == "2024-01-08"
+    assert summary["scores"]["stress_management"] == 80
+    assert summary["deltas"]["stress_management"] == 40
+
+
+def test_summary_is_none_without_checkins(tmp_path):
+    analytics = WellnessAnalytics(UserStore(str(tmp_path / "engcare.db")))
+    assert analytics.progress_summary("nobody") is None
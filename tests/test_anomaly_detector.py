@@ -0,0 +1,73 @@
+import threading
+
+import numpy as np
+
+from ai_models.anomaly_detector import DRIFT, SPIKE, StreamingAnomalyDetector
+
+
+def test_spike_and_sustained_shift_are_flagged():
+    detector = StreamingAnomalyDetector(max_employees=10)
+    rng = np.random.default_rng(0)
+    for value in 5 + 0.3 * rng.normal(size=30):
+        detector.observe("e1", {"stress_level": value, "work_hours": 8})
+
+    (spike,) = detector.observe("e1", {"stress_level": 9.5, "work_hours": 8})
+    assert spike["metric"] == "stress_level" and spike["kind"] == "spike" and spike["direction"] == "up"
+
+    # A sustained 1-point rise (above the 0.5 sd floor) is drift
+    kinds = [a["kind"] for value in 6.0 + 0.3 * rng.normal(size=20)
+             for a in detector.observe("e1", {"stress_level": value})]
+    assert "drift" in kinds
+
+
+def test_steady_baseline_does_not_flag_a_one_point_change():
+    detector = StreamingAnomalyDetector(max_employees=10)
+    for _ in range(5):
+        detector.observe("e1", {"stress_level": 5, "work_hours": 8, "productivity": 7})
+    assert detector.observe("e1", {"stress_level": 6, "work_hours": 8, "productivity": 7}) == []
+
+    # A large jump from the same steady baseline is still a spike
+    (spike,) = detector.observe("e1", {"stress_level": 9, "work_hours": 8, "productivity": 7})
+    assert spike["kind"] == "spike" and spike["z_score"] < 10
+
+
+def test_batch_matches_event_by_event_and_memory_is_bounded():
+    rng = np.random.default_rng(1)
+    ids = [f"e{i}" for i in rng.integers(0, 20, 2000)]
+    values = (5 + rng.normal(size=(2000, 3))).astype(np.float32)
+    values[1500, 0] = 15
+
+    single = StreamingAnomalyDetector(max_employees=20)
+    expected = [(i, a["metric"]) for i, (e, v) in enumerate(zip(ids, values))
+                for a in single.observe(e, dict(zip(single.metrics, v.tolist())))]
+    batched = StreamingAnomalyDetector(max_employees=20)
+    found = batched.observe_batch(ids, values)
+    assert [(int(e), batched.metrics[m]) for e, m in zip(found["event"], found["metric"])] == expected
+    assert (1500, "stress_level") in expected
+    assert set(found["kind"].tolist()) <= {SPIKE, DRIFT}
+
+    bounded = StreamingAnomalyDetector(max_employees=100)
+    for i in range(500):
+        bounded.observe(f"u{i}", {"stress_level": 5})
+    assert bounded.stats()["employees"] <= 100 and bounded.stats()["capacity"] == 100
+
+
+def test_single_and_batch_updates_wait_for_each_other():
+    detector = StreamingAnomalyDetector(max_employees=10_000)
+    # 3000 bulk employees force the state arrays to grow
+    bulk_ids = [f"b{i}" for i in range(3000)]
+    threads = [
+        threading.Thread(target=detector.observe_batch, args=(bulk_ids, np.full((3000, 3), 5.0))),
+        threading.Thread(target=detector.observe, args=("s1", {"stress_level": 5})),
+    ]
+    with detector._lock:
+        for thread in threads:
+            thread.start()
+            thread.join(timeout=0.1)
+            assert thread.is_alive()
+        assert not detector._rows
+    for thread in threads:
+        thread.join()
+
+    assert detector.stats()["employees"] == 3001
+    assert all(detector._ids[row] == employee for employee, row in detector._rows.items())
@@ -0,0 +1,22 @@
+import numpy as np
+
+from ai_models.batch_scoring import score_checkins
+from ai_models.crisis_detector import CrisisDetector
+
+
+def test_vectorized_scores_match_crisis_detector():
+    detector = CrisisDetector()
+    rng = np.random.default_rng(0)
+    columns = {
+        "stress_level": rng.integers(1, 11, 500),
+        "work_hours": rng.integers(4, 16, 500),
+        "breaks_taken": rng.integers(0, 4, 500),
+        "productivity": rng.integers(1, 11, 500),
+    }
+    result = score_checkins(columns, detector)
+
+    for i in range(500):
+        expected = detector.detect_crisis_patterns({name: int(values[i]) for name, values in columns.items()})
+        assert result["risk_score"][i] == expected["total_risk_score"]
+        assert result["crisis_level"][i] == expected["crisis_level"]
+        assert result["alert_required"][i] == expected["alert_required"]
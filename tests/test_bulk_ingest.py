@@ -0,0 +1,129 @@
+import io
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from ai_models.anomaly_detector import StreamingAnomalyDetector
+from ai_models.crisis_detector import CrisisDetector
+from ai_models.department_aggregator import DepartmentAggregator
+from bulk_ingest import BulkFormatError, BulkIngestor, detect_format
+
+
+def checkins(n=2500, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "user_id": [f"E{i % 300:04d}" for i in range(n)],
+        "department": rng.choice(["Engineering", "Design", "Sales"], n),
+        "stress_level": rng.integers(0, 11, n),
+        "work_hours": rng.integers(4, 15, n),
+        "breaks_taken": rng.integers(0, 5, n),
+        "productivity": rng.integers(1, 11, n),
+    })
+
+
+def encode(frame, fmt):
+    if fmt == "ndjson":
+        return frame.to_json(orient="records", lines=True).encode()
+    if fmt == "parquet":
+        buffer = io.BytesIO()
+        frame.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def test_formats_agree_and_feed_department_and_anomaly_state():
+    frame = checkins()
+    reports = {}
+    for fmt in ("ndjson", "arrow", "parquet"):
+        aggregator = DepartmentAggregator()
+        detector = StreamingAnomalyDetector()
+        ingestor = BulkIngestor(CrisisDetector(), aggregator=aggregator, anomaly_detector=detector, chunk_rows=1000)
+        report = ingestor.ingest(encode(frame, fmt), fmt, include_results=True)
+        reports[fmt] = (report, aggregator.snapshot(), detector.stats()["employees"])
+
+    report, departments, employees = reports["ndjson"]
+    assert report["rows"] == report["accepted"] == len(frame) and report["rejected"] == 0
+    assert report["results"]["row"] == list(range(len(frame)))
+    assert employees == 300
+    for fmt in ("arrow", "parquet"):
+        other = reports[fmt]
+        assert other[0]["results"] == report["results"] and other[0]["anomalies"] == report["anomalies"]
+        assert other[1] == departments
+
+    # The vectorized scores match CrisisDetector row by row
+    detector = CrisisDetector()
+    for row in (0, 17, 2499):
+        record = frame.iloc[row]
+        single = detector.detect_crisis_patterns({k: float(record[k]) for k in
+                                                  ("stress_level", "work_hours", "breaks_taken", "productivity")})
+        assert report["results"]["crisis_level"][row] == single["crisis_level"]
+
+    # Block updates leave the aggregator exactly where per-row updates would
+    one_by_one = DepartmentAggregator()
+    for record in frame.itertuples():
+        one_by_one.record_checkin(record.department, record.user_id, record.stress_level)
+    by_name = lambda metrics: sorted(metrics, key=lambda m: m["department"])
+    assert by_name(one_by_one.snapshot()) == by_name(departments)
+
+
+def test_invalid_rows_are_reported_and_skipped():
+    lines = [
+        {"stress_level": 5, "work_hours": 8, "breaks_taken": 2, "productivity": 7},
+        {"stress_level": 14, "work_hours": 8, "breaks_taken": 2, "productivity": 7},
+        {"stress_level": 5, "work_hours": None, "breaks_taken": 2, "productivity": 7},
+        {"stress_level": 9, "work_hours": 13, "breaks_taken": 0, "productivity": 2},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines).encode()
+    report = BulkIngestor(CrisisDetector()).ingest(body, "ndjson")
+    assert (report["rows"], report["accepted"], report["rejected"]) == (4, 2, 2)
+    assert [(e["row"], e["field"]) for e in report["errors"]] == [(1, "stress_level"), (2, "work_hours")]
+    assert report["alerts"] == 1 and report["crisis_levels"] == {"immediate": 1, "low_priority": 1}
+
+    # A string in a numeric column fails that row, not the whole body
+    lines[1]["stress_level"] = "high"
+    body = "\n".join(json.dumps(line) for line in lines).encode()
+    report = BulkIngestor(CrisisDetector()).ingest(body, "ndjson")
+    assert (report["rows"], report["accepted"], report["rejected"]) == (4, 2, 2)
+    assert [(e["row"], e["field"], e["value"]) for e in report["errors"]][0] == (1, "stress_level", "high")
+
+    with pytest.raises(BulkFormatError):
+        BulkIngestor(CrisisDetector()).ingest(b'{"stress_level": 5}\n', "ndjson")
+    with pytest.raises(BulkFormatError):
+        BulkIngestor(CrisisDetector()).ingest(b'{"stress_level": 5\n', "ndjson")
+    with pytest.raises(BulkFormatError):
+        detect_format("application/json")
+    assert detect_format("application/x-ndjson; charset=utf-8") == "ndjson"
+
+
+def test_timestamp_column_backfills_department_days():
+    today = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    frame = pd.DataFrame({
+        "user_id": ["a", "b", "c", "d"],
+        "department": ["Eng"] * 4,
+        "stress_level": [8, 8, 2, 5],
+        "work_hours": [8] * 4,
+        "breaks_taken": [1] * 4,
+        "productivity": [6] * 4,
+        # Two days inside the 14-day window, one long gone, one in the future
+        "timestamp": [today - timedelta(days=2), today - timedelta(days=3),
+                      today - timedelta(days=60), today + timedelta(days=2)],
+    })
+    iso = frame.assign(timestamp=frame["timestamp"].map(datetime.isoformat))
+    # NDJSON carries ISO 8601 strings, Arrow and Parquet native timestamps
+    for fmt, data in (("ndjson", iso), ("arrow", frame), ("parquet", frame)):
+        aggregator = DepartmentAggregator(window_days=14)
+        report = BulkIngestor(CrisisDetector(), aggregator=aggregator).ingest(encode(data, fmt), fmt)
+        assert (report["accepted"], report["rejected"]) == (3, 1)
+        assert [(e["row"], e["field"]) for e in report["errors"]] == [(3, "timestamp")]
+
+        (metrics,) = aggregator.snapshot()
+        assert metrics["checkins"] == 3 and metrics["window_checkins"] == 2
+        assert metrics["avg_stress"] == 8.0
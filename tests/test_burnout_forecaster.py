@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ai_models.burnout_forecaster import SERIES, BurnoutForecaster
+from ai_models.crisis_detector import CrisisDetector
+from backend.analytics import WellnessAnalytics
+from backend.user_store import UserStore
+
+
+def holt(series, alpha=0.3, beta=0.1, phi=0.9):
+    level = trend = None
+    for value in series:
+        if level is None:
+            if not np.isnan(value):
+                level, trend = value, 0.0
+            continue
+        predicted = level + phi * trend
+        value = predicted if np.isnan(value) else value
+        new_level = alpha * value + (1 - alpha) * predicted
+        trend = beta * (new_level - level) + (1 - beta) * phi * trend
+        level = new_level
+    return level, trend
+
+
+def test_vectorized_fit_matches_scalar_holt_and_incremental_updates():
+    rng = np.random.default_rng(0)
+    history = rng.uniform(2, 9, (50, 40, 2)).astype(np.float32)
+    history[rng.random((50, 40)) < 0.3] = np.nan
+    ids = [f"e{i}" for i in range(50)]
+
+    fitted = BurnoutForecaster().fit(ids, history)
+    incremental = BurnoutForecaster().fit(ids, history[:, :30])
+    for day in range(30, 40):
+        incremental.update(ids, history[:, day])
+
+    for i in (0, 17, 49):
+        level, trend = holt(history[i, :, 0].astype(np.float64))
+        assert abs(fitted.level[i, 0] - level) < 1e-4 and abs(fitted.trend[i, 0] - trend) < 1e-4
+    np.testing.assert_allclose(incremental.level[:50], fitted.level[:50], atol=1e-5)
+
+
+def test_rising_stress_is_projected_into_crisis_detection():
+    days = np.arange(60, dtype=np.float32)
+    history = np.stack([np.stack([4 + 0.1 * days, 9 + 0.06 * days], axis=1),
+                        np.full((60, 2), [4.0, 8.0], dtype=np.float32)])
+    forecaster = BurnoutForecaster().fit(["rising", "steady"], history)
+    risk = forecaster.projected_risk(horizon=7)
+    assert risk[0] > 0.8 > 0.3 > risk[1]
+
+    detector = CrisisDetector()
+    forecast = forecaster.employee_forecast("rising", horizon=7)
+    with_forecast = detector.detect_crisis_patterns({"stress_level": 8, "work_hours": 11}, forecast=forecast)
+    without = detector.detect_crisis_patterns({"stress_level": 8, "work_hours": 11})
+    assert "projected_extreme_stress" in with_forecast["risk_factors"]
+    assert with_forecast["total_risk_score"] > without["total_risk_score"]
+
+
+def test_daily_stress_matrix_from_rollups(tmp_path):
+    analytics = WellnessAnalytics(UserStore(str(tmp_path / "engcare.db")))
+    today = datetime(2024, 3, 10, 9)
+    analytics.record_checkin("bob", 0.6, 0.5, timestamp=today)
+    analytics.record_checkin("bob", 0.2, 0.5, timestamp=today)
+    analytics.record_checkin("amy", 0.9, 0.5, timestamp=today - timedelta(days=2))
+
+    users, matrix = analytics.daily_stress_matrix(days=3, end=today)
+    assert users == ["amy", "bob"]
+    assert matrix[0, 0] == np.float32(0.9) and np.isnan(matrix[0, 2])
+    assert abs(matrix[1, 2] - 0.4) < 1e-6
+
+
+def test_fit_then_update_with_the_last_day_equals_fitting_everything():
+    rng = np.random.default_rng(1)
+    ids = [f"e{i}" for i in range(20)]
+    for history, series in ((rng.uniform(1, 10, (20, 15, 2)), SERIES),
+                            (rng.uniform(1, 10, (20, 15)), ("stress_level",))):
+        history = history.astype(np.float32)
+        history[rng.random(history.shape[:2]) < 0.2] = np.nan
+        last = history[:, -1] if history.ndim == 3 else history[:, -1:]
+
+        everything = BurnoutForecaster(series=series).fit(ids, history)
+        nightly = BurnoutForecaster(series=series).fit(ids, history[:, :-1])
+        nightly.update(ids, last)
+        np.testing.assert_allclose(nightly.level[:20], everything.level[:20], atol=1e-5)
+        np.testing.assert_allclose(nightly.trend[:20], everything.trend[:20], atol=1e-5)
+        assert nightly.days == everything.days
+
+        # Folding the last day in again (the old job) moves the state
+        nightly.update(ids, last)
+        assert not np.allclose(nightly.trend[:20], everything.trend[:20], atol=1e-5)
+
+
+def test_values_must_match_the_series():
+    ids = ["e1", "e2"]
+    with pytest.raises(ValueError):
+        BurnoutForecaster().fit(ids, np.full((2, 5), 5.0))
+    with pytest.raises(ValueError):
+        BurnoutForecaster(series=("stress_level",)).fit(ids, np.full((2, 5, 2), 5.0))
+    forecaster = BurnoutForecaster().fit(ids, np.full((2, 5, 2), 5.0))
+    with pytest.raises(ValueError):
+        forecaster.update(ids, np.full((2, 1), 5.0))
@@ -0,0 +1,38 @@
+import pytest
+
+from benchmarks.tiny_models import build_causal_lm, load_causal_lm
+from decoding import PrefixCachedDecoder, SpeculativeDecoder
+
+PREFIX = "You are a wellness coach for engineers.\n"
+SUFFIXES = [
+    "Stress Level: 7/10",
+    "Stress Level: 7/10 Work Hours: 10 Breaks: 1 Productivity: 5/10",
+    "Give 2-3 wellness tips",
+]
+
+
+@pytest.fixture(scope="module")
+def tiny_lm():
+    return load_causal_lm("tiny")
+
+
+def test_batched_greedy_output_matches_single_requests(tiny_lm):
+    model, tokenizer = tiny_lm
+    decoder = PrefixCachedDecoder(model, tokenizer, PREFIX)
+    batched = decoder.generate(SUFFIXES, max_length=60, do_sample=False)
+    single = [decoder.generate([suffix], max_length=60, do_sample=False)[0] for suffix in SUFFIXES]
+    assert batched == single
+
+
+def test_greedy_speculative_output_matches_plain_greedy(tiny_lm):
+    model, tokenizer = tiny_lm
+    # A different, smaller draft, so some draft tokens get rejected
+    draft = build_causal_lm(tokenizer, n_layer=2, n_embd=128, seed=1)
+    speculative = SpeculativeDecoder(model, draft, tokenizer, PREFIX, lookahead=4)
+    plain = PrefixCachedDecoder(model, tokenizer, PREFIX)
+    for suffix in SUFFIXES:
+        expected = plain.generate([suffix], max_length=60, do_sample=False)[0]
+        assert speculative.generate(suffix, max_length=60, do_sample=False) == expected
+
+    stats = speculative.stats()
+    assert stats["proposed_tokens"] > 0 and stats["accepted_tokens"] < stats["proposed_tokens"]
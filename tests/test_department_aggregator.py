@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from ai_models.company_advisor import CompanyAdvisor
+from ai_models.department_aggregator import DepartmentAggregator
+
+
+def test_running_metrics_window_and_snapshot(tmp_path):
+    aggregator = DepartmentAggregator(CompanyAdvisor(), window_days=7)
+    now = datetime.now()
+    aggregator.record_checkin("Engineering", "e1", 9, now - timedelta(days=30))
+    for employee in ("e1", "e2", "e3"):
+        aggregator.record_checkin("Engineering", employee, 4, now)
+    aggregator.record_checkin("Sales", "s1", 6, now)
+    aggregator.record_departure("e3")
+
+    metrics = aggregator.department_metrics("Engineering")
+    assert metrics["avg_stress"] == 4.0  # the 30-day-old check-in left the window
+    assert metrics["lifetime_avg_stress"] == 21 / 4
+    assert metrics["team_size"] == 2 and round(metrics["attrition_rate"], 1) == 33.3
+
+    path = str(tmp_path / "departments.npz")
+    aggregator.save(path)
+    restored = DepartmentAggregator(CompanyAdvisor(), window_days=7, snapshot_path=path)
+    assert restored.snapshot() == aggregator.snapshot()
+
+
+def test_advisor_reruns_only_when_urgency_changes():
+    aggregator = DepartmentAggregator(CompanyAdvisor(), window_days=7)
+    aggregator.record_checkin("Design", "d1", 3)
+    first = aggregator.recommendations("Design")
+    aggregator.record_checkin("Design", "d2", 4)
+    second = aggregator.recommendations("Design")
+    assert aggregator.advisor_calls == 1
+    assert second["recommendations"] == first["recommendations"]
+    assert second["key_metrics"]["current_stress"] == 3.5
+
+    aggregator.record_checkin("Design", "d3", 10)
+    aggregator.record_checkin("Design", "d4", 10)
+    assert aggregator.recommendations("Design")["urgency_level"] == "high"
+    assert aggregator.advisor_calls == 2
+
+
+def test_advice_follows_stress_band_within_one_urgency_level():
+    advisor = CompanyAdvisor()
+    aggregator = DepartmentAggregator(advisor, window_days=7)
+    members = [f"d{i}" for i in range(6)]
+    for member in members:
+        aggregator.record_checkin("Design", member, 3)
+    aggregator.record_departure("d5")  # 1 of 6 left: attrition in the 15-20% band
+    before = aggregator.recommendations("Design")
+    assert before["urgency_level"] == "high"
+
+    for member in members[:5] + members[:1]:
+        aggregator.record_checkin("Design", member, 10)
+    metrics = aggregator.department_metrics("Design")
+    assert metrics["avg_stress"] == 6.5
+    after = aggregator.recommendations("Design")
+    # Still "high", but stress crossed into the band with its own advice
+    assert after["urgency_level"] == "high" and aggregator.advisor_calls == 2
+    assert "⚠️ Schedule weekly team wellness sessions" in after["recommendations"]
+    assert after["recommendations"] == advisor.get_company_recommendations(metrics)["recommendations"]
+
+
+def test_backfilled_day_does_not_reset_a_newer_day():
+    aggregator = DepartmentAggregator(window_days=7)
+    today = datetime.now()
+    aggregator.record_checkin("Eng", "e1", 6.0, timestamp=today)
+    # Same ring slot as today, but a week older
+    aggregator.record_checkin("Eng", "e2", 2.0, timestamp=today - timedelta(days=7))
+    aggregator.record_checkins(np.array(["Eng"]), np.array(["e3"]), np.array([4.0]),
+                               timestamp=today - timedelta(days=14))
+    metrics = aggregator.department_metrics("Eng")
+    assert metrics["window_checkins"] == 1 and metrics["avg_stress"] == 6.0
+    assert metrics["checkins"] == 3
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+from backend.gamification import ACHIEVEMENTS, Achievement, GamificationEngine
+from backend.user_store import UserStore
+
+
+def test_achievements_fire_once_when_their_counter_crosses_the_threshold(tmp_path):
+    engine = GamificationEngine(UserStore(str(tmp_path / "engcare.db")), achievements=ACHIEVEMENTS + (
+        Achievement("Double Tip", "✨", "2 tips", 20, "tips_completed", 2),
+    ))
+    start = datetime(2024, 1, 1, 9)
+    # Start from a clean slate instead of the dashboard defaults
+    engine.store.load_user("bob")
+    engine.store.update_user("bob", wellness_points=0, level=1, achievements=[], streak=0)
+
+    first = engine.record("bob", "tip_completed", stress_level=0.2, timestamp=start)
+    assert first["new_achievements"] == ["First Step"]
+    assert first["points_awarded"] == 10 + 50
+
+    second = engine.record("bob", "tip_completed", stress_level=0.2, timestamp=start + timedelta(days=1))
+    assert second["new_achievements"] == ["Double Tip"]
+    third = engine.record("bob", "mood_updated", stress_level=0.1, timestamp=start + timedelta(days=2))
+    assert third["new_achievements"] == ["Stress Master"]
+    assert third["state"]["streak"] == 3
+
+    for day in range(3, 12):
+        result = engine.record("bob", "problem_solved", stress_level=0.5, timestamp=start + timedelta(days=day))
+    state = result["state"]
+    assert state["streak"] == 12
+    assert state["counters"]["low_stress_run"] == 0
+    assert set(state["achievements"]) == {"First Step", "Double Tip", "Stress Master", "7-Day Streak",
+                                          "Problem Solver"}
+    assert state["wellness_points"] == 20 + 10 + 9 * 25 + 50 + 20 + 75 + 100 + 150
+    assert state["level"] == 1
+
+    # The stored row matches a full replay of the event log
+    assert engine.state("bob") == state
+    assert engine.replay("bob") == state
+
+
+def test_existing_users_keep_their_dashboard_progress(tmp_path):
+    store = UserStore(str(tmp_path / "engcare.db"))
+    engine = GamificationEngine(store)
+    before = engine.state("alice")  # default dashboard user: 450 points, level 2, 5-day streak
+    assert before["wellness_points"] == 450 and before["level"] == 2 and before["streak"] == 5
+
+    result = engine.record("alice", "problem_solved", timestamp=datetime(2024, 1, 1))
+    # A gap in activity restarts the streak; First Step was already earned so it is not paid twice
+    assert result["state"]["streak"] == 1
+    assert result["points_awarded"] == 25
+    assert "Meditation Guru" in result["state"]["achievements"]
+
+    result = engine.record("alice", "mood_updated", timestamp=datetime(2024, 1, 1, 18))
+    assert result["state"]["streak"] == 1
+    board = {a["name"]: a["earned"] for a in engine.achievement_board("alice")}
+    assert board["First Step"] and not board["Problem Solver"]
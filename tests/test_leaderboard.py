@@ -0,0 +1,40 @@
+import numpy as np
+
+from backend.leaderboard import Leaderboard
+from backend.user_store import UserStore
+
+
+def brute_force_rank(scores, user_id, metric):
+    return 1 + sum(s[metric] > scores[user_id][metric] for s in scores.values())
+
+
+def test_ranks_top_and_around_match_a_full_sort(tmp_path):
+    store = UserStore(str(tmp_path / "engcare.db"))
+    board = Leaderboard(store)
+    rng = np.random.default_rng(0)
+    scores = {}
+    for i in range(300):
+        user_id = f"u{i:03d}"
+        scores[user_id] = {"wellness_points": int(rng.integers(0, 50)), "streak": int(rng.integers(0, 10))}
+        board.opt_in(user_id, f"User {i}", **scores[user_id])
+    for i in rng.integers(0, 300, 500):
+        user_id = f"u{i:03d}"
+        scores[user_id] = {"wellness_points": int(rng.integers(0, 50)), "streak": int(rng.integers(0, 10))}
+        assert board.update(user_id, **scores[user_id])
+    board.opt_out("u007")
+    del scores["u007"]
+    assert not board.update("u007", 10, 1)
+
+    for metric in ("wellness_points", "streak"):
+        for user_id in scores:
+            assert board.rank(user_id, metric) == brute_force_rank(scores, user_id, metric)
+        expected = sorted(scores, key=lambda u: (-scores[u][metric], u))
+        assert [e["user_id"] for e in board.top(10, metric)] == expected[:10]
+        position = expected.index("u100")
+        assert [e["user_id"] for e in board.around("u100", metric, radius=3)] == \
+            expected[max(0, position - 3):position + 4]
+
+    # A restart rebuilds the same index from SQLite
+    reloaded = Leaderboard(store)
+    assert len(reloaded) == 299 and "u007" not in reloaded
+    assert reloaded.top(20) == board.top(20)
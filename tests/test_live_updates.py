@@ -0,0 +1,85 @@
+import asyncio
+
+from live_updates import LiveFeedPool, LiveReadings, LiveUpdateBroker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeFeed:
+    def __init__(self, api_url, user_id):
+        self.user_id = user_id
+        self.running = False
+
+    def start(self):
+        self.running = True
+        return self
+
+    def stop(self):
+        self.running = False
+
+    def is_alive(self):
+        return self.running
+
+
+def test_broker_drops_idle_and_excess_users_and_versions_keep_rising():
+    clock = FakeClock()
+    broker = LiveUpdateBroker(max_users=3, idle_seconds=100, clock=clock)
+    first = broker.publish("alice", 0.8)
+    for user in ("bob", "carol", "dave"):
+        broker.publish(user, 0.3)
+    # alice was the least recently updated
+    assert broker.tracked_users() == 3 and broker.latest("alice") is None
+
+    clock.now = 150
+    broker.publish("erin", 0.5)
+    assert broker.tracked_users() == 1
+
+    again = broker.publish("alice", 0.2)
+    assert again["version"] > first["version"] and again["epoch"] == first["epoch"]
+    # A restarted backend starts a new epoch, which the dashboard uses to reset
+    assert LiveUpdateBroker().publish("alice", 0.2)["epoch"] != first["epoch"]
+
+
+def test_feed_pool_stops_unread_feeds():
+    clock = FakeClock()
+    pool = LiveFeedPool("http://api", max_clients=2, idle_seconds=60, factory=FakeFeed, clock=clock)
+    alice = pool.get("alice")
+    assert pool.get("alice") is alice and alice.running
+
+    clock.now = 30
+    bob = pool.get("bob")
+    clock.now = 70
+    carol = pool.get("carol")
+    # alice went unread past the idle limit; bob is still fresh
+    assert not alice.running and bob.running and carol.running and len(pool) == 2
+
+    dave = pool.get("dave")
+    assert not bob.running and dave.running and len(pool) == 2
+    # A stopped feed is replaced on next use
+    assert pool.get("alice") is not alice
+
+
+def test_relaying_brokers_deliver_updates_published_by_another():
+    # Two workers over the state owner's readings
+    readings = LiveReadings()
+    publisher = LiveUpdateBroker(readings=readings, relay=True)
+    listener = LiveUpdateBroker(readings=readings, relay=True)
+
+    async def scenario():
+        queue = listener.subscribe("alice")
+        update = publisher.publish("alice", 0.7)
+        received = await asyncio.wait_for(queue.get(), timeout=5)
+        # A restart starts a new epoch; the relay follows it from version 1
+        readings.restart()
+        again = publisher.publish("alice", 0.4)
+        return update, received, again, await asyncio.wait_for(queue.get(), timeout=5)
+
+    update, received, again, after_restart = asyncio.run(scenario())
+    assert received == update and publisher.subscriber_count() == 0
+    assert after_restart == again and again["version"] == 1 and again["epoch"] != update["epoch"]
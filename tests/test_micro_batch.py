@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+from micro_batch import MicroBatcher
+
+
+class Recorder:
+    """Batch function that doubles its items and remembers each batch"""
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.threads = set()
+        self.error = error
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        self.threads.add(threading.current_thread().name)
+        if self.error is not None:
+            raise self.error
+        return [item * 2 for item in items]
+
+
+def test_concurrent_callers_share_one_batch():
+    recorder = Recorder()
+    batcher = MicroBatcher(recorder, window_ms=20, max_batch=32, name="test")
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(run()) == [0, 2, 4, 6, 8]
+    assert recorder.batches == [[0, 1, 2, 3, 4]]
+    assert recorder.threads == {"test-batch_0"}
+
+
+def test_batch_error_reaches_every_waiter():
+    recorder = Recorder(error=RuntimeError("encoder down"))
+    batcher = MicroBatcher(recorder, window_ms=5, max_batch=32)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert len(recorder.batches) == 1
+    assert all(isinstance(r, RuntimeError) and str(r) == "encoder down" for r in results)
+
+    # The batcher keeps working after a failed batch
+    recorder.error = None
+    assert asyncio.run(batcher.submit(4)) == 8
+
+
+def test_overflow_past_max_batch_goes_out_in_later_batches():
+    recorder = Recorder()
+    # A long window: only reaching max_batch or finishing a batch can dispatch
+    batcher = MicroBatcher(recorder, window_ms=10_000, max_batch=4)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(10))), timeout=5)
+
+    assert asyncio.run(run()) == [2 * i for i in range(10)]
+    assert recorder.batches == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from profiling import ProfilingMiddleware, RequestProfiler, StackSampler
+
+
+def busy_tokenize(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(200))
+
+
+def test_sampler_collapses_stacks_from_other_threads():
+    sampler = StackSampler(interval=0.002)
+    worker = threading.Thread(target=busy_tokenize, args=(0.15,), name="llm-worker")
+    sampler.start()
+    worker.start()
+    worker.join()
+    sampler.stop()
+
+    lines = sampler.collapsed().splitlines()
+    assert sampler.samples > 10
+    hot = [line for line in lines if line.startswith("llm-worker;") and "busy_tokenize (tests/test_profiling.py:" in line]
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in hot) > 5
+    # The main thread sat in join(), which counts as idle
+    leaves = [line.rsplit(" ", 1)[0].rsplit(";", 1)[-1] for line in lines if line.startswith("MainThread;")]
+    assert not any(leaf.startswith("_wait_for_tstate_lock (") for leaf in leaves)
+
+
+def test_middleware_profiles_only_flagged_or_sampled_requests(tmp_path):
+    async def advice(request):
+        await run_in_threadpool(busy_tokenize, 0.05)
+        await asyncio.sleep(0)
+        return JSONResponse({"status": "success"})
+
+    profiler = RequestProfiler(str(tmp_path), enabled=False, sample_rate=0.0, interval=0.002, torch_ops=False,
+                               token="s3cret")
+    app = Starlette(routes=[Route("/wellness-advice", advice, methods=["POST"])])
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+    async def post(**kwargs):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/wellness-advice", **kwargs)
+
+    # Disabled: the header is ignored and nothing is written
+    response = asyncio.run(post(headers={"X-EngCare-Profile": "s3cret"}))
+    assert response.status_code == 200 and "x-engcare-profile-id" not in response.headers
+    assert not list(tmp_path.iterdir())
+
+    profiler.configure(enabled=True)
+    assert "x-engcare-profile-id" not in asyncio.run(post()).headers
+    # Without the token the header is ignored
+    assert "x-engcare-profile-id" not in asyncio.run(post(headers={"X-EngCare-Profile": "1"})).headers
+    response = asyncio.run(post(headers={"X-EngCare-Profile": "s3cret"}))
+    profile_id = response.headers["x-engcare-profile-id"]
+    assert "busy_tokenize" in (tmp_path / f"{profile_id}.collapsed").read_text()
+
+    profiler.configure(sample_rate=1.0)
+    assert "x-engcare-profile-id" in asyncio.run(post()).headers
+    recent = profiler.status()["recent"]
+    assert [p["trigger"] for p in recent] == ["sampled", "header"]
+    assert recent[1]["status"] == 200 and recent[1]["path"] == "/wellness-advice"
+
+    # No token configured: the header never triggers a profile
+    open_profiler = RequestProfiler(str(tmp_path), enabled=True, sample_rate=0.0, torch_ops=False, token="")
+    assert not open_profiler.authorized(b"") and not open_profiler.authorized(b"1")
+
+    # Older profiles are deleted past the retention limit
+    profiler.keep = 1
+    asyncio.run(post())
+    assert len(profiler.recent()) == 1 and len(list(tmp_path.glob("*.collapsed"))) == 1
+    assert not (tmp_path / f"{profile_id}.collapsed").exists()
+
+
+def test_event_streams_and_long_responses_release_the_profiler(tmp_path):
+    async def events(request):
+        async def stream():
+            for i in range(3):
+                await asyncio.sleep(0.02)
+                yield f"data: {i}\n\n"
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    async def slow(request):
+        await run_in_threadpool(busy_tokenize, 0.3)
+        return JSONResponse({"status": "success"})
+
+    profiler = RequestProfiler(str(tmp_path), enabled=True, sample_rate=1.0, interval=0.002, torch_ops=False,
+                               max_seconds=0.05)
+    app = Starlette(routes=[Route("/live/u1", events), Route("/slow", slow)])
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+    async def get(path):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path)
+
+    response = asyncio.run(get("/live/u1"))
+    assert response.text.count("data:") == 3 and "x-engcare-profile-id" not in response.headers
+    assert profiler.recent() == [] and not list(tmp_path.iterdir())
+    assert not profiler.status()["profiling_now"]
+
+    # Stopped at the time limit while the response carried on
+    assert "x-engcare-profile-id" in asyncio.run(get("/slow")).headers
+    (summary,) = profiler.recent()
+    assert summary["truncated"] and summary["duration_ms"] < 250
+    assert not profiler.status()["profiling_now"]
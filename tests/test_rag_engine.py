@@ -0,0 +1,60 @@
+import numpy as np
+
+import rag_engine as rag
+from rag_engine import DEFAULT_SITUATION, PRECOMPUTED_TOP_K, RAGEngine, query_key
+from telemetry import CACHE_REQUESTS
+
+
+class HashEncoder:
+    """Deterministic bag-of-words vectors, counting encoded texts"""
+
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.encoded += len(texts)
+        vectors = np.zeros((len(texts), 64), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, sum(map(ord, word)) % 64] += 1.0
+        return vectors
+
+
+def cache_counts(cache):
+    return CACHE_REQUESTS.value(cache=cache, result="hit"), CACHE_REQUESTS.value(cache=cache, result="miss")
+
+
+def test_query_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(rag, "QUERY_CACHE_SIZE", 2)
+    encoder = HashEncoder()
+    engine = RAGEngine(embedding_model=encoder)
+    start = encoder.encoded
+
+    for query in ("neck pain", "long hours", "neck pain", "no breaks"):
+        engine.encode_queries([query])
+    # "neck pain" was used again, so "long hours" is the one dropped
+    assert list(engine._query_cache) == [query_key("neck pain"), query_key("no breaks")]
+    assert encoder.encoded - start == 3
+
+    engine.encode_queries(["Neck   PAIN"])
+    assert encoder.encoded - start == 3
+
+
+def test_default_situations_use_precomputed_rankings():
+    encoder = HashEncoder()
+    engine = RAGEngine(embedding_model=encoder)
+    query = DEFAULT_SITUATION.format(stress_level=7)
+    start, (hits, misses) = encoder.encoded, cache_counts("rag_default_query")
+
+    (results,) = engine.retrieve_batch([query], top_k=3)
+    assert encoder.encoded == start and cache_counts("rag_default_query") == (hits + 1, misses)
+    _, scores = engine.index.search(encoder.encode([query]), 3)
+    assert [r["relevance_score"] for r in results] == [float(s) for s in scores[0] if s > 0.3]
+
+    # More results than were precomputed: a miss, answered by a fresh search
+    engine.retrieve_batch([query], top_k=PRECOMPUTED_TOP_K + 1)
+    assert cache_counts("rag_default_query") == (hits + 1, misses + 1)
+
+    # Other queries are not counted against the default-query cache
+    engine.retrieve_batch(["deadline pressure"], top_k=3)
+    assert cache_counts("rag_default_query") == (hits + 1, misses + 1)
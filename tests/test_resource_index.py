@@ -0,0 +1,47 @@
+import numpy as np
+
+from resource_index import IndexSnapshot, diff_resources, flatten_resources
+from vector_store import VectorIndex
+
+RESOURCES = {
+    "emergency_contacts": [{"resource_id": "EMG-001", "name": "Crisis Helpline", "description": "24/7 support"}],
+    "self_help_tools": [
+        {"tool_id": "SH-001", "name": "Breathing Exercise", "benefit": "Instant stress relief"},
+        {"tool_id": "SH-002", "name": "Desk Stretches", "benefit": "Release neck tension"},
+    ],
+}
+
+
+def test_diff_detects_added_changed_and_deleted_resources():
+    snapshot = IndexSnapshot(version=1, entries=flatten_resources(RESOURCES))
+    updated = {
+        "emergency_contacts": RESOURCES["emergency_contacts"],
+        "self_help_tools": [
+            {"tool_id": "SH-001", "name": "Breathing Exercise", "benefit": "Calm in five minutes"},
+            {"tool_id": "SH-003", "name": "Walk Break", "benefit": "Reset focus"},
+        ],
+    }
+    upserts, deletes = diff_resources(snapshot, updated)
+    assert sorted(data["tool_id"] for _, data in upserts) == ["SH-001", "SH-003"]
+    assert deletes == ["SH-002"]
+
+
+def test_lexical_index_scores_token_overlap():
+    snapshot = IndexSnapshot(version=1, entries=flatten_resources(RESOURCES))
+    (score, row), = snapshot.lexical.search("stretches for neck tension", top_k=1)
+    assert snapshot.entries[row]["id"] == "SH-002"
+    assert score > 0.1
+
+
+def test_updated_index_matches_refit_and_leaves_original_untouched():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 16)).astype(np.float32)
+    added = rng.normal(size=(5, 16)).astype(np.float32)
+    keep = np.arange(10, 50)
+
+    for mode in ("float32", "int8", "binary"):
+        original = VectorIndex(mode=mode).fit(vectors)
+        updated = original.updated(keep, added)
+        refit = VectorIndex(mode=mode).fit(np.concatenate([vectors[keep], added]))
+        assert len(original) == 50 and len(updated) == 45
+        assert (updated.search(added, 3)[0] == refit.search(added, 3)[0]).all()
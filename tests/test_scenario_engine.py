@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from ai_models.company_advisor import CompanyAdvisor
+from ai_models.scenario_engine import URGENCY_LEVELS, ScenarioTooLarge, evaluate_scenarios
+
+
+def test_cube_matches_company_advisor_cell_by_cell():
+    advisor = CompanyAdvisor()
+    departments = [
+        {"department": "Engineering", "avg_stress": 7.2, "attrition_rate": 18.0, "team_size": 120},
+        {"department": "Sales", "avg_stress": 5.0, "attrition_rate": 9.5, "team_size": 40},
+    ]
+    cube = evaluate_scenarios(departments, np.arange(-3, 3.5, 0.5), np.arange(-10, 12, 2), [-30, 0, 80], advisor)
+    assert cube.shape == (2, 13, 11, 3) and cube.score_cube().shape == cube.shape
+
+    for d in range(2):
+        for s in range(13):
+            for a in range(11):
+                cell = cube.cell(d, s, a)
+                assert cell["wellness_score"] == advisor.calculate_wellness_score(cell["avg_stress"], cell["attrition_rate"])
+                assert cell["urgency_level"] == advisor.classify_urgency(cell["avg_stress"], cell["attrition_rate"])
+                assert cell["urgency_level"] == advisor.get_company_recommendations(cell)["urgency_level"]
+    assert cube.team_size[0].tolist() == [90, 120, 200]
+
+
+def test_summary_finds_lowest_stress_and_attrition_as_best():
+    cube = evaluate_scenarios([{"department": "Design", "avg_stress": 8.5, "attrition_rate": 22.0}],
+                              [-2, -1, 0], [-10, 0])
+    (summary,) = cube.summary()
+    assert summary["baseline"]["urgency_level"] == "critical"
+    assert summary["best"]["avg_stress"] == 6.5 and summary["best"]["urgency_level"] == "high"
+    assert sum(summary["urgency_share"].values()) == 1.0
+    assert set(summary["urgency_share"]) == set(URGENCY_LEVELS)
+
+    # The baseline team size comes from the zero delta, wherever it sits
+    cube = evaluate_scenarios([{"department": "Design", "avg_stress": 5.0, "attrition_rate": 5.0, "team_size": 95}],
+                              [0], [0], [10, 0])
+    (summary,) = cube.summary()
+    assert summary["baseline"]["team_size"] == summary["best"]["team_size"] == 95
+    assert not summary["baseline"]["large_team"]
+
+
+def test_oversized_cubes_are_refused_before_allocation():
+    departments = [{"department": f"D{i}"} for i in range(10)]
+    deltas = list(range(100))
+    with pytest.raises(ScenarioTooLarge):
+        evaluate_scenarios(departments, deltas, deltas, deltas, max_cells=999_999)
+    assert evaluate_scenarios(departments, deltas, deltas[:10], max_cells=10_000).cells == 10_000
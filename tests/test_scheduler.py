@@ -0,0 +1,108 @@
+import threading
+import time
+
+from scheduler import CRISIS, CRISIS_BUDGET_SECONDS, ELEVATED, ROUTINE, InferenceScheduler, PriorityClassifier
+from slo import SLOController
+
+
+def blocked_scheduler(**kwargs):
+    """A one-worker scheduler whose worker is held until the returned event is set"""
+    scheduler = InferenceScheduler(workers=1, crisis_lane=False, **kwargs)
+    started, release = threading.Event(), threading.Event()
+    scheduler.submit(CRISIS, lambda: started.set() or release.wait())
+    assert started.wait(timeout=5)
+    return scheduler, release
+
+
+def test_batched_requests_queued_together_share_one_call():
+    calls = []
+
+    def generate_batch(items, deadline=None):
+        calls.append((list(items), deadline))
+        return [f"advice {item}" for item in items]
+
+    scheduler, release = blocked_scheduler(max_batch=3)
+    futures = [scheduler.submit_batched(ROUTINE, generate_batch, i, deadline=10.0 + i) for i in range(4)]
+    crisis = scheduler.submit_batched(CRISIS, generate_batch, "urgent")
+    release.set()
+
+    assert [f.result(timeout=5) for f in futures] == [f"advice {i}" for i in range(4)]
+    assert crisis.result(timeout=5) == "advice urgent"
+    # The crisis request goes first on its own; routine ones are batched up to
+    # max_batch and stop at the earliest deadline among them
+    assert calls == [(["urgent"], None), ([0, 1, 2], 10.0), ([3], 13.0)]
+
+
+def test_a_failed_batch_fails_every_request_in_it():
+    def broken(items, deadline=None):
+        raise RuntimeError("decoder crashed")
+
+    scheduler, release = blocked_scheduler()
+    futures = [scheduler.submit_batched(ELEVATED, broken, i) for i in range(2)]
+    release.set()
+    for future in futures:
+        assert isinstance(future.exception(timeout=5), RuntimeError)
+
+
+def test_most_urgent_first_and_fifo_within_a_priority():
+    order = []
+    scheduler, release = blocked_scheduler()
+    queued = [(ROUTINE, "r1"), (ROUTINE, "r2"), (ELEVATED, "e1"), (CRISIS, "c1"), (ROUTINE, "r3"), (ELEVATED, "e2")]
+    futures = [scheduler.submit(priority, order.append, name) for priority, name in queued]
+    assert scheduler.queued() == {"crisis": 1, "elevated": 2, "routine": 3}
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert order == ["c1", "e1", "e2", "r1", "r2", "r3"]
+
+
+def test_crisis_lane_overtakes_running_and_queued_routine_work():
+    scheduler = InferenceScheduler(workers=1, crisis_lane=True)
+    started, release = threading.Event(), threading.Event()
+    running = scheduler.submit(ROUTINE, lambda: started.set() or release.wait())
+    assert started.wait(timeout=5)
+    queued = [scheduler.submit(ROUTINE, time.perf_counter) for _ in range(3)]
+
+    # The only regular worker is busy, but the crisis lane answers at once
+    assert scheduler.submit(CRISIS, lambda: "help").result(timeout=5) == "help"
+    assert not running.done() and not any(f.done() for f in queued)
+    release.set()
+    assert all(f.result(timeout=5) for f in queued)
+
+
+def test_crisis_requests_get_the_shorter_budget_and_skip_shedding():
+    classifier = PriorityClassifier()
+    assert classifier.classify(2, 7, 3, 8) == ROUTINE
+    assert classifier.classify(6, 8, 2, 7) == ELEVATED
+    assert classifier.classify(9, 8, 2, 7) == CRISIS
+
+    class Detector:
+        level = "high_priority"
+
+        def calculate_risk_factors(self, *args):
+            return {"current_risk_score": 0.0}
+
+        def determine_crisis_level(self, score):
+            return self.level
+
+    classifier.detector = Detector()
+    assert classifier.classify(3, 8, 2, 7) == CRISIS
+    classifier.detector.level = "medium_priority"
+    assert classifier.classify(3, 8, 2, 7) == ELEVATED
+
+    controller = SLOController(budget=2.0, max_inflight=1)
+    assert CRISIS_BUDGET_SECONDS < controller.budget
+    routine = controller.admit()
+    assert controller.admit().outcome == "overload"
+    crisis = controller.admit(budget=CRISIS_BUDGET_SECONDS, critical=True)
+    assert crisis.use_llm
+    assert abs(crisis.deadline - time.perf_counter() - CRISIS_BUDGET_SECONDS) < 0.05
+
+    # The crisis deadline reaches the decoder through the scheduler
+    seen = []
+    scheduler = InferenceScheduler(workers=1)
+    scheduler.submit_batched(CRISIS, lambda items, deadline: seen.append(deadline) or items,
+                             "urgent", deadline=crisis.deadline).result(timeout=5)
+    assert seen == [crisis.deadline]
+    controller.release(routine, 0.1)
+    controller.release(crisis, 0.1)
@@ -0,0 +1,147 @@
+import gc
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import http.client
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+import serve
+from shared_state import shared
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+    def increment(self) -> int:
+        self.value += 1
+        return self.value
+
+    def pid(self) -> int:
+        return os.getpid()
+
+
+# Served by the state owner when this module is the app under serve.py
+counter = shared("test_counter", Counter())
+
+
+async def count(request):
+    value = counter.increment()
+    # Hold this worker's event loop so concurrent requests land on the others
+    time.sleep(0.2)
+    return JSONResponse({"pid": os.getpid(), "parent": os.getppid(), "count": value,
+                         "frozen": gc.get_freeze_count()})
+
+
+async def owner(request):
+    return JSONResponse({"pid": counter.pid()})
+
+
+app = Starlette(routes=[Route("/count", count, methods=["POST"]), Route("/owner", owner)])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def call(port: int, method: str, path: str):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        conn.request(method, path)
+        response = conn.getresponse()
+        body = response.read()
+        return response.status, json.loads(body) if response.status == 200 else None
+    finally:
+        conn.close()
+
+
+def wait_for(port: int, path: str = "/owner", timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            status, body = call(port, "GET", path)
+            if status == 200:
+                return body
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise AssertionError(f"server on port {port} never answered {path}")
+
+
+def test_parse_args_accepts_several_workers():
+    args = serve.parse_args(["--workers", "4"])
+    assert args.workers == 4 and args.app == "main:app"
+
+
+def test_preload_app_freezes_the_preloaded_heap():
+    import torch
+    threads = torch.get_num_threads()
+    try:
+        assert serve.preload_app("test_serve:app") is app
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+        torch.set_num_threads(threads)
+
+
+def test_forked_workers_share_the_owner_state():
+    port = free_port()
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([os.path.dirname(__file__), os.path.join(ROOT, "backend"), ROOT])}
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "backend", "serve.py"), "--app", "test_serve:app",
+                             "--workers", "2", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+                            cwd=ROOT, env=env)
+    try:
+        owner_pid = wait_for(port)["pid"]
+
+        results = []
+        lock = threading.Lock()
+
+        def post():
+            body = call(port, "POST", "/count")[1]
+            with lock:
+                results.append(body)
+
+        for _ in range(5):
+            threads = [threading.Thread(target=post) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            if len({r["pid"] for r in results}) == 2:
+                break
+
+        # Two forked workers, each with the preloaded heap frozen
+        assert len({r["pid"] for r in results}) == 2
+        assert all(r["parent"] == proc.pid and r["frozen"] > 0 for r in results)
+        assert owner_pid not in {r["pid"] for r in results}
+        # One counter for both workers: no increment lost or repeated
+        assert sorted(r["count"] for r in results) == list(range(1, len(results) + 1))
+
+        # A killed owner is replaced, and workers reconnect to the new one
+        os.kill(owner_pid, signal.SIGKILL)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                status, body = call(port, "GET", "/owner")
+                if status == 200 and body["pid"] != owner_pid:
+                    break
+            except OSError:
+                pass
+            time.sleep(0.1)
+        else:
+            raise AssertionError("the state owner was not restarted")
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=30) == 0
@@ -0,0 +1,59 @@
+from slo import SLOController, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run_requests(controller, latency, count):
+    for _ in range(count):
+        admission = controller.admit()
+        controller.release(admission, latency)
+
+
+def test_breaker_trips_on_p95_and_recovers_after_probes():
+    clock = FakeClock()
+    controller = SLOController(target_p95=1.0, budget=0.5, min_samples=5, cooldown=10.0,
+                               recovery_probes=2, clock=clock)
+
+    run_requests(controller, 2.0, 5)
+    assert controller.state == OPEN
+    rejected = controller.admit()
+    assert rejected.outcome == "circuit_open"
+    controller.release(rejected, 0.0)
+
+    clock.now = 11.0
+    probe = controller.admit()
+    assert probe.use_llm and probe.probe and controller.state == HALF_OPEN
+    # Only one probe at a time
+    rejected = controller.admit()
+    assert not rejected.use_llm
+    controller.release(rejected, 0.0)
+    controller.release(probe, 0.2)
+    run_requests(controller, 0.2, 1)
+    assert controller.state == CLOSED
+
+    stats = controller.stats()
+    assert stats["trips"] == 1
+    assert stats["outcomes"]["circuit_open"] == 2
+    assert 0 < stats["degraded_ratio"] < 1
+
+
+def test_sheds_beyond_inflight_limit():
+    controller = SLOController(max_inflight=1)
+    first = controller.admit()
+    second = controller.admit()
+    assert first.use_llm and first.deadline is not None
+    assert not second.use_llm and second.outcome == "overload"
+
+
+def test_critical_requests_bypass_inflight_limit():
+    controller = SLOController(max_inflight=1, budget=2.0)
+    controller.admit()
+    crisis = controller.admit(budget=0.5, critical=True)
+    assert crisis.use_llm
+    assert controller.admit(critical=True).deadline - crisis.deadline > 1.0
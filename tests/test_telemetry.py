@@ -0,0 +1,23 @@
+from telemetry import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("demo_seconds", "Demo latency", ["route"], buckets=(0.1, 1.0))
+    latency.observe(0.05, route="/a")
+    latency.observe(0.5, route="/a")
+    latency.observe(5.0, route="/a")
+
+    text = registry.render()
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{route="/a"} 3' in text
+
+
+def test_gauge_track_restores_value():
+    registry = MetricsRegistry()
+    depth = registry.gauge("demo_depth", "Demo queue depth", ["queue"])
+    with depth.track(queue="llm"):
+        assert depth.value(queue="llm") == 1
+    assert depth.value(queue="llm") == 0
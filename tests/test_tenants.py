@@ -0,0 +1,92 @@
+import json
+
+import numpy as np
+import pytest
+
+from resource_index import IndexSnapshot, flatten_resources
+from tenants import TenantIndexManager, UnknownTenantError
+from vector_store import VectorIndex
+
+BASE = {
+    "emergency_contacts": [{"resource_id": "EMG-001", "name": "Crisis Helpline", "description": "24/7 support"}],
+    "self_help_tools": [{"tool_id": "SH-001", "name": "Breathing Exercise", "benefit": "Instant stress relief"}],
+}
+
+
+class HashEncoder:
+    """Deterministic bag-of-words vectors, counting encoded texts"""
+
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.encoded += len(texts)
+        vectors = np.zeros((len(texts), 64), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, sum(map(ord, word)) % 64] += 1.0
+        return vectors
+
+
+class BaseEngine:
+    def __init__(self):
+        self.embedding_model = HashEncoder()
+        entries = flatten_resources(BASE)
+        embeddings = self.embedding_model.encode([e["text"] for e in entries])
+        self._snapshot = IndexSnapshot(version=1, entries=entries, embeddings=embeddings,
+                                       index=VectorIndex().fit(embeddings))
+
+    def encode_queries(self, queries):
+        return self.embedding_model.encode(queries)
+
+
+def write_tenant(root, tenant_id, tools):
+    (root / tenant_id).mkdir()
+    resources = {"self_help_tools": tools,
+                 "emergency_contacts": [{"resource_id": "EMG-001", "name": "Acme Crisis Line",
+                                         "description": "24/7 support for Acme staff"}]}
+    (root / tenant_id / "resources.json").write_text(json.dumps(resources))
+
+
+def test_tenant_results_shadow_base_and_vectors_are_cached(tmp_path):
+    write_tenant(tmp_path, "acme", [{"tool_id": "ACME-1", "name": "Quiet Room", "benefit": "Instant stress relief"}])
+    base = BaseEngine()
+    manager = TenantIndexManager(base, root=str(tmp_path))
+
+    results = manager.retrieve("acme", "24/7 support", top_k=3)
+    helplines = [r for r in results if r["type"] == "emergency"]
+    assert [r["resource"]["name"] for r in helplines] == ["Acme Crisis Line"]
+    assert helplines[0]["source"] == "tenant"
+
+    # A fresh manager loads the saved vectors instead of re-encoding
+    encoded = base.embedding_model.encoded
+    TenantIndexManager(base, root=str(tmp_path)).get("acme")
+    assert base.embedding_model.encoded == encoded
+
+
+def test_least_recently_used_tenant_is_evicted(tmp_path):
+    for tenant_id in ("a", "b", "c"):
+        write_tenant(tmp_path, tenant_id, [{"tool_id": f"{tenant_id}-{i}", "name": f"Tool {i}", "benefit": "x" * 200}
+                                           for i in range(20)])
+    manager = TenantIndexManager(BaseEngine(), root=str(tmp_path), budget_mb=0)
+    one_tenant = manager.get("a").size_bytes
+    manager.budget_bytes = 2 * one_tenant + 1
+
+    manager.get("b")
+    manager.get("a")
+    manager.get("c")
+    stats = manager.stats()
+    assert stats["loaded"] == ["a", "c"]
+    assert stats["evictions"] == 1 and stats["hits"] == 1
+
+
+def test_unknown_tenants_leave_no_load_locks(tmp_path):
+    write_tenant(tmp_path, "acme", [{"tool_id": "ACME-1", "name": "Quiet Room", "benefit": "Instant stress relief"}])
+    manager = TenantIndexManager(BaseEngine(), root=str(tmp_path))
+    for tenant_id in ("ghost-1", "ghost-2", "Not Valid"):
+        with pytest.raises(UnknownTenantError):
+            manager.get(tenant_id)
+    assert manager._load_locks == {}
+
+    manager.get("acme")
+    assert list(manager._load_locks) == ["acme"]
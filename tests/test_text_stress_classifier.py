@@ -0,0 +1,45 @@
+import json
+
+import numpy as np
+
+from ai_models.text_stress_classifier import (LEVELS, TextStressClassifier, load_classifier, load_examples)
+
+
+def test_single_text_fast_path_matches_batch_scoring_and_survives_save(tmp_path):
+    classifier = load_classifier(path=str(tmp_path / "missing.npz"))
+    texts = ["Working until midnight again, I'm exhausted and anxious",
+             "Relaxed day, lunch walk with the team", "", "Deadline Friday!! a bit nervous"]
+
+    batch = classifier.predict_proba(texts)
+    single = np.vstack([classifier.predict_proba([t]) for t in texts])
+    assert np.allclose(batch, single, atol=1e-5)
+    assert classifier.analyze(texts[0])["level"] == "High"
+    assert classifier.analyze(texts[1])["level"] == "Low"
+
+    path = str(tmp_path / "model.npz")
+    classifier.save(path)
+    loaded = load_classifier(path=path)
+    assert np.allclose(loaded.score(texts), classifier.score(texts))
+
+
+def test_embedding_head_and_stress_level_labels(tmp_path):
+    data = tmp_path / "labels.jsonl"
+    rows = [{"text": "calm", "stress_level": 0.1}, {"text": "fine", "level": "low"},
+            {"text": "panic", "stress_level": 0.9}, {"text": "swamped", "level": "HIGH"}]
+    data.write_text("\n".join(json.dumps(r) for r in rows))
+    texts, labels = load_examples(str(data))
+    assert [LEVELS[i] for i in labels] == ["Low", "Low", "High", "High"]
+
+    vectors = {"calm": [1, 0], "fine": [0.9, 0.1], "panic": [0, 1], "swamped": [0.1, 0.9]}
+    encoder = lambda batch: np.array([vectors[t] for t in batch])
+    classifier = TextStressClassifier(encoder=encoder).fit(texts, labels, head="embedding")
+    path = str(tmp_path / "embedding.npz")
+    classifier.save(path)
+
+    # Without an encoder the embedding artifact can't score, so the loader retrains a hashing head
+    assert load_classifier(path=path, data_path=str(data)).head == "hashing"
+    loaded = load_classifier(path=path, encoder=encoder)
+    assert loaded.head == "embedding"
+    scores = loaded.score(["calm", "panic"])
+    assert scores[0] < scores[1]
+    assert loaded.predict_proba(["panic"])[0, LEVELS.index("Moderate")] < 1e-6
@@ -0,0 +1,33 @@
+from backend.user_store import UserStore
+
+
+def test_load_user_creates_defaults(tmp_path):
+    store = UserStore(str(tmp_path / "engcare.db"))
+    data = store.load_user("alice")
+    assert data['wellness_points'] == 450
+    assert data['problems_solved'] == 0
+
+
+def test_updates_are_buffered_until_flush(tmp_path):
+    store = UserStore(str(tmp_path / "engcare.db"))
+    store.load_user("alice")
+    store.update_user("alice", wellness_points=500, streak=6)
+
+    stored = store.query("SELECT wellness_points FROM users WHERE user_id = ?", ("alice",))
+    assert stored[0]['wellness_points'] == 450
+    assert store.load_user("alice")['wellness_points'] == 500
+
+    assert store.flush() == 1
+    reopened = UserStore(str(tmp_path / "engcare.db"))
+    assert reopened.load_user("alice")['streak'] == 6
+
+
+def test_recent_solutions_are_bounded_and_newest_first(tmp_path):
+    store = UserStore(str(tmp_path / "engcare.db"))
+    store.load_user("alice")
+    for i in range(10):
+        store.log_problem("alice", f"problem {i}", "solution")
+
+    recent = store.recent_solutions("alice", limit=3)
+    assert [r['problem'] for r in recent] == ["problem 9", "problem 8", "problem 7"]
+    assert store.problem_count("alice") == 10
@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+import pytest
+
+from vector_store import VectorIndex
+
+
+@pytest.fixture
+def corpus():
+    # Clustered, with a decaying spectrum like real sentence embeddings
+    rng = np.random.default_rng(0)
+    points = rng.normal(size=(20, 64))[rng.integers(0, 20, 2000)] + 0.3 * rng.normal(size=(2000, 64))
+    return (points * np.geomspace(1.0, 0.05, 64)).astype(np.float32)
+
+
+def recall(index, corpus, queries, k=10):
+    exact, _ = VectorIndex().fit(corpus).search(queries, k)
+    found, _ = index.search(queries, k)
+    return np.mean([len(set(a) & set(b)) / k for a, b in zip(exact, found)])
+
+
+@pytest.mark.parametrize("mode,dims,minimum", [("int8", None, 0.9), ("binary", None, 0.8), ("float32", 32, 0.8)])
+def test_compressed_modes_keep_recall(corpus, mode, dims, minimum):
+    index = VectorIndex(mode=mode, dims=dims).fit(corpus)
+    assert recall(index, corpus, corpus[:50]) >= minimum
+    assert index.memory_bytes()["codes"] < corpus.nbytes
+
+
+def test_binary_rescoring_from_memory_map(corpus, tmp_path):
+    index = VectorIndex(mode="binary").fit(corpus, rescore_path=str(tmp_path / "rescore.npy"))
+    indices, scores = index.search(corpus[:3], 5)
+    assert indices.shape == (3, 5)
+    assert list(indices[:, 0]) == [0, 1, 2]
+    assert index.memory_bytes()["resident"] < corpus.nbytes / 8
+
+
+def test_updated_index_keeps_rescoring_vectors_mapped(corpus, tmp_path):
+    path = str(tmp_path / "rescore.npy")
+    index = VectorIndex(mode="binary", rescore_path=path).fit(corpus[:1500])
+    before = index.search(corpus[:5], 5)
+
+    keep = np.arange(100, 1500)
+    updated = index.updated(keep, corpus[1500:])
+    expected = VectorIndex(mode="binary").fit(corpus[:1500]).updated(keep, corpus[1500:])
+    assert isinstance(updated.vectors, np.memmap) and updated.vectors.shape == expected.vectors.shape
+    assert np.array_equal(updated.search(corpus[1500:1505], 5)[0], expected.search(corpus[1500:1505], 5)[0])
+    assert updated.memory_bytes()["resident"] < corpus.nbytes / 8
+
+    # The old index still reads the rows it was built with
+    assert np.array_equal(index.search(corpus[:5], 5)[0], before[0])
+    assert sorted(os.listdir(tmp_path)) == ["rescore.npy"]